@@ -0,0 +1,114 @@
+from api import cache as api_cache
+from api import metrics
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+CACHE_NAME = 'users'
+SNAPSHOT_FIELDS = ('id', 'username', 'role', 'is_superuser', 'is_active')
+
+local_users = api_cache.LocalCache(
+    settings.AUTH_USER_LOCAL_SIZE, settings.AUTH_USER_LOCAL_TTL
+)
+
+
+def user_key(user_id):
+    return f'{CACHE_NAME}:{user_id}'
+
+
+def read_snapshot(user_id):
+    return (
+        User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+        .values(*SNAPSHOT_FIELDS)
+        .first()
+    )
+
+
+def get_snapshot(user_id):
+    """
+    Снимок полей SNAPSHOT_FIELDS пользователя: из памяти процесса,
+    из общего кеша или из БД. None, если пользователя нет.
+    Запись общего кеша помечена версией пользователя, прочитанной до
+    запроса к БД: если сброс (invalidate_user) случился, пока запрос
+    читал старую строку, запись получит устаревшую версию и не будет
+    использована.
+    """
+    key = user_key(user_id)
+    snapshot = local_users.get(key)
+    if snapshot is not None:
+        return snapshot
+    version_key = api_cache.version_key(key)
+    entries = cache.get_many([version_key, key])
+    version = entries.get(version_key) or api_cache.invalidate(key)
+    entry = entries.get(key)
+    if entry is not None and entry['version'] == version:
+        metrics.record_cache(CACHE_NAME, 'hit')
+        snapshot = entry['snapshot']
+    else:
+        metrics.record_cache(CACHE_NAME, 'miss')
+        snapshot = read_snapshot(user_id)
+        if snapshot is None:
+            return None
+        cache.set(
+            key,
+            {'version': version, 'snapshot': snapshot},
+            settings.AUTH_USER_CACHE_TIMEOUT,
+        )
+    local_users.set(key, snapshot)
+    return snapshot
+
+
+def invalidate_user(user_id):
+    """
+    Меняет версию снимка пользователя в общем кеше
+    и сбрасывает снимок в памяти процесса.
+    """
+    key = user_key(user_id)
+    api_cache.invalidate(key)
+    local_users.delete(key)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT аутентификация без запроса к таблице пользователей.
+    request.user — пользователь, у которого загружены только поля
+    SNAPSHOT_FIELDS; остальные поля загружаются из БД при обращении.
+    Снимок сбрасывается при сохранении или удалении пользователя
+    (api.signals); в других процессах — не позже чем через
+    settings.AUTH_USER_LOCAL_TTL секунд.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            )
+        snapshot = get_snapshot(user_id)
+        if snapshot is None:
+            raise AuthenticationFailed(
+                'User not found', code='user_not_found'
+            )
+        user = User.from_db(
+            DEFAULT_DB_ALIAS,
+            SNAPSHOT_FIELDS,
+            # from_db ждёт значения в порядке полей модели.
+            [
+                snapshot[field.attname]
+                for field in User._meta.concrete_fields
+                if field.attname in snapshot
+            ],
+        )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'User is inactive', code='user_inactive'
+            )
+        return user
@@ -0,0 +1,94 @@
+"""
+Выполнение пакета GET запросов к маршрутам router_v1 внутри одного
+HTTP запроса (/v1/batch/).
+Подзапросы используют пользователя, уже определённого для пакета,
+и общий кеш пакета (shared): например, произведение из адресов
+/titles/{id}/reviews/ загружается один раз на пакет.
+"""
+import copy
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.http import QueryDict
+from django.urls import Resolver404, resolve
+
+CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+
+def shared(request, key, load):
+    """
+    Значение из общего кеша пакета; вне пакета просто вызывает load().
+    Подходит только для данных, которые подзапросы не изменяют.
+    """
+    batch_cache = getattr(request, 'batch_cache', None)
+    if batch_cache is None:
+        return load()
+    if key not in batch_cache:
+        batch_cache[key] = load()
+    return batch_cache[key]
+
+
+def resolve_route(path):
+    """
+    Разрешает адрес подзапроса. Возвращает ResolverMatch
+    или None, если адрес не ведёт на маршрут router_v1.
+    """
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    # Маршруты router_v1 — наборы представлений, у них есть actions.
+    if match.namespace != 'api' or not getattr(match.func, 'actions', None):
+        return None
+    return match
+
+
+def get_cost(match):
+    """Стоимость подзапроса: список дороже объекта."""
+    if match.url_name.endswith('-list'):
+        return settings.BATCH_LIST_COST
+    return 1
+
+
+def make_subrequest(request, path, query, batch_cache):
+    """GET подзапрос с пользователем и заголовками исходного запроса."""
+    subrequest = copy.copy(request._request)
+    subrequest.method = 'GET'
+    subrequest.path = subrequest.path_info = path
+    subrequest.GET = QueryDict(query)
+    subrequest.META = {
+        **request.META,
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+    }
+    for header in CONDITIONAL_HEADERS:
+        subrequest.META.pop(header, None)
+    if request.user.is_authenticated:
+        # Аутентификация пакета без повторной проверки токена;
+        # анонимные подзапросы отвечают 401, как и без пакета.
+        subrequest._force_auth_user = request.user
+        subrequest._force_auth_token = request.auth
+    subrequest.batch_cache = batch_cache
+    return subrequest
+
+
+def run(request, paths):
+    """
+    Выполняет подзапросы по порядку, возвращает их статусы и данные.
+    Адреса должны быть проверены заранее (BatchSerializer).
+    """
+    batch_cache = {}
+    responses = []
+    for url in paths:
+        parts = urlsplit(url)
+        match = resolve_route(parts.path)
+        subrequest = make_subrequest(
+            request, parts.path, parts.query, batch_cache
+        )
+        subrequest.resolver_match = match
+        response = match.func(subrequest, *match.args, **match.kwargs)
+        responses.append(
+            {'status': response.status_code, 'body': response.data}
+        )
+    return responses
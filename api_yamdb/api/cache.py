@@ -0,0 +1,167 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from api import metrics
+from django.conf import settings
+from django.core.cache import cache
+
+# Версия каталога произведений: меняется при любом изменении данных,
+# которые попадают в список произведений.
+TITLES = 'titles'
+
+
+def version_key(cache_name):
+    return f'{cache_name}:version'
+
+
+def get_version(cache_name):
+    """
+    Текущая версия кеша cache_name.
+    Версия входит в ключи записей, смена версии делает их недоступными.
+    """
+    return cache.get(version_key(cache_name)) or invalidate(cache_name)
+
+
+def invalidate(cache_name):
+    """
+    Сбрасывает все записи кеша cache_name, возвращает новую версию.
+    В кеше процесса версия живёт не дольше LIST_CACHE_TIMEOUT: другие
+    воркеры не видят смены версии и должны получить новую сами.
+    """
+    version = uuid.uuid4().hex
+    cache.set(
+        version_key(cache_name),
+        version,
+        None if settings.CACHE_IS_SHARED else settings.LIST_CACHE_TIMEOUT,
+    )
+    return version
+
+
+def request_key(cache_name, request):
+    """Ключ записи по адресу и параметрам запроса без учёта их порядка."""
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    digest = hashlib.md5(
+        f'{request.get_host()}{request.path}{params}'.encode()
+    ).hexdigest()
+    return f'{cache_name}:{get_version(cache_name)}:{digest}'
+
+
+def read(cache_name, key):
+    """Читает запись и учитывает попадание или промах в метриках."""
+    data = cache.get(key)
+    metrics.record_cache(cache_name, 'miss' if data is None else 'hit')
+    return data
+
+
+def write(key, data, timeout=None):
+    cache.set(
+        key, data, settings.LIST_CACHE_TIMEOUT if timeout is None else timeout
+    )
+
+
+def is_fresh(entry, version):
+    """Запись есть, её версия совпадает и мягкий срок не истёк."""
+    return (
+        entry is not None
+        and entry['version'] == version
+        and entry['fresh_until'] > time.time()
+    )
+
+
+def read_through(cache_name, key, version, compute):
+    """
+    Читает запись с мягким сроком жизни, вычисляя её через compute()
+    не более чем в одном процессе одновременно.
+    Запись актуальна, пока совпадает версия данных version и не истёк
+    мягкий срок settings.READ_THROUGH_SOFT_TTL. Неактуальную запись
+    обновляет тот, кто захватил блокировку, остальные получают старые
+    данные. Если записи нет, остальные ждут результата не дольше
+    settings.READ_THROUGH_WAIT секунд.
+    Возвращает пару (данные, актуальны ли они).
+    """
+    entry = cache.get(key)
+    if is_fresh(entry, version):
+        metrics.record_cache(cache_name, 'hit')
+        return entry['data'], True
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, settings.READ_THROUGH_LOCK_TIMEOUT):
+        try:
+            data = compute()
+            cache.set(
+                key,
+                {
+                    'data': data,
+                    'version': version,
+                    'fresh_until': time.time()
+                    + settings.READ_THROUGH_SOFT_TTL,
+                },
+                settings.READ_THROUGH_HARD_TTL,
+            )
+        finally:
+            cache.delete(lock_key)
+        metrics.record_cache(cache_name, 'miss')
+        return data, True
+    if entry:
+        metrics.record_cache(cache_name, 'stale')
+        return entry['data'], False
+    return wait_for(cache_name, key, version, compute)
+
+
+def wait_for(cache_name, key, version, compute):
+    """Ждёт записи, которую вычисляет другой запрос."""
+    deadline = time.monotonic() + settings.READ_THROUGH_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(settings.READ_THROUGH_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry and entry['version'] == version:
+            metrics.record_cache(cache_name, 'coalesced')
+            return entry['data'], True
+    metrics.record_cache(cache_name, 'miss')
+    return compute(), True
+
+
+class LocalCache:
+    """
+    Кеш в памяти процесса: не больше size записей, вытесняются давно
+    не читанные (LRU), каждая запись живёт не дольше ttl секунд.
+    """
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,92 @@
+"""
+Вложенные отзывы и комментарии в ответах о произведениях:
+?expand=reviews или ?expand=reviews.comments.
+Последние отзывы всех произведений страницы загружаются одним запросом,
+комментарии всех этих отзывов — ещё одним, независимо от количества
+произведений и отзывов.
+"""
+from django.conf import settings
+from django.db.models import OuterRef, Prefetch, Subquery
+from rest_framework import exceptions
+from reviews.models import Comment, Review
+
+EXPANSIONS = ('reviews', 'reviews.comments')
+LIMIT_PARAMS = {
+    'reviews': 'reviews_limit',
+    'comments': 'comments_limit',
+}
+
+
+def get_limit(query_params, name):
+    """Количество вложенных записей на родителя из параметра запроса."""
+    param = LIMIT_PARAMS[name]
+    value = query_params.get(param)
+    if value is None:
+        return settings.EXPAND_LIMITS[name]
+    if not value.isdigit() or not 0 < int(value) <= settings.EXPAND_MAX_LIMIT:
+        raise exceptions.ValidationError(
+            {param: f'Ожидается число от 1 до {settings.EXPAND_MAX_LIMIT}.'}
+        )
+    return int(value)
+
+
+def parse(query_params):
+    """
+    Разбирает параметр expand. Возвращает словарь
+    {'reviews': лимит, 'comments': лимит} только с запрошенными
+    уровнями вложенности.
+    """
+    requested = {
+        name for name in query_params.get('expand', '').split(',') if name
+    }
+    unknown = requested.difference(EXPANSIONS)
+    if unknown:
+        raise exceptions.ValidationError(
+            {'expand': f'Допустимые значения: {", ".join(EXPANSIONS)}.'}
+        )
+    if 'reviews.comments' in requested:
+        requested.add('reviews')
+    return {
+        name: get_limit(query_params, name)
+        for name in LIMIT_PARAMS
+        if name in requested or f'reviews.{name}' in requested
+    }
+
+
+def latest(queryset, parent_field, limit):
+    """
+    Не больше limit последних записей на каждого родителя.
+    Коррелированный подзапрос идёт по индексу (родитель, -pub_date, id).
+    """
+    ordering = ('-pub_date', '-id')
+    window = (
+        queryset.model.objects.filter(**{parent_field: OuterRef(parent_field)})
+        .order_by(*ordering)
+        .values('id')[:limit]
+    )
+    return queryset.filter(id__in=Subquery(window)).order_by(*ordering)
+
+
+def prefetch(expand):
+    """
+    Prefetch вложенных записей в атрибуты expanded_reviews
+    произведений и expanded_comments отзывов.
+    """
+    if 'reviews' not in expand:
+        return []
+    reviews = latest(
+        Review.objects.select_related('author'), 'title_id', expand['reviews']
+    )
+    if 'comments' in expand:
+        reviews = reviews.prefetch_related(
+            Prefetch(
+                'comments',
+                queryset=latest(
+                    Comment.objects.select_related('author'),
+                    'review_id',
+                    expand['comments'],
+                ),
+                to_attr='expanded_comments',
+            )
+        )
+    return [Prefetch('reviews', queryset=reviews, to_attr='expanded_reviews')]
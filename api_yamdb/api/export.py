@@ -0,0 +1,220 @@
+"""
+Выгрузка каталога произведений в NDJSON или CSV потоком.
+Произведения читаются серверным курсором (iterator(chunk_size)) и
+обрабатываются пачками: жанры загружаются одним запросом на пачку,
+отзывы и комментарии пачки — двумя серверными курсорами, которые
+читаются по мере записи. Память не растёт ни с размером таблицы,
+ни с количеством отзывов у произведения.
+Записи совпадают с ответами API (быстрые сериализаторы api.fast).
+"""
+import csv
+import json
+from collections.abc import Iterator
+from itertools import islice
+
+from api import fast
+from reviews.models import Comment, Review, Title
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+FORMATS = (NDJSON, CSV)
+CONTENT_TYPES = {
+    NDJSON: 'application/x-ndjson',
+    CSV: 'text/csv; charset=utf-8',
+}
+CSV_COLUMNS = (
+    'id', 'name', 'year', 'description', 'genre', 'category', 'rating'
+)
+REVIEW_ORDERING = ('title_id', '-pub_date', 'id')
+COMMENT_ORDERING = (
+    'review__title_id', '-review__pub_date', 'review_id', '-pub_date', 'id'
+)
+BUFFER_SIZE = 64 * 1024
+
+
+def chunks(rows, size):
+    """Списки по size строк из итератора."""
+    rows = iter(rows)
+    chunk = list(islice(rows, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(rows, size))
+
+
+class Children:
+    """
+    Дочерние записи из отсортированного потока пар (запись, ключ
+    родителя), выдаваемые по родителям в том же порядке. Запрос
+    выполняется при первом обращении, строки читаются по мере выдачи.
+    """
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self.rows = None
+        self.current = None
+
+    def advance(self):
+        self.current = next(self.rows, None)
+
+    def take(self, key):
+        """
+        Записи родителя с ключом key. Записи с меньшим ключом (их родитель
+        появился или удалён после чтения родителей) пропускаются.
+        """
+        if self.rows is None:
+            self.rows = iter(self.pairs())
+            self.advance()
+        while self.current is not None and self.current[1] < key:
+            self.advance()
+        while self.current is not None and self.current[1] == key:
+            yield self.current[0]
+            self.advance()
+
+
+def review_key(title_id, pub_date, review_id):
+    """Ключ порядка отзывов: title_id, -pub_date, id."""
+    return title_id, -pub_date.timestamp(), review_id
+
+
+def serialized(serializer, queryset, chunk_size):
+    """Пары (запись, строка values()) из серверного курсора, пачками."""
+    rows = queryset.iterator(chunk_size=chunk_size)
+    for chunk in chunks(rows, chunk_size):
+        yield from zip(serializer.serialize(chunk), chunk)
+
+
+def review_pairs(title_ids, chunk_size):
+    """Пары ((отзыв, ключ отзыва), id произведения) в порядке выгрузки."""
+    serializer = fast.ReviewValuesSerializer(ordering=REVIEW_ORDERING)
+    queryset = serializer.get_queryset(
+        Review.objects.filter(title_id__in=title_ids)
+    ).order_by(*REVIEW_ORDERING)
+    for review, row in serialized(serializer, queryset, chunk_size):
+        key = review_key(row['title_id'], row['pub_date'], row['id'])
+        yield (review, key), row['title_id']
+
+
+def comment_pairs(title_ids, chunk_size):
+    """Пары (комментарий, ключ отзыва) в порядке выгрузки."""
+    serializer = fast.CommentValuesSerializer(ordering=COMMENT_ORDERING)
+    queryset = serializer.get_queryset(
+        Comment.objects.filter(review__title_id__in=title_ids)
+    ).order_by(*COMMENT_ORDERING)
+    for comment, row in serialized(serializer, queryset, chunk_size):
+        yield comment, review_key(
+            row['review__title_id'], row['review__pub_date'], row['review_id']
+        )
+
+
+def attach_reviews(records, chunk_size):
+    """
+    Добавляет к произведениям пачки отзывы с комментариями —
+    ленивыми итераторами по двум серверным курсорам: память не зависит
+    от количества отзывов и комментариев у произведения.
+    """
+    title_ids = [record['id'] for record in records]
+    reviews = Children(lambda: review_pairs(title_ids, chunk_size))
+    comments = Children(lambda: comment_pairs(title_ids, chunk_size))
+
+    def title_reviews(title_id):
+        for review, key in reviews.take(title_id):
+            review['comments'] = comments.take(key)
+            yield review
+
+    for record in records:
+        record['reviews'] = title_reviews(record['id'])
+
+
+def titles(chunk_size, with_reviews=False):
+    """Все произведения по порядку id, пачками по chunk_size."""
+    serializer = fast.TitleValuesSerializer()
+    rows = (
+        serializer.get_queryset(
+            Title.objects.with_rating().select_related('category')
+        )
+        .order_by('id')
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in chunks(rows, chunk_size):
+        records = serializer.serialize(chunk)
+        if with_reviews:
+            attach_reviews(records, chunk_size)
+        yield from records
+
+
+def dump(value):
+    """
+    Части JSON значения, как у json.dumps(ensure_ascii=False).
+    Итераторы (отзывы, комментарии) выводятся списками по мере чтения.
+    """
+    if isinstance(value, Iterator):
+        yield '['
+        for index, item in enumerate(value):
+            if index:
+                yield ', '
+            yield from dump(item)
+        yield ']'
+    elif isinstance(value, dict) and any(
+        isinstance(item, Iterator) for item in value.values()
+    ):
+        yield '{'
+        for index, (key, item) in enumerate(value.items()):
+            yield f'{", " if index else ""}{json.dumps(key)}: '
+            yield from dump(item)
+        yield '}'
+    else:
+        yield json.dumps(value, ensure_ascii=False)
+
+
+def buffered(parts, size=BUFFER_SIZE):
+    """Склеивает мелкие части в строки не короче size символов."""
+    buffer, length = [], 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def to_ndjson(records):
+    def parts():
+        for record in records:
+            yield from dump(record)
+            yield '\n'
+
+    return buffered(parts())
+
+
+class Line:
+    """Файл для csv.writer, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def to_csv(records):
+    """Строки CSV: жанры — slug через запятую, категория — slug."""
+    writer = csv.writer(Line())
+    yield writer.writerow(CSV_COLUMNS)
+    for record in records:
+        category = record['category']
+        yield writer.writerow((
+            record['id'],
+            record['name'],
+            record['year'],
+            record['description'],
+            ','.join(genre['slug'] for genre in record['genre']),
+            category and category['slug'],
+            record['rating'],
+        ))
+
+
+def export(output_format, chunk_size, with_reviews=False):
+    """Строки выгрузки в формате output_format."""
+    records = titles(chunk_size, with_reviews)
+    if output_format == CSV:
+        return to_csv(records)
+    return to_ndjson(records)
@@ -0,0 +1,136 @@
+"""
+Быстрые сериализаторы чтения для list и retrieve.
+Строят словари ответа из строк values() и заранее собранных словарей
+связанных записей, без экземпляров моделей и полей DRF. Вывод совпадает
+с сериализаторами из api.serializers до байта (tests/test_fast.py):
+при изменении полей сериализатора измените и быстрый вариант.
+"""
+from operator import itemgetter
+
+from django.db.models import F
+from rest_framework import serializers
+from reviews.models import Genre
+
+DATETIME_FIELD = serializers.DateTimeField()
+
+
+def datetime(value):
+    """Дата и время в формате DateTimeField DRF."""
+    return DATETIME_FIELD.to_representation(value)
+
+
+class ValuesSerializer:
+    """
+    Базовый быстрый сериализатор.
+    columns — поля вывода в порядке сериализатора DRF и столбцы values(),
+    нужные каждому из них. Значение поля берётся методом get_<поле>(row),
+    если он объявлен, иначе из первого столбца без преобразования.
+    """
+
+    columns = {}
+
+    def __init__(self, fields=None, ordering=()):
+        self.names = [
+            name for name in self.columns if fields is None or name in fields
+        ]
+        self.ordering = [field.lstrip('-') for field in ordering]
+        self.getters = [
+            (
+                name,
+                getattr(self, f'get_{name}', None)
+                or itemgetter(self.columns[name][0]),
+            )
+            for name in self.names
+        ]
+
+    def get_queryset(self, queryset):
+        """Строки values() со столбцами запрошенных полей и сортировки."""
+        lookups = {
+            lookup for name in self.names for lookup in self.columns[name]
+        }
+        return queryset.prefetch_related(None).values(
+            *lookups.union(self.ordering)
+        )
+
+    def prepare(self, rows):
+        """Загружает связанные записи для строк перед сериализацией."""
+
+    def serialize(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        getters = self.getters
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+
+class CommentValuesSerializer(ValuesSerializer):
+    """Быстрый вариант CommentsSerializer."""
+
+    columns = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+    }
+
+    @staticmethod
+    def get_pub_date(row):
+        return datetime(row['pub_date'])
+
+
+class ReviewValuesSerializer(CommentValuesSerializer):
+    """Быстрый вариант ReviewSerializer."""
+
+    columns = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+    }
+
+
+class TitleValuesSerializer(ValuesSerializer):
+    """
+    Быстрый вариант ReadingTitleSerializer.
+    Жанры всех произведений загружаются одним запросом.
+    """
+
+    columns = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'description': ('description',),
+        'genre': ('id',),
+        'category': ('category_id', 'category__name', 'category__slug'),
+        'rating': ('rating',),
+    }
+
+    def prepare(self, rows):
+        self.genres = {}
+        if 'genre' not in self.names or not rows:
+            return
+        # Тот же запрос, что и prefetch_related('genre'),
+        # чтобы порядок жанров совпадал.
+        genres = (
+            Genre.objects.filter(titles__in=[row['id'] for row in rows])
+            .annotate(title_id=F('titles__id'))
+            .values_list('title_id', 'name', 'slug')
+        )
+        for title_id, name, slug in genres:
+            self.genres.setdefault(title_id, []).append(
+                {'name': name, 'slug': slug}
+            )
+
+    def get_genre(self, row):
+        return self.genres.get(row['id'], [])
+
+    @staticmethod
+    def get_category(row):
+        if row['category_id'] is None:
+            return None
+        return {'name': row['category__name'], 'slug': row['category__slug']}
+
+    @staticmethod
+    def get_rating(row):
+        rating = row['rating']
+        return None if rating is None else int(rating)
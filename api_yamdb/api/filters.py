@@ -1,19 +1,80 @@
 import django_filters
-from reviews.models import Title
+from rest_framework.filters import OrderingFilter
+from reviews import search
+from reviews.models import Comment, Review, Title
 
 
 class TitleFilter(django_filters.rest_framework.FilterSet):
     """Фильтр ресурса Titles."""
 
-    genre = django_filters.CharFilter(
-        field_name='genre__slug', lookup_expr='exact'
-    )
+    genre = django_filters.CharFilter(method='filter_genre')
     category = django_filters.CharFilter(
         field_name='category__slug', lookup_expr='exact'
     )
-    name = django_filters.CharFilter(field_name='name', lookup_expr='contains')
+    name = django_filters.CharFilter(method='search_name')
     year = django_filters.CharFilter(field_name='year', lookup_expr='exact')
 
     class Meta:
         model = Title
         fields = ('genre', 'category', 'name', 'year')
+
+    def filter_genre(self, queryset, name, value):
+        """
+        Фильтр по жанру подзапросом, а не JOIN: связь с жанрами остаётся
+        свободной для подсчёта количества по жанрам (Title.facets).
+        """
+        return queryset.filter(
+            id__in=Title.genre.through.objects.filter(
+                genre__slug=value
+            ).values('title_id')
+        )
+
+    def search_name(self, queryset, name, value):
+        """
+        Поиск по названию с учётом опечаток. Без явной сортировки
+        в запросе результаты упорядочены по релевантности.
+        """
+        found = queryset.search(value)
+        ordering = queryset.query.order_by
+        if self.request is None or not self.request.query_params.get(
+            OrderingFilter.ordering_param
+        ):
+            ordering = ('-search_rank', *ordering)
+        return found.order_by(*ordering)
+
+
+class TextSearchFilter(django_filters.rest_framework.FilterSet):
+    """
+    Поиск по тексту отзывов и комментариев (q) с фильтрами по автору
+    и дате публикации: pub_date_after, pub_date_before.
+    """
+
+    q = django_filters.CharFilter(method='search_text')
+    author = django_filters.CharFilter(
+        field_name='author__username', lookup_expr='exact'
+    )
+    pub_date = django_filters.IsoDateTimeFromToRangeFilter()
+
+    def search_text(self, queryset, name, value):
+        return search.search_text(queryset, value)
+
+
+class ReviewSearchFilter(TextSearchFilter):
+    """Фильтр поиска по отзывам."""
+
+    title = django_filters.NumberFilter(field_name='title_id')
+
+    class Meta:
+        model = Review
+        fields = ('q', 'title', 'author', 'pub_date')
+
+
+class CommentSearchFilter(TextSearchFilter):
+    """Фильтр поиска по комментариям."""
+
+    title = django_filters.NumberFilter(field_name='review__title_id')
+    review = django_filters.NumberFilter(field_name='review_id')
+
+    class Meta:
+        model = Comment
+        fields = ('q', 'title', 'review', 'author', 'pub_date')
@@ -0,0 +1,237 @@
+import json
+import math
+import time
+import tracemalloc
+from typing import Any, Optional
+
+from api import views
+from api.queries import QueryCounter
+from api.urls import router_v1
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Comment
+from users.tokens import make_confirmation_code
+
+User = get_user_model()
+
+BENCHMARK_USERNAME = 'benchmark-admin'
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, percent):
+    """Процентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    Сравнивает результаты с эталоном.
+    Регрессия — рост p95 больше чем в (1 + threshold) раз
+    или рост количества SQL запросов.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result['p95_ms'] > reference['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p95 {result["p95_ms"]:.2f} мс, '
+                f'в эталоне {reference["p95_ms"]:.2f} мс'
+            )
+        if result['queries'] > reference['queries']:
+            regressions.append(
+                f'{name}: {result["queries"]} SQL запросов, '
+                f'в эталоне {reference["queries"]}'
+            )
+    return regressions
+
+
+class Command(BaseCommand):
+    """Команда измеряет производительность эндпоинтов API."""
+
+    help = (
+        'Измерить задержку (p50/p95/p99), пропускную способность, '
+        'количество SQL запросов и пиковую память для всех маршрутов '
+        'router_v1 и эндпоинтов аутентификации на данных текущей БД. '
+        'Данные можно подготовить командой generatedata.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Количество измеряемых запросов к каждому эндпоинту.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='Количество прогревочных запросов к каждому эндпоинту.',
+        )
+        parser.add_argument(
+            '--output',
+            default='bench_output.json',
+            help='Файл для результатов в формате JSON.',
+        )
+        parser.add_argument(
+            '--baseline', help='Файл с эталонными результатами.'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Допустимый относительный рост p95 по сравнению с эталоном.',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if options['requests'] < 1:
+            raise CommandError('Количество запросов должно быть больше 0.')
+        with override_settings(EMAIL_BACKEND=EMAIL_BACKEND):
+            with transaction.atomic():
+                results = {
+                    name: self.measure(request, options)
+                    for name, request in self.get_cases().items()
+                }
+                transaction.set_rollback(True)
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name}: p50 {result["p50_ms"]:.2f} мс, '
+                f'p95 {result["p95_ms"]:.2f} мс, '
+                f'p99 {result["p99_ms"]:.2f} мс, '
+                f'{result["rps"]:.0f} запр/с, '
+                f'{result["queries"]} SQL, {result["peak_kb"]:.0f} КБ'
+            )
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as baseline:
+                regressions = find_regressions(
+                    results, json.load(baseline), options['threshold']
+                )
+            if regressions:
+                raise CommandError(
+                    'Найдены регрессии:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write('Регрессий относительно эталона не найдено.')
+
+    def get_cases(self):
+        """
+        Собирает запросы ко всем маршрутам router_v1 (список и объект)
+        и к эндпоинтам аутентификации. Ключ — имя маршрута.
+        """
+        comment = (
+            Comment.objects.select_related('review__title', 'author')
+            .order_by('id')
+            .first()
+        )
+        if comment is None:
+            raise CommandError(
+                'В БД нет комментариев: сначала выполните generatedata.'
+            )
+        review = comment.review
+        admin = User.objects.create_user(
+            username=BENCHMARK_USERNAME,
+            email=f'{BENCHMARK_USERNAME}@yamdb.fake',
+            role='admin',
+        )
+        confirmation_code = make_confirmation_code(admin)
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(admin)}'}
+        url_kwargs = {
+            'title_id': review.title_id,
+            'review_id': review.id,
+            'comment_id': comment.id,
+        }
+        lookups = {
+            views.TitleViewSet: review.title_id,
+            views.ReviewViewSet: review.id,
+            views.CommentViewSet: comment.id,
+            views.UserViewset: comment.author.username,
+        }
+        cases = {}
+        for prefix, viewset, basename in router_v1.registry:
+            kwargs = {
+                name: value
+                for name, value in url_kwargs.items()
+                if f'<{name}>' in prefix
+            }
+            cases[f'{basename}-list'] = (
+                'get', reverse(f'api:{basename}-list', kwargs=kwargs), {}
+            )
+            if hasattr(viewset, 'retrieve'):
+                lookup = viewset.lookup_url_kwarg or viewset.lookup_field
+                kwargs[lookup] = lookups[viewset]
+                cases[f'{basename}-detail'] = (
+                    'get', reverse(f'api:{basename}-detail', kwargs=kwargs), {}
+                )
+        cases['users-me'] = ('get', reverse('api:users-me'), {})
+        cases['auth-signup'] = (
+            'post',
+            reverse('api:auth-signup'),
+            {'username': 'benchmark-signup', 'email': 'signup@yamdb.fake'},
+        )
+        cases['token-access-obtain'] = (
+            'post',
+            reverse('api:token-access-obtain'),
+            {
+                'username': BENCHMARK_USERNAME,
+                'confirmation_code': confirmation_code,
+            },
+        )
+        return {
+            name: (method, url, data, auth)
+            for name, (method, url, data) in cases.items()
+        }
+
+    def send(self, client, request):
+        """
+        Выполняет запрос внутри точки сохранения и откатывает её,
+        чтобы запросы на запись не меняли данные между повторами.
+        """
+        method, url, data, headers = request
+        with transaction.atomic():
+            response = getattr(client, method)(url, data, **headers)
+            transaction.set_rollback(True)
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{method.upper()} {url} вернул {response.status_code}.'
+            )
+        return response
+
+    def measure(self, request, options):
+        client = Client()
+        for _ in range(options['warmup']):
+            self.send(client, request)
+        timings = []
+        started = time.perf_counter()
+        for _ in range(options['requests']):
+            request_started = time.perf_counter()
+            self.send(client, request)
+            timings.append((time.perf_counter() - request_started) * 1000)
+        total = time.perf_counter() - started
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            self.send(client, request)
+        tracemalloc.start()
+        self.send(client, request)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result = {
+            f'p{percent}_ms': percentile(timings, percent)
+            for percent in PERCENTILES
+        }
+        result.update(
+            rps=options['requests'] / total,
+            queries=queries.count,
+            peak_kb=peak / 1024,
+        )
+        return result
@@ -0,0 +1,41 @@
+from datetime import timedelta
+from typing import Any, Optional
+
+from api.models import Change
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """Команда сжимает журнал изменений."""
+
+    help = (
+        'Удалить из журнала изменений старые записи, вытесненные более '
+        'новыми записями того же объекта. Последнее изменение каждого '
+        'объекта сохраняется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=settings.CHANGES_COMPACT_AFTER,
+            help='Сжимать записи старше указанного количества дней.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество записей, удаляемых одним запросом.',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if options['older_than'] < 0 or options['batch_size'] < 1:
+            raise CommandError(
+                'Возраст не может быть отрицательным, '
+                'размер пачки должен быть больше 0.'
+            )
+        before = timezone.now() - timedelta(days=options['older_than'])
+        deleted = Change.objects.compact(before, options['batch_size'])
+        self.stdout.write(f'Удалено записей журнала: {deleted}.')
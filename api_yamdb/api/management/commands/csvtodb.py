@@ -1,17 +1,134 @@
 import csv
 import datetime
+import hashlib
+import io
 import os
+import time
+from itertools import islice
 from typing import Any, Optional
 
+from api import cache
+from api.management.utils import reset_sequences
+from api.models import CsvCheckpoint
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from reviews.models import Category, Comment, Genre, Review, Title
 
 User = get_user_model()
 
 PUB_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
 
+READING_ORDER = {
+    'genre.csv': Genre,
+    'category.csv': Category,
+    'titles.csv': Title,
+    'genre_title.csv': Title.genre.through,
+    'users.csv': User,
+    'review.csv': Review,
+    'comments.csv': Comment,
+}
+INTEGERS = ('id', 'year', 'title_id', 'score', 'review_id', 'genre_id')
+RELATED_MODELS = ('category', 'author')
+DEFAULT_BATCH_SIZE = 1000
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def prepare_row(row):
+    """Приводит значения строки csv к типам полей модели."""
+    for column in INTEGERS:
+        if column in row:
+            row[column] = int(row[column])
+    for column in RELATED_MODELS:
+        if column in row:
+            row[column + '_id'] = int(row.pop(column))
+    if 'pub_date' in row:
+        row['pub_date'] = datetime.datetime.strptime(
+            row['pub_date'], PUB_DATE_FORMAT
+        )
+    return row
+
+
+def read_batches(reader, klass, batch_size):
+    """Читает csv по частям и отдаёт списки несохранённых объектов."""
+    while True:
+        batch = [
+            klass(**prepare_row(row)) for row in islice(reader, batch_size)
+        ]
+        if not batch:
+            return
+        yield batch
+
+
+def file_hash(path):
+    """Возвращает sha256 содержимого файла."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as binary_file:
+        for chunk in iter(lambda: binary_file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sync_columns(klass, fieldnames):
+    """
+    Поля модели, которые приходят из csv и сравниваются при синхронизации.
+    Первичный ключ и поля auto_now/auto_now_add не сравниваются.
+    """
+    columns = {
+        column + '_id' if column in RELATED_MODELS else column
+        for column in fieldnames
+    }
+    return [
+        field.attname
+        for field in klass._meta.concrete_fields
+        if field.attname in columns
+        and not field.primary_key
+        and not getattr(field, 'auto_now', False)
+        and not getattr(field, 'auto_now_add', False)
+    ]
+
+
+def split_changed(klass, batch, columns):
+    """Делит пачку на новые объекты и объекты с изменёнными полями."""
+    existing = klass.objects.in_bulk([obj.pk for obj in batch])
+    new, changed = [], []
+    for obj in batch:
+        current = existing.get(obj.pk)
+        if current is None:
+            new.append(obj)
+        elif any(
+            getattr(current, column) != getattr(obj, column)
+            for column in columns
+        ):
+            changed.append(obj)
+    return new, changed
+
+
+def affected_titles(klass, objects):
+    """
+    Произведения, чьё представление в API зависит от объектов пачки.
+    bulk_create и bulk_update не вызывают сигналов и не меняют
+    Title.modified, поэтому синхронизация отмечает их сама.
+    """
+    if klass is Title:
+        return Title.objects.filter(pk__in=[obj.pk for obj in objects])
+    if klass in (Title.genre.through, Review):
+        return Title.objects.filter(
+            pk__in={obj.title_id for obj in objects}
+        )
+    if klass is Comment:
+        return Title.objects.filter(
+            reviews__in={obj.review_id for obj in objects}
+        )
+    if klass is Genre:
+        return Title.objects.filter(genre__in=[obj.pk for obj in objects])
+    if klass is Category:
+        return Title.objects.filter(
+            category__in=[obj.pk for obj in objects]
+        )
+    return Title.objects.by_author([obj.pk for obj in objects])
+
 
 class Command(BaseCommand):
     """Команда загружает тестовые данные в БД."""
@@ -21,45 +138,137 @@ class Command(BaseCommand):
         'settings.CSV_FILES_DIR, в БД.'
     )
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одной пачке вставки.',
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Загружать через COPY FROM STDIN (только PostgreSQL).',
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help=(
+                'Синхронизировать БД с csv по первичному ключу: вставить '
+                'новые строки, обновить изменённые, пропустить файлы без '
+                'изменений и продолжить прерванную загрузку.'
+            ),
+        )
+
     def handle(self, *args: Any, **options: Any) -> Optional[str]:
         """
-        Читает csv файлы, с помощью Django ORM создаёт объекты и сохраняет.
+        Читает csv файлы по частям и вставляет строки пачками:
+        bulk_create или COPY FROM STDIN. Каждый файл загружается
+        в отдельной транзакции.
+        """
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('Режим --copy доступен только для PostgreSQL.')
+        if options['copy'] and options['sync']:
+            raise CommandError('Режимы --copy и --sync несовместимы.')
+        self.verbosity = options['verbosity']
+        insert = self.copy_batch if options['copy'] else self.bulk_batch
+        for file_name, klass in READING_ORDER.items():
+            started = time.monotonic()
+            if options['sync']:
+                rows = self.sync_file(file_name, klass, options['batch_size'])
+            else:
+                with transaction.atomic():
+                    rows = self.load_file(
+                        file_name, klass, insert, options['batch_size']
+                    )
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{file_name} загружен: {rows} строк за {elapsed:.2f} с '
+                f'({rows / elapsed if elapsed else rows:.0f} строк/с).'
+            )
+        reset_sequences(READING_ORDER.values())
+        Title.objects.recount_rating()
+        cache.invalidate(cache.TITLES)
+        self.stdout.write('Команда успешно закончила своё выполнение.')
+
+    def load_file(self, file_name, klass, insert, batch_size):
+        """Загружает один файл, возвращает количество строк."""
+        rows = 0
+        path = os.path.join(settings.CSV_FILES_DIR, file_name)
+        with open(path, newline='', encoding='utf-8') as csv_file:
+            reader = csv.DictReader(csv_file)
+            for batch in read_batches(reader, klass, batch_size):
+                insert(klass, batch)
+                rows += len(batch)
+                if self.verbosity > 1:
+                    self.stdout.write(f'{file_name}: {rows} строк...')
+        return rows
+
+    def sync_file(self, file_name, klass, batch_size):
+        """
+        Синхронизирует один файл, возвращает количество обработанных строк.
+        Каждая пачка фиксируется в БД вместе с отметкой о прогрессе,
+        поэтому после сбоя загрузка продолжается с последней пачки.
         """
-        os.chdir(settings.CSV_FILES_DIR)
-        reading_order = {
-            'genre.csv': Genre,
-            'category.csv': Category,
-            'titles.csv': Title,
-            'genre_title.csv': None,
-            'users.csv': User,
-            'review.csv': Review,
-            'comments.csv': Comment,
-        }
-        integers = ('id', 'year', 'title_id', 'score', 'review_id')
-        related_models = ('category', 'author')
-        for file_name, klass in reading_order.items():
-            with open(file_name, newline='', encoding='utf-8') as csv_file:
-                reader = csv.DictReader(csv_file)
-                if file_name == 'genre_title.csv':
-                    for row in reader:
-                        obj = Title.objects.get(id=int(row.get('title_id')))
-                        obj.genre.add(
-                            Genre.objects.get(id=int(row.get('genre_id')))
-                        )
-                        obj.save()
-                else:
-                    for row in reader:
-                        for column in integers:
-                            if column in row:
-                                row[column] = int(row[column])
-                        for column in related_models:
-                            if column in row:
-                                row[column + '_id'] = int(row.pop(column))
-                        if 'pub_date' in row:
-                            row['pub_date'] = datetime.datetime.strptime(
-                                row['pub_date'], PUB_DATE_FORMAT
-                            )
-                        obj = klass(**row)
-                        obj.save()
-            print(f'{file_name} загружен.')
-        print('Команда успешно закончила своё выполнение.')
+        path = os.path.join(settings.CSV_FILES_DIR, file_name)
+        content_hash = file_hash(path)
+        checkpoint, _ = CsvCheckpoint.objects.get_or_create(
+            file_name=file_name, defaults={'content_hash': content_hash}
+        )
+        if checkpoint.content_hash != content_hash:
+            checkpoint.content_hash = content_hash
+            checkpoint.rows_done = 0
+            checkpoint.completed = False
+        elif checkpoint.completed:
+            self.stdout.write(f'{file_name} не изменился, пропущен.')
+            return 0
+        rows = 0
+        with open(path, newline='', encoding='utf-8') as csv_file:
+            reader = csv.DictReader(csv_file)
+            columns = sync_columns(klass, reader.fieldnames)
+            skipped = sum(1 for _ in islice(reader, checkpoint.rows_done))
+            for batch in read_batches(reader, klass, batch_size):
+                new, changed = split_changed(klass, batch, columns)
+                with transaction.atomic():
+                    klass.objects.bulk_create(new)
+                    if changed and columns:
+                        klass.objects.bulk_update(changed, columns)
+                    if new or changed:
+                        affected_titles(klass, new + changed).touch()
+                    checkpoint.rows_done += len(batch)
+                    checkpoint.save()
+                rows += len(batch)
+                if self.verbosity > 1:
+                    self.stdout.write(
+                        f'{file_name}: {skipped + rows} строк, новых '
+                        f'{len(new)}, изменённых {len(changed)}...'
+                    )
+        checkpoint.completed = True
+        checkpoint.save()
+        return rows
+
+    def bulk_batch(self, klass, batch):
+        klass.objects.bulk_create(batch)
+
+    def copy_batch(self, klass, batch):
+        """Вставляет пачку через COPY FROM STDIN в формате csv."""
+        fields = klass._meta.concrete_fields
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in batch:
+            writer.writerow(
+                '\\N' if value is None else value
+                for value in (field.pre_save(obj, True) for field in fields)
+            )
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(klass._meta.db_table)} '
+                f"({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
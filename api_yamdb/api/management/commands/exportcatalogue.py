@@ -0,0 +1,63 @@
+import sys
+from typing import Any, Optional
+
+from api import export
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """Команда выгружает каталог произведений в NDJSON или CSV."""
+
+    help = (
+        'Выгрузить все произведения с жанрами, категорией и рейтингом '
+        '(и, по желанию, с отзывами и комментариями) в NDJSON или CSV. '
+        'Произведения читаются серверным курсором, память не зависит '
+        'от размера каталога.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-format',
+            choices=export.FORMATS,
+            default=export.NDJSON,
+            help='Формат выгрузки.',
+        )
+        parser.add_argument(
+            '--reviews',
+            action='store_true',
+            help='Добавить отзывы и комментарии (только NDJSON).',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.EXPORT_CHUNK_SIZE,
+            help='Количество произведений, читаемых из БД за раз.',
+        )
+        parser.add_argument(
+            '--file', help='Файл для выгрузки, по умолчанию stdout.'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if options['chunk_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше 0.')
+        if options['reviews'] and options['output_format'] == export.CSV:
+            raise CommandError(
+                'Отзывы и комментарии выгружаются только в NDJSON.'
+            )
+        lines = export.export(
+            options['output_format'],
+            options['chunk_size'],
+            options['reviews'],
+        )
+        if options['file'] is None:
+            self.write_lines(sys.stdout, lines)
+            return
+        with open(
+            options['file'], 'w', encoding='utf-8', newline=''
+        ) as output:
+            self.write_lines(output, lines)
+
+    def write_lines(self, output, lines):
+        for line in lines:
+            output.write(line)
@@ -0,0 +1,240 @@
+import random
+import time
+from typing import Any, Optional
+
+from api import cache
+from api.management.utils import reset_sequences
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from reviews.models import Category, Comment, Genre, Review, Title
+
+User = get_user_model()
+
+DEFAULT_BATCH_SIZE = 5000
+TITLE_YEARS = (1900, 2021)
+
+
+def next_id(klass):
+    """Первый свободный id модели."""
+    return (klass.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+def zipf_counts(total, amount, skew, limit, rng):
+    """
+    Распределяет total элементов по amount получателям по закону Ципфа.
+    При skew = 0 распределение равномерное. Ранги перемешиваются,
+    количество для одного получателя не превышает limit. Остатки
+    от округления и сверх limit раздаются по убыванию дробной части,
+    поэтому сумма равна total; total не должен превышать amount * limit.
+    """
+    weights = [1 / rank ** skew for rank in range(1, amount + 1)]
+    weight_sum = sum(weights)
+    rng.shuffle(weights)
+    quotas = [total * weight / weight_sum for weight in weights]
+    counts = [min(limit, int(quota)) for quota in quotas]
+    order = sorted(
+        range(amount), key=lambda index: counts[index] - quotas[index]
+    )
+    remaining = total - sum(counts)
+    while remaining:
+        for index in order:
+            if remaining and counts[index] < limit:
+                counts[index] += 1
+                remaining -= 1
+    return counts
+
+
+class Command(BaseCommand):
+    """Команда генерирует синтетические данные для нагрузочного теста."""
+
+    help = (
+        'Сгенерировать в БД пользователей, категории, жанры, произведения, '
+        'отзывы и комментарии в заданном количестве.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument(
+            '--genres-per-title',
+            type=int,
+            default=2,
+            help='Максимальное количество жанров у произведения.',
+        )
+        parser.add_argument(
+            '--reviews',
+            type=int,
+            default=100000,
+            help='Общее количество отзывов.',
+        )
+        parser.add_argument(
+            '--reviews-skew',
+            type=float,
+            default=1.0,
+            help=(
+                'Показатель распределения Ципфа для количества отзывов '
+                'на произведение; 0 — равномерное распределение.'
+            ),
+        )
+        parser.add_argument(
+            '--comments-per-review',
+            type=float,
+            default=1.0,
+            help='Среднее количество комментариев к отзыву.',
+        )
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        if options['users'] < 1 and options['reviews']:
+            raise CommandError('Для отзывов нужен хотя бы один пользователь.')
+        if options['reviews'] > options['titles'] * options['users']:
+            raise CommandError(
+                'Отзывов больше, чем пар произведение — пользователь: '
+                'один пользователь оставляет один отзыв на произведение.'
+            )
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.started = time.monotonic()
+        self.rows = 0
+
+        users = self.create_users(options['users'])
+        categories = self.create_named(
+            Category, 'Категория', 'category', options['categories']
+        )
+        genres = self.create_named(Genre, 'Жанр', 'genre', options['genres'])
+        review_counts = zipf_counts(
+            options['reviews'],
+            options['titles'],
+            options['reviews_skew'],
+            len(users),
+            self.rng,
+        )
+        first_id = next_id(Title)
+        for start in range(0, options['titles'], self.batch_size):
+            counts = review_counts[start:start + self.batch_size]
+            with transaction.atomic():
+                self.create_titles(
+                    first_id + start,
+                    counts,
+                    categories,
+                    genres,
+                    users,
+                    options,
+                )
+            self.report('произведения и отзывы', start + len(counts))
+        reset_sequences((User, Category, Genre, Title, Review, Comment))
+        cache.invalidate(cache.TITLES)
+        self.stdout.write('Данные успешно сгенерированы.')
+
+    def report(self, name, done):
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f'{name}: {done}; всего строк {self.rows} за {elapsed:.1f} с '
+            f'({self.rows / elapsed if elapsed else self.rows:.0f} строк/с).'
+        )
+
+    def bulk_create(self, klass, objs):
+        klass.objects.bulk_create(objs, batch_size=self.batch_size)
+        self.rows += len(objs)
+
+    def create_users(self, amount):
+        first_id = next_id(User)
+        password = make_password(None)
+        ids = range(first_id, first_id + amount)
+        for start in range(0, amount, self.batch_size):
+            self.bulk_create(
+                User,
+                [
+                    User(
+                        id=pk,
+                        username=f'user{pk}',
+                        email=f'user{pk}@yamdb.fake',
+                        password=password,
+                        role=settings.USER_ROLE,
+                    )
+                    for pk in ids[start:start + self.batch_size]
+                ],
+            )
+        self.report('пользователи', amount)
+        return ids
+
+    def create_named(self, klass, name, slug, amount):
+        first_id = next_id(klass)
+        ids = range(first_id, first_id + amount)
+        self.bulk_create(
+            klass,
+            [
+                klass(id=pk, name=f'{name} {pk}', slug=f'{slug}-{pk}')
+                for pk in ids
+            ],
+        )
+        return ids
+
+    def create_titles(
+        self, first_id, review_counts, categories, genres, users, options
+    ):
+        """Создаёт пачку произведений вместе с жанрами и отзывами."""
+        rng = self.rng
+        titles, links, reviews = [], [], []
+        for title_id, review_count in enumerate(review_counts, first_id):
+            scores = [rng.randint(1, 10) for _ in range(review_count)]
+            authors = rng.sample(users, review_count)
+            titles.append(
+                Title(
+                    id=title_id,
+                    name=f'Произведение {title_id}',
+                    year=rng.randint(*TITLE_YEARS),
+                    description=f'Описание произведения {title_id}',
+                    category_id=rng.choice(categories) if categories else None,
+                    rating_sum=sum(scores),
+                    rating_count=review_count,
+                )
+            )
+            genre_count = rng.randint(
+                0, min(options['genres_per_title'], len(genres))
+            )
+            links.extend(
+                Title.genre.through(title_id=title_id, genre_id=genre_id)
+                for genre_id in rng.sample(genres, genre_count)
+            )
+            reviews.extend(
+                Review(
+                    title_id=title_id,
+                    author_id=author_id,
+                    text=f'Отзыв на произведение {title_id}',
+                    score=score,
+                )
+                for author_id, score in zip(authors, scores)
+            )
+        self.bulk_create(Title, titles)
+        self.bulk_create(Title.genre.through, links)
+        self.create_reviews(reviews, users, options['comments_per_review'])
+
+    def create_reviews(self, reviews, users, comments_per_review):
+        """Создаёт отзывы с явными id и комментарии к ним."""
+        first_id = next_id(Review)
+        comments = []
+        upper = round(comments_per_review * 2)
+        for review_id, review in enumerate(reviews, first_id):
+            review.id = review_id
+            comments.extend(
+                Comment(
+                    review_id=review_id,
+                    author_id=self.rng.choice(users),
+                    text=f'Комментарий к отзыву {review_id}',
+                )
+                for _ in range(self.rng.randint(0, upper))
+            )
+        self.bulk_create(Review, reviews)
+        self.bulk_create(Comment, comments)
@@ -0,0 +1,19 @@
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand
+from reviews import leaderboards
+
+
+class Command(BaseCommand):
+    """Команда пересчитывает таблицы лучших произведений."""
+
+    help = (
+        'Пересчитать все таблицы лучших произведений: общую, по жанрам '
+        'и по категориям. Нужна после загрузки данных в обход моделей '
+        'и периодически — для обновления средней оценки во взвешенном '
+        'рейтинге.'
+    )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        boards = leaderboards.rebuild()
+        self.stdout.write(f'Пересчитано таблиц: {boards}.')
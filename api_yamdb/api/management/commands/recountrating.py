@@ -0,0 +1,35 @@
+from typing import Any, Optional
+
+from api import cache
+from django.core.management.base import BaseCommand, CommandError
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Команда сверяет хранимый рейтинг произведений с отзывами."""
+
+    help = (
+        'Проверить и исправить расхождения хранимых агрегатов оценок '
+        'произведений (rating_sum, rating_count) с таблицей отзывов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить расхождения, ничего не исправляя.',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if options['check']:
+            drifted = Title.objects.with_drifted_rating().count()
+            if drifted:
+                raise CommandError(
+                    f'Рейтинг расходится с отзывами у {drifted} произведений.'
+                )
+            self.stdout.write('Расхождений рейтинга не найдено.')
+        else:
+            fixed = Title.objects.recount_rating()
+            if fixed:
+                cache.invalidate(cache.TITLES)
+            self.stdout.write(f'Исправлен рейтинг у {fixed} произведений.')
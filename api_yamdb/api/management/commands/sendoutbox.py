@@ -0,0 +1,121 @@
+import smtplib
+import time
+from datetime import timedelta
+from typing import Any, Optional
+
+from api import metrics
+from api.models import OutboxEmail
+from django.conf import settings
+from django.core import mail
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+UPDATE_FIELDS = ('attempts', 'next_attempt', 'sent', 'last_error')
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой: экспоненциальная, с потолком."""
+    return timedelta(
+        seconds=min(
+            settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+            settings.OUTBOX_RETRY_MAX_DELAY,
+        )
+    )
+
+
+class Command(BaseCommand):
+    """Команда отправляет письма из очереди OutboxEmail."""
+
+    help = (
+        'Отправлять письма из очереди пачками через одно SMTP соединение, '
+        'повторяя неудачные попытки с экспоненциальной задержкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.OUTBOX_BATCH_SIZE,
+            help='Количество писем, отправляемых за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить письма, которые пора отправить, и завершиться.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.OUTBOX_POLL_INTERVAL,
+            help='Пауза в секундах между проверками пустой очереди.',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        self.connection = mail.get_connection()
+        try:
+            while True:
+                if self.send_batch(options['batch_size']):
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            self.connection.close()
+
+    def send_batch(self, batch_size):
+        """
+        Отправляет пачку писем, возвращает её размер.
+        Строки блокируются до конца транзакции, поэтому несколько
+        обработчиков не отправят одно письмо дважды (в PostgreSQL).
+        """
+        with transaction.atomic():
+            emails = list(
+                OutboxEmail.objects.due().select_for_update(
+                    skip_locked=True
+                )[:batch_size]
+            )
+            for email in emails:
+                self.send(email)
+            OutboxEmail.objects.bulk_update(emails, UPDATE_FIELDS)
+        if emails:
+            self.report(emails)
+        return len(emails)
+
+    def send(self, email):
+        email.attempts += 1
+        try:
+            self.connection.open()
+            mail.EmailMessage(
+                email.subject,
+                email.message,
+                email.from_email,
+                [email.recipient],
+                connection=self.connection,
+            ).send()
+        except (smtplib.SMTPException, OSError) as error:
+            self.connection.close()
+            email.last_error = str(error)
+            email.next_attempt = timezone.now() + retry_delay(email.attempts)
+            metrics.OUTBOX_EMAILS.labels('failed').inc()
+            return
+        email.sent = timezone.now()
+        email.last_error = ''
+        metrics.OUTBOX_EMAILS.labels('sent').inc()
+        metrics.OUTBOX_DELIVERY.observe(
+            (email.sent - email.created).total_seconds()
+        )
+
+    def report(self, emails):
+        sent = [email for email in emails if email.sent]
+        latency = max(
+            ((email.sent - email.created).total_seconds() for email in sent),
+            default=0,
+        )
+        self.stdout.write(
+            f'Отправлено {len(sent)}, ошибок {len(emails) - len(sent)}, '
+            f'в очереди {OutboxEmail.objects.pending().count()}; '
+            f'наибольшая задержка доставки {latency:.1f} с.'
+        )
@@ -0,0 +1,10 @@
+from django.core.management.color import no_style
+from django.db import connection
+
+
+def reset_sequences(models):
+    """Сдвигает последовательности id после вставки строк с явными id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), list(models))
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
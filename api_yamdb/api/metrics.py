@@ -0,0 +1,150 @@
+"""
+Метрики Prometheus.
+При запуске под gunicorn с несколькими воркерами задайте переменную
+окружения PROMETHEUS_MULTIPROC_DIR: значения метрик хранятся в файлах
+этого каталога и суммируются по всем процессам при выдаче /metrics.
+У каждого сервиса (web, outbox) свой каталог: PID процессов разных
+контейнеров совпадают, а gunicorn при старте очищает только свой.
+/metrics сводит файлы всех каталогов из PROMETHEUS_COLLECT_DIRS
+(через os.pathsep; по умолчанию — только PROMETHEUS_MULTIPROC_DIR).
+"""
+import glob
+import os
+
+from django.db.models import Count, Min
+from django.utils import timezone
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+from prometheus_client.core import GaugeMetricFamily
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+DELIVERY_BUCKETS = (1, 5, 10, 30, 60, 300, 900, 3600, 4 * 3600)
+
+if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+REQUESTS = Counter(
+    'yamdb_http_requests_total',
+    'Количество HTTP запросов.',
+    ('view', 'method', 'status'),
+)
+LATENCY = Histogram(
+    'yamdb_http_request_duration_seconds',
+    'Время обработки HTTP запроса.',
+    ('view',),
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'yamdb_db_queries_per_request',
+    'Количество SQL запросов на один HTTP запрос.',
+    ('view',),
+    buckets=QUERY_BUCKETS,
+)
+EXCEPTIONS = Counter(
+    'yamdb_http_exceptions_total',
+    'Количество необработанных исключений.',
+    ('view',),
+)
+CACHE_REQUESTS = Counter(
+    'yamdb_cache_requests_total',
+    'Обращения к кешу: попадания (hit), промахи (miss), устаревшие '
+    'данные во время обновления (stale) и дождавшиеся чужого '
+    'обновления запросы (coalesced).',
+    ('cache', 'result'),
+)
+
+OUTBOX_EMAILS = Counter(
+    'yamdb_outbox_emails_total',
+    'Попытки отправки писем из очереди: sent или failed.',
+    ('result',),
+)
+OUTBOX_DELIVERY = Histogram(
+    'yamdb_outbox_delivery_seconds',
+    'Время от постановки письма в очередь до отправки.',
+    buckets=DELIVERY_BUCKETS,
+)
+
+
+class OutboxCollector:
+    """
+    Глубина очереди писем и возраст самого старого неотправленного письма.
+    Значения читаются из БД при каждой выдаче /metrics.
+    """
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from api.models import OutboxEmail
+
+        stats = OutboxEmail.objects.pending().aggregate(
+            count=Count('id'), oldest=Min('created')
+        )
+        pending = GaugeMetricFamily(
+            'yamdb_outbox_pending',
+            'Количество писем в очереди на отправку.',
+        )
+        pending.add_metric([], stats['count'])
+        yield pending
+        age = GaugeMetricFamily(
+            'yamdb_outbox_oldest_pending_seconds',
+            'Возраст самого старого письма в очереди.',
+        )
+        age.add_metric(
+            [],
+            (timezone.now() - stats['oldest']).total_seconds()
+            if stats['oldest']
+            else 0,
+        )
+        yield age
+
+
+OUTBOX = OutboxCollector()
+REGISTRY.register(OUTBOX)
+
+
+def record_cache(cache_name, result):
+    """Учитывает обращение к кешу cache_name с результатом result."""
+    CACHE_REQUESTS.labels(cache_name, result).inc()
+
+
+class ServicesCollector(multiprocess.MultiProcessCollector):
+    """Сводит файлы метрик из каталогов нескольких сервисов."""
+
+    def __init__(self, registry, paths):
+        self._paths = paths
+        registry.register(self)
+
+    def collect(self):
+        files = [
+            file
+            for path in self._paths
+            for file in glob.glob(os.path.join(path, '*.db'))
+        ]
+        return self.merge(files, accumulate=True)
+
+
+def get_collect_dirs():
+    paths = os.environ.get('PROMETHEUS_COLLECT_DIRS')
+    if not paths:
+        return [os.environ['PROMETHEUS_MULTIPROC_DIR']]
+    return paths.split(os.pathsep)
+
+
+def get_registry():
+    """Реестр для выдачи: общий по процессам, если задан multiproc-каталог."""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    ServicesCollector(registry, get_collect_dirs())
+    registry.register(OUTBOX)
+    return registry
+
+
+def render():
+    """Возвращает тело ответа и Content-Type для /metrics."""
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
@@ -0,0 +1,161 @@
+import json
+import logging
+import time
+from collections import Counter
+
+from api import metrics
+from api.queries import QueryCounter
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('api.profiling')
+
+
+def get_view_name(request):
+    """
+    Имя представления для отчёта: TitleViewSet.list, UserSignUpView.post.
+    Определяется после разрешения URL, иначе None.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = match.func
+    view_class = getattr(view, 'cls', None) or getattr(
+        view, 'view_class', None
+    )
+    if view_class is None:
+        return match.view_name
+    method = request.method.lower()
+    action = (getattr(view, 'actions', None) or {}).get(method, method)
+    return f'{view_class.__name__}.{action}'
+
+
+class QueryRecorder:
+    """Обёртка выполнения SQL, запоминающая текст и время запросов."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def total(self):
+        return sum(duration for _, duration in self.queries)
+
+    def slowest(self, amount):
+        return sorted(self.queries, key=lambda query: -query[1])[:amount]
+
+    def repeated(self, threshold):
+        """Одинаковые запросы, выполненные не меньше threshold раз."""
+        counter = Counter(sql for sql, _ in self.queries)
+        return {
+            sql: count for sql, count in counter.items() if count >= threshold
+        }
+
+
+class RequestProfilingMiddleware:
+    """
+    Замеряет время запроса и работу с БД.
+    Добавляет заголовок Server-Timing и пишет в лог api.profiling
+    строку в формате JSON; отдельно логирует медленные SQL запросы
+    и повторяющиеся запросы (признак N+1).
+    Подключается в settings.MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        view_name = get_view_name(request) or request.path
+        response['Server-Timing'] = (
+            f'total;dur={duration * 1000:.1f}, '
+            f'db;dur={recorder.total * 1000:.1f};'
+            f'desc="{len(recorder.queries)} queries", '
+            f'app;dur={(duration - recorder.total) * 1000:.1f}'
+        )
+        self.log_request(request, response, view_name, duration, recorder)
+        self.log_slow_queries(view_name, recorder)
+        self.log_repeated_queries(view_name, recorder)
+        return response
+
+    def log_request(self, request, response, view_name, duration, recorder):
+        slowest = recorder.slowest(settings.PROFILING_SLOWEST_QUERIES)
+        logger.info(
+            json.dumps(
+                {
+                    'view': view_name,
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    'duration_ms': round(duration * 1000, 2),
+                    'sql_count': len(recorder.queries),
+                    'sql_ms': round(recorder.total * 1000, 2),
+                    'slowest_sql': [
+                        {'sql': sql, 'ms': round(query_time * 1000, 2)}
+                        for sql, query_time in slowest
+                    ],
+                },
+                ensure_ascii=False,
+            )
+        )
+
+    def log_slow_queries(self, view_name, recorder):
+        threshold = settings.PROFILING_SLOW_QUERY_MS / 1000
+        for sql, duration in recorder.queries:
+            if duration >= threshold:
+                logger.warning(
+                    'Медленный запрос в %s (%.1f мс): %s',
+                    view_name,
+                    duration * 1000,
+                    sql,
+                )
+
+    def log_repeated_queries(self, view_name, recorder):
+        repeated = recorder.repeated(settings.PROFILING_REPEATED_QUERIES)
+        for sql, count in repeated.items():
+            logger.warning(
+                'Возможен N+1 в %s: запрос выполнен %s раз: %s',
+                view_name,
+                count,
+                sql,
+            )
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики Prometheus по представлениям: количество запросов
+    по статусам, гистограммы времени ответа и количества SQL запросов.
+    Подключается в settings.MIDDLEWARE, метрики отдаются по /metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        view_name = get_view_name(request) or 'unresolved'
+        metrics.REQUESTS.labels(
+            view_name, request.method, response.status_code
+        ).inc()
+        metrics.LATENCY.labels(view_name).observe(duration)
+        metrics.DB_QUERIES.labels(view_name).observe(counter.count)
+        return response
+
+    def process_exception(self, request, exception):
+        metrics.EXCEPTIONS.labels(
+            get_view_name(request) or 'unresolved'
+        ).inc()
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-17 05:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CsvCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, unique=True, verbose_name='Имя файла')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='Хеш содержимого')),
+                ('rows_done', models.PositiveIntegerField(default=0, verbose_name='Обработано строк')),
+                ('completed', models.BooleanField(default=False, verbose_name='Файл загружен полностью')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Отметка загрузки csv',
+                'verbose_name_plural': 'Отметки загрузки csv',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Тема')),
+                ('message', models.TextField(verbose_name='Текст')),
+                ('from_email', models.CharField(max_length=255, verbose_name='Отправитель')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='Получатель')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Количество попыток')),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата следующей попытки')),
+                ('sent', models.DateTimeField(blank=True, null=True, verbose_name='Дата отправки')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+            ],
+            options={
+                'verbose_name': 'Письмо в очереди',
+                'verbose_name_plural': 'Очередь писем',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outboxemail',
+            index=models.Index(condition=models.Q(sent=None), fields=['next_attempt', 'id'], name='outbox_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:29
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=16, verbose_name='Модель')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('action', models.CharField(choices=[('created', 'Создание'), ('updated', 'Изменение'), ('deleted', 'Удаление')], max_length=7, verbose_name='Действие')),
+                ('title', models.PositiveIntegerField(null=True, verbose_name='id произведения')),
+                ('review', models.PositiveIntegerField(null=True, verbose_name='id отзыва')),
+                ('slug', models.SlugField(blank=True, verbose_name='Слаг')),
+                ('created', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Изменение',
+                'verbose_name_plural': 'Журнал изменений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['model', 'object_id', 'id'], name='change_object_idx'),
+        ),
+    ]
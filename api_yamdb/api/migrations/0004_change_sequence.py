@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:49
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def number_existing(apps, schema_editor):
+    """Записи, сделанные до нумерации, зафиксированы: номер равен id."""
+    Change = apps.get_model('api', 'Change')
+    Change.objects.update(sequence=F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_change'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='change',
+            name='change_object_idx',
+        ),
+        migrations.AddField(
+            model_name='change',
+            name='sequence',
+            field=models.BigIntegerField(null=True, unique=True, verbose_name='Порядковый номер'),
+        ),
+        migrations.RunPython(number_existing, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['model', 'object_id', 'sequence'], name='change_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(condition=models.Q(sequence=None), fields=['id'], name='change_pending_idx'),
+        ),
+    ]
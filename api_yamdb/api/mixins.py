@@ -1,4 +1,13 @@
-from rest_framework import mixins, viewsets
+import hashlib
+
+from api import cache
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.functional import cached_property
+from django.utils.http import http_date, quote_etag
+from rest_framework import exceptions, mixins, response, viewsets
 
 
 class CreateListDeleteViewSet(
@@ -8,3 +17,269 @@ class CreateListDeleteViewSet(
     viewsets.GenericViewSet,
 ):
     pass
+
+
+class CachedListMixin:
+    """
+    Кеширует ответы list по адресу и параметрам запроса.
+    В представлении объявите cache_name: str = '...'.
+    Записи сбрасываются вызовом api.cache.invalidate(cache_name).
+    """
+
+    cache_name = None
+
+    def list(self, request, *args, **kwargs):
+        key = cache.request_key(self.cache_name, request)
+        data = cache.read(self.cache_name, key)
+        if data is not None:
+            return response.Response(data)
+        list_response = super().list(request, *args, **kwargs)
+        cache.write(key, list_response.data)
+        return list_response
+
+
+class ConditionalGetMixin:
+    """
+    Отвечает 304 Not Modified на условные запросы list и retrieve
+    (If-None-Match, If-Modified-Since) без выполнения запроса данных
+    и сериализации.
+    В представлении определите get_validators(), возвращающий пару
+    (last_modified, version): время изменения данных или None и строку,
+    которая меняется вместе с данными, или None, если данных нет.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_validators(self):
+        raise NotImplementedError('get_validators() must be implemented.')
+
+    @cached_property
+    def validators(self):
+        return self.get_validators()
+
+    def get_etag(self, request, version):
+        """ETag учитывает версию данных, адрес с параметрами и формат."""
+        key = (
+            f'{version}:{request.get_full_path()}:'
+            f'{request.accepted_renderer.format}'
+        )
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        last_modified, version = self.validators
+        if version is None:
+            return handler(request, *args, **kwargs)
+        etag = self.get_etag(request, version)
+        timestamp = last_modified and int(last_modified.timestamp())
+        conditional = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if conditional is None:
+            conditional = handler(request, *args, **kwargs)
+        if conditional.status_code in (200, 304) and not getattr(
+            conditional, 'stale', False
+        ):
+            conditional['ETag'] = etag
+            if timestamp:
+                conditional['Last-Modified'] = http_date(timestamp)
+        return conditional
+
+
+class CachedRetrieveMixin:
+    """
+    Кеширует ответы retrieve с защитой от одновременного пересчёта
+    (см. api.cache.read_through).
+    Используется вместе с ConditionalGetMixin: версия данных — второй
+    элемент validators. В представлении объявите cache_name: str = '...'.
+    Ключ записи задаёт get_cache_key().
+    Устаревший ответ помечается атрибутом stale и отдаётся без ETag.
+    """
+
+    cache_name = None
+
+    def retrieve(self, request, *args, **kwargs):
+        version = self.validators[1]
+        if version is None:
+            return super().retrieve(request, *args, **kwargs)
+        data, fresh = cache.read_through(
+            self.cache_name,
+            self.get_cache_key(),
+            version,
+            lambda: super(CachedRetrieveMixin, self)
+            .retrieve(request, *args, **kwargs)
+            .data,
+        )
+        retrieve_response = response.Response(data)
+        retrieve_response.stale = not fresh
+        return retrieve_response
+
+    def get_cache_key(self):
+        return f'{self.cache_name}:{self.kwargs[self.lookup_field]}'
+
+
+class SparseFieldsMixin:
+    """
+    Параметры fields и omit запросов list и retrieve: в ответе только
+    перечисленные поля или все, кроме перечисленных (через запятую).
+    Запрос к БД загружает только столбцы и prefetch, нужные этим полям.
+    Сериализатор чтения принимает аргумент fields
+    (api.serializers.SparseSerializerMixin). В представлении объявите
+    sparse_columns: dict — поле сериализатора и его пути для only():
+    столбцы модели, столбцы связанных моделей (через __, загружаются
+    select_related) или связи «ко многим» (загружаются prefetch).
+    """
+
+    sparse_columns = {}
+
+    @cached_property
+    def sparse_fields(self):
+        """Запрошенные поля сериализатора или None, если нужны все."""
+        params = self.request.query_params
+        if self.action not in ('list', 'retrieve') or not (
+            'fields' in params or 'omit' in params
+        ):
+            return None
+        available = list(
+            self.get_serializer_class()(
+                context=self.get_serializer_context()
+            ).fields
+        )
+        selected = self.split_fields(params, 'fields', available)
+        omitted = self.split_fields(params, 'omit', available)
+        return [
+            name
+            for name in selected or available
+            if name not in omitted
+        ]
+
+    @staticmethod
+    def split_fields(params, param, available):
+        names = [name for name in params.get(param, '').split(',') if name]
+        unknown = set(names).difference(available)
+        if unknown:
+            raise exceptions.ValidationError(
+                {param: f'Неизвестные поля: {", ".join(sorted(unknown))}.'}
+            )
+        return names
+
+    def get_serializer(self, *args, **kwargs):
+        if self.sparse_fields is not None:
+            kwargs.setdefault('fields', self.sparse_fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        """Фильтрует queryset и сужает его до запрошенных полей."""
+        queryset = super().filter_queryset(queryset)
+        if self.sparse_fields is None:
+            return queryset
+        return self.sparse_queryset(queryset)
+
+    def sparse_queryset(self, queryset):
+        meta = queryset.model._meta
+        lookups = {
+            lookup
+            for name in self.sparse_fields
+            for lookup in self.sparse_columns.get(name, ())
+        }
+        to_many = {
+            lookup
+            for lookup in lookups
+            if '__' not in lookup and not meta.get_field(lookup).concrete
+        }
+        # Поля сортировки курсора читаются из объектов страницы,
+        # внешний ключ родителя — queryset связанного менеджера.
+        columns = (
+            (lookups - to_many)
+            | {
+                field.lstrip('-')
+                for field in getattr(self, 'cursor_ordering', ())
+            }
+            | {field.name for field in queryset._known_related_objects}
+        )
+        related = {
+            column.split('__')[0] for column in columns if '__' in column
+        }
+        prefetches = [
+            lookup
+            for lookup in queryset._prefetch_related_lookups
+            if (
+                lookup.prefetch_through
+                if isinstance(lookup, Prefetch)
+                else lookup
+            ).split('__')[0] in to_many
+        ]
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.prefetch_related(*prefetches).only(
+            meta.pk.name, *columns
+        )
+
+
+class FastReadMixin:
+    """
+    Выполняет list и retrieve быстрым сериализатором (api.fast)
+    вместо сериализатора DRF. В представлении объявите
+    fast_serializer_class; use_fast_read() может отключить быстрый путь
+    для запросов, которые он не поддерживает.
+    Отключается настройкой FAST_READ_SERIALIZERS = False.
+    """
+
+    fast_serializer_class = None
+
+    def use_fast_read(self):
+        return settings.FAST_READ_SERIALIZERS
+
+    def get_fast_serializer(self):
+        return self.fast_serializer_class(
+            fields=getattr(self, 'sparse_fields', None),
+            ordering=getattr(self, 'cursor_ordering', ()),
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_read():
+            return super().list(request, *args, **kwargs)
+        serializer = self.get_fast_serializer()
+        rows = serializer.get_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return response.Response(serializer.serialize(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_fast_read():
+            return super().retrieve(request, *args, **kwargs)
+        serializer = self.get_fast_serializer()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        rows = serializer.get_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        row = rows.filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).first()
+        if row is None:
+            raise Http404
+        self.check_object_permissions(
+            request, self.get_permission_object(rows, row)
+        )
+        return response.Response(serializer.serialize([row])[0])
+
+    def get_permission_object(self, rows, row):
+        """
+        Экземпляр модели для проверки прав на объект. Загружен только
+        первичный ключ (он всегда есть в строке: ключ сортировки
+        заканчивается на id), остальные поля отложены и читаются из БД,
+        только если разрешение к ним обращается.
+        """
+        pk_name = rows.model._meta.pk.attname
+        return rows.model.from_db(rows.db, [pk_name], [row[pk_name]])
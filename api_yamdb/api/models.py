@@ -0,0 +1,200 @@
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+# Ключ рекомендательной блокировки PostgreSQL для нумерации журнала.
+CHANGE_SEQUENCE_LOCK = 0x63686e67
+
+
+class CsvCheckpoint(models.Model):
+    """Состояние загрузки csv файла командой csvtodb в режиме --sync."""
+
+    file_name = models.CharField('Имя файла', max_length=255, unique=True)
+    content_hash = models.CharField('Хеш содержимого', max_length=64)
+    rows_done = models.PositiveIntegerField(
+        'Обработано строк', default=0
+    )
+    completed = models.BooleanField('Файл загружен полностью', default=False)
+    updated = models.DateTimeField('Дата обновления', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Отметка загрузки csv'
+        verbose_name_plural = 'Отметки загрузки csv'
+
+    def __str__(self):
+        return self.file_name
+
+
+class OutboxEmailQuerySet(models.QuerySet):
+    """QuerySet очереди писем."""
+
+    def pending(self):
+        """Неотправленные письма, у которых остались попытки."""
+        return self.filter(
+            sent=None, attempts__lt=settings.OUTBOX_MAX_ATTEMPTS
+        )
+
+    def due(self):
+        """Письма, которые пора отправить, в порядке очереди."""
+        return self.pending().filter(
+            next_attempt__lte=timezone.now()
+        ).order_by('next_attempt', 'id')
+
+
+class OutboxEmail(models.Model):
+    """
+    Письмо в очереди на отправку.
+    Записывается в транзакции вместе с данными, ради которых отправляется;
+    отправляет команда sendoutbox.
+    """
+
+    subject = models.CharField('Тема', max_length=255)
+    message = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=255)
+    recipient = models.EmailField('Получатель')
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(
+        'Количество попыток', default=0
+    )
+    next_attempt = models.DateTimeField(
+        'Дата следующей попытки', default=timezone.now
+    )
+    sent = models.DateTimeField('Дата отправки', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    objects = OutboxEmailQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['next_attempt', 'id'],
+                name='outbox_pending_idx',
+                condition=models.Q(sent=None),
+            ),
+        ]
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
+
+
+class ChangeQuerySet(models.QuerySet):
+    """QuerySet журнала изменений."""
+
+    def since(self, cursor):
+        """
+        Изменения с порядковым номером больше курсора, по порядку.
+        Записи без номера (транзакция ещё не зафиксирована или номер
+        ещё не присвоен) не отдаются.
+        """
+        return self.filter(sequence__gt=cursor).order_by('sequence')
+
+    def assign_sequence(self):
+        """
+        Присваивает зафиксированным записям без номера порядковые номера
+        в порядке id, больше всех уже присвоенных. Вызывается после
+        фиксации каждой транзакции, записавшей изменения (api.signals).
+        Номер отражает порядок фиксации, а не порядок вставки: запись
+        долгой транзакции получает номер после курсоров, уже выданных
+        клиентам, и не теряется. Номера присваиваются под блокировкой,
+        поэтому присвоенные номера становятся видны по возрастанию.
+        Возвращает количество пронумерованных записей.
+        """
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT pg_advisory_xact_lock(%s)',
+                        [CHANGE_SEQUENCE_LOCK],
+                    )
+            pending = self.filter(sequence=None)
+            first = pending.aggregate(first=models.Min('id'))['first']
+            if first is None:
+                return 0
+            last = self.aggregate(last=models.Max('sequence'))['last'] or 0
+            # Записи, зафиксированные после чтения first, с меньшим id
+            # получат номер при следующем вызове.
+            return pending.filter(id__gte=first).update(
+                sequence=models.F('id') + (last + 1 - first)
+            )
+
+    def superseded(self):
+        """Записи, после которых у того же объекта есть более новые."""
+        return self.filter(sequence__isnull=False).annotate(
+            superseded=models.Exists(
+                Change.objects.filter(
+                    model=models.OuterRef('model'),
+                    object_id=models.OuterRef('object_id'),
+                    sequence__gt=models.OuterRef('sequence'),
+                )
+            )
+        ).filter(superseded=True)
+
+    def compact(self, before, batch_size):
+        """
+        Удаляет записи старше before, вытесненные более новыми записями
+        того же объекта. Последнее изменение каждого объекта остаётся,
+        поэтому клиент с любым курсором приходит к тому же состоянию.
+        Возвращает количество удалённых записей.
+        """
+        deleted = 0
+        old = self.filter(created__lt=before).superseded()
+        while True:
+            ids = list(old.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += Change.objects.filter(id__in=ids).delete()[0]
+
+
+class Change(models.Model):
+    """
+    Запись журнала изменений произведений, отзывов, комментариев,
+    жанров и категорий (/v1/changes/). Пишется сигналами api.signals
+    в транзакции изменения, порядковый номер sequence получает после
+    её фиксации; сжимается командой compactchanges.
+    """
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTION_CHOICES = (
+        (CREATED, 'Создание'),
+        (UPDATED, 'Изменение'),
+        (DELETED, 'Удаление'),
+    )
+
+    model = models.CharField('Модель', max_length=16)
+    object_id = models.PositiveIntegerField('id объекта')
+    action = models.CharField(
+        'Действие', max_length=7, choices=ACTION_CHOICES
+    )
+    title = models.PositiveIntegerField('id произведения', null=True)
+    review = models.PositiveIntegerField('id отзыва', null=True)
+    slug = models.SlugField('Слаг', blank=True)
+    created = models.DateTimeField(
+        'Дата изменения', default=timezone.now, db_index=True
+    )
+    sequence = models.BigIntegerField(
+        'Порядковый номер', null=True, unique=True
+    )
+
+    objects = ChangeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['model', 'object_id', 'sequence'],
+                name='change_object_idx',
+            ),
+            models.Index(
+                fields=['id'],
+                name='change_pending_idx',
+                condition=models.Q(sequence=None),
+            ),
+        ]
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Журнал изменений'
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}: {self.action}'
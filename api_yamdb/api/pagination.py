@@ -0,0 +1,149 @@
+import json
+
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+
+
+def reverse_ordering(ordering):
+    return tuple(
+        field[1:] if field.startswith('-') else f'-{field}'
+        for field in ordering
+    )
+
+
+class KeysetPagination(pagination.CursorPagination):
+    """
+    Курсорная (keyset) пагинация по устойчивому ключу сортировки.
+    Ключ объявляется в представлении: cursor_ordering = (...); последнее
+    поле ключа должно быть уникальным (id). Позиция курсора хранит
+    значения всех полей ключа, страница выбирается составным условием
+    (name, id) > (x, y), поэтому OFFSET не нужен и при длинных сериях
+    одинаковых значений первого поля.
+    Параметр ordering запроса в этом режиме не учитывается.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(view.cursor_ordering)
+
+    def _get_position_from_instance(self, instance, ordering):
+        fields = [field.lstrip('-') for field in ordering]
+        if isinstance(instance, dict):
+            values = [instance[field] for field in fields]
+        else:
+            values = [getattr(instance, field) for field in fields]
+        return json.dumps([str(value) for value in values])
+
+    def decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_seek(self, ordering, values):
+        """
+        Условие «строка после позиции» для порядка ordering:
+        (a > x) OR (a = x AND b > y) ... Первое условие a >= x повторено
+        отдельно, чтобы БД выбирала диапазон по индексу.
+        """
+        lookups = [
+            (field.lstrip('-'), 'lt' if field.startswith('-') else 'gt')
+            for field in ordering
+        ]
+        seek = Q()
+        equal = Q()
+        for (field, lookup), value in zip(lookups, values):
+            seek |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        field, lookup = lookups[0]
+        return Q(**{f'{field}__{lookup}e': values[0]}) & seek
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        ordering = self.ordering
+        if reverse:
+            ordering = reverse_ordering(ordering)
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.get_seek(ordering, self.decode_position(current_position))
+            )
+
+        # Позиции уникальны, смещение остаётся нулевым; лишняя строка
+        # показывает, есть ли следующая страница.
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            following_position = None
+
+        has_current = current_position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = (
+                has_current, following_position is not None
+            )
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next, self.has_previous = (
+                following_position is not None, has_current
+            )
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class PageNumberOrKeysetPagination(pagination.BasePagination):
+    """
+    Постраничная пагинация с переходом на курсорную по запросу клиента.
+    Курсорный режим включается параметром cursor; для первой страницы
+    передаётся пустое значение: ?cursor=
+    """
+
+    page_number_class = pagination.PageNumberPagination
+    keyset_class = KeysetPagination
+
+    def get_paginator(self, request):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            return self.keyset_class()
+        return self.page_number_class()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_class().get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return self.page_number_class().get_schema_operation_parameters(
+            view
+        ) + self.keyset_class().get_schema_operation_parameters(view)
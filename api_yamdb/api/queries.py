@@ -0,0 +1,16 @@
+"""Учёт SQL запросов: обёртки для connection.execute_wrapper."""
+
+
+class QueryCounter:
+    """
+    Обёртка выполнения SQL, считающая запросы.
+    Точки сохранения вокруг запросов не учитываются.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if 'SAVEPOINT' not in sql:
+            self.count += 1
+        return execute(sql, params, many, context)
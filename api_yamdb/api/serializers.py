@@ -1,15 +1,35 @@
+from urllib.parse import urlsplit
+
+from api import batch, export
+from api.models import Change
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework import exceptions, relations, serializers, validators
 from rest_framework.generics import get_object_or_404
 from rest_framework_simplejwt.serializers import TokenObtainSerializer
 from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (Category, Comment, Genre, LeaderboardEntry, Review,
+                            Title)
+from users.tokens import SIGNED_MODE, check_confirmation_code
 
 User = get_user_model()
 
 
-class CommentsSerializer(serializers.ModelSerializer):
+class SparseSerializerMixin:
+    """
+    Оставляет в сериализаторе только поля из аргумента fields
+    (см. api.mixins.SparseFieldsMixin).
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
+
+
+class CommentsSerializer(SparseSerializerMixin, serializers.ModelSerializer):
     """Сериализатор комментария"""
 
     author = serializers.SlugRelatedField(
@@ -64,8 +84,14 @@ class WrittingTitleSerializer(serializers.ModelSerializer):
         return value
 
 
-class ReadingTitleSerializer(serializers.ModelSerializer):
-    """Сериализатор модели Title для чтения."""
+class ReadingTitleSerializer(
+    SparseSerializerMixin, serializers.ModelSerializer
+):
+    """
+    Сериализатор модели Title для чтения.
+    С context['expand'] (см. api.expand) добавляет последние отзывы
+    и комментарии к ним из атрибутов expanded_reviews и expanded_comments.
+    """
 
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
@@ -83,8 +109,17 @@ class ReadingTitleSerializer(serializers.ModelSerializer):
         )
         model = Title
 
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.context.get('expand', {})
+        if 'reviews' in expand:
+            fields['reviews'] = ExpandedReviewSerializer(
+                many=True, read_only=True, source='expanded_reviews'
+            )
+        return fields
+
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseSerializerMixin, serializers.ModelSerializer):
     """Сериализатор отзыва"""
 
     author = serializers.SlugRelatedField(
@@ -113,6 +148,34 @@ class ReviewSerializer(serializers.ModelSerializer):
         return data
 
 
+class ExpandedReviewSerializer(ReviewSerializer):
+    """Сериализатор отзыва, вложенного в произведение"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if 'comments' in self.context.get('expand', {}):
+            fields['comments'] = CommentsSerializer(
+                many=True, read_only=True, source='expanded_comments'
+            )
+        return fields
+
+
+class ReviewSearchSerializer(ReviewSerializer):
+    """Сериализатор найденного отзыва"""
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ('id', 'title', 'text', 'author', 'score', 'pub_date')
+
+
+class CommentSearchSerializer(CommentsSerializer):
+    """Сериализатор найденного комментария"""
+
+    title = serializers.IntegerField(source='review.title_id', read_only=True)
+
+    class Meta(CommentsSerializer.Meta):
+        fields = ('id', 'title', 'review', 'text', 'author', 'pub_date')
+
+
 class TokenAccessObtainSerializer(TokenObtainSerializer):
     """Сериализатор для Access токена."""
 
@@ -124,9 +187,12 @@ class TokenAccessObtainSerializer(TokenObtainSerializer):
         super(serializers.Serializer, self).__init__(self, *args, **kwargs)
 
     def validate(self, attrs):
-        user = get_object_or_404(User, username=attrs.pop('username', None))
-        if not user.confirmation_code.confirmation_code == attrs.pop(
-            'confirmation_code', None
+        users = User.objects.all()
+        if settings.CONFIRMATION_CODE_MODE != SIGNED_MODE:
+            users = users.select_related('confirmation_code')
+        user = get_object_or_404(users, username=attrs.pop('username', None))
+        if not check_confirmation_code(
+            user, attrs.pop('confirmation_code', None)
         ):
             raise exceptions.ValidationError(
                 'Переданный confirmation_code не соответвует пользователю.'
@@ -136,7 +202,7 @@ class TokenAccessObtainSerializer(TokenObtainSerializer):
         return attrs
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для модели User."""
 
     email = serializers.EmailField(
@@ -181,3 +247,112 @@ class UserSerializerWithReadOnlyRole(UserSerializer):
 
     class Meta(UserSerializer.Meta):
         read_only_fields = ['role']
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """Сериализатор подзапроса пакета"""
+
+    method = serializers.ChoiceField(choices=['GET'], default='GET')
+    path = serializers.CharField(max_length=2048)
+
+    def validate_path(self, value):
+        if batch.resolve_route(urlsplit(value).path) is None:
+            raise serializers.ValidationError(
+                'Адрес не ведёт на ресурс API.'
+            )
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """Сериализатор пакета запросов на чтение"""
+
+    requests = BatchRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f'В пакете больше {settings.BATCH_MAX_REQUESTS} запросов.'
+            )
+        cost = sum(
+            batch.get_cost(batch.resolve_route(urlsplit(item['path']).path))
+            for item in value
+        )
+        if cost > settings.BATCH_MAX_COST:
+            raise serializers.ValidationError(
+                f'Стоимость пакета {cost} больше допустимой '
+                f'{settings.BATCH_MAX_COST}.'
+            )
+        return value
+
+
+class ExportSerializer(serializers.Serializer):
+    """Сериализатор параметров выгрузки каталога"""
+
+    output = serializers.ChoiceField(
+        choices=export.FORMATS, default=export.NDJSON
+    )
+    reviews = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data['reviews'] and data['output'] == export.CSV:
+            raise serializers.ValidationError(
+                'Отзывы и комментарии выгружаются только в NDJSON.'
+            )
+        return data
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    """Сериализатор записи журнала изменений"""
+
+    class Meta:
+        model = Change
+        fields = (
+            'id', 'sequence', 'model', 'action', 'object_id', 'title',
+            'review', 'slug', 'created',
+        )
+
+
+class ChangeFeedSerializer(serializers.Serializer):
+    """Сериализатор параметров журнала изменений"""
+
+    since = serializers.IntegerField(min_value=0, default=0)
+
+
+class LeaderboardTitleSerializer(serializers.ModelSerializer):
+    """Сериализатор произведения в таблице лучших"""
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year')
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """Сериализатор места в таблице лучших"""
+
+    title = LeaderboardTitleSerializer()
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = ('position', 'score', 'title')
+
+
+class LeaderboardSerializer(serializers.Serializer):
+    """Сериализатор параметров таблицы лучших"""
+
+    ranking = serializers.ChoiceField(
+        choices=LeaderboardEntry.RANKING_CHOICES,
+        default=LeaderboardEntry.AVERAGE,
+    )
+    genre = serializers.SlugRelatedField(
+        slug_field='slug', queryset=Genre.objects.all(), required=False
+    )
+    category = serializers.SlugRelatedField(
+        slug_field='slug', queryset=Category.objects.all(), required=False
+    )
+
+    def validate(self, data):
+        if 'genre' in data and 'category' in data:
+            raise serializers.ValidationError(
+                'Укажите жанр или категорию, но не оба сразу.'
+            )
+        return data
@@ -0,0 +1,191 @@
+from api import cache
+from api.authentication import invalidate_user
+from api.models import Change
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+from reviews import deferred
+from reviews.models import Category, Comment, Genre, Review, Title
+
+User = get_user_model()
+
+CACHE_NAMES = {
+    Category: 'categories',
+    Genre: 'genres',
+}
+CHANGE_MODELS = {
+    Title: 'title',
+    Review: 'review',
+    Comment: 'comment',
+    Genre: 'genre',
+    Category: 'category',
+}
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_reference_cache(sender, **kwargs):
+    """
+    Сбрасывает кеш списков категорий и жанров при их изменении.
+    Сброс откладывается до фиксации транзакции, чтобы параллельный
+    запрос не закешировал данные до изменения.
+    """
+    cache_name = CACHE_NAMES[sender]
+    transaction.on_commit(lambda: cache.invalidate(cache_name))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_titles_version(sender, **kwargs):
+    """
+    Меняет версию каталога — ETag списка произведений. Комментарии
+    входят в список с ?expand=reviews.
+    """
+    transaction.on_commit(lambda: cache.invalidate(cache.TITLES))
+
+
+@receiver(post_save, sender=User)
+def invalidate_titles_version_on_rename(sender, instance, created, **kwargs):
+    """Имя автора выводится в списке произведений с ?expand=reviews."""
+    if not created and instance.username_changed():
+        transaction.on_commit(lambda: cache.invalidate(cache.TITLES))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_snapshot(sender, instance, **kwargs):
+    """Сбрасывает снимок пользователя для аутентификации."""
+    user_id = getattr(instance, api_settings.USER_ID_FIELD)
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+def insert_changes(changes):
+    """
+    Вставляет записи журнала транзакции одним запросом после её фиксации
+    и присваивает им порядковые номера.
+    """
+    Change.objects.bulk_create(changes)
+    Change.objects.assign_sequence()
+
+
+def save_changes(changes):
+    """Откладывает запись в журнал до фиксации транзакции."""
+    deferred.defer(insert_changes, *changes)
+
+
+def comment_title_id(comment):
+    """
+    Произведение комментария. При каскадном удалении отзыв загружен
+    вместе с комментарием (базовый менеджер Comment), иначе он уже может
+    быть удалён.
+    """
+    if Comment.review.is_cached(comment):
+        return comment.review.title_id
+    return (
+        Review.objects.filter(pk=comment.review_id)
+        .values_list('title_id', flat=True)
+        .first()
+    )
+
+
+def make_change(instance, action):
+    """Запись журнала с адресом объекта в API."""
+    change = Change(
+        model=CHANGE_MODELS[type(instance)],
+        object_id=instance.pk,
+        action=action,
+    )
+    if isinstance(instance, Review):
+        change.title = instance.title_id
+    elif isinstance(instance, Comment):
+        change.title = comment_title_id(instance)
+        change.review = instance.review_id
+    elif isinstance(instance, (Genre, Category)):
+        change.slug = instance.slug
+    return change
+
+
+def title_changes(title_ids):
+    """Изменения произведений, чьё представление в API поменялось."""
+    return [
+        Change(model='title', object_id=title_id, action=Change.UPDATED)
+        for title_id in title_ids
+    ]
+
+
+def related_title_ids(instance):
+    """Произведения жанра или категории."""
+    if isinstance(instance, Genre):
+        titles = Title.objects.filter(genre=instance)
+    else:
+        titles = Title.objects.filter(category=instance)
+    return titles.values_list('pk', flat=True)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def record_save(sender, instance, created, **kwargs):
+    """
+    Записывает создание или изменение объекта в журнал изменений.
+    Отзыв меняет рейтинг произведения, жанр и категория — вложенные
+    в произведения данные, поэтому отмечаются и эти произведения.
+    """
+    changes = [
+        make_change(instance, Change.CREATED if created else Change.UPDATED)
+    ]
+    if sender is Review:
+        changes += title_changes([instance.title_id])
+    elif sender in (Genre, Category) and not created:
+        changes += title_changes(related_title_ids(instance))
+    save_changes(changes)
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Category)
+def record_reference_delete(sender, instance, **kwargs):
+    """Отмечает произведения удаляемого жанра или категории."""
+    save_changes(title_changes(related_title_ids(instance)))
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def record_delete(sender, instance, **kwargs):
+    """Записывает удаление объекта в журнал изменений."""
+    changes = [make_change(instance, Change.DELETED)]
+    if sender is Review:
+        changes += title_changes([instance.title_id])
+    save_changes(changes)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def record_title_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    """Отмечает произведения, у которых изменился список жанров."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        title_ids = [instance.pk]
+    elif pk_set:
+        title_ids = pk_set
+    else:
+        title_ids = related_title_ids(instance)
+    save_changes(title_changes(title_ids))
@@ -32,6 +32,12 @@ router_v1.register(
 router_v1.register(r'titles', views.TitleViewSet, basename='titles')
 router_v1.register(r'categories', views.CategoryViewSet, basename='categories')
 router_v1.register(r'genres', views.GenreViewSet, basename='genres')
+router_v1.register(
+    r'search/reviews', views.ReviewSearchViewSet, basename='search-reviews'
+)
+router_v1.register(
+    r'search/comments', views.CommentSearchViewSet, basename='search-comments'
+)
 
 
 app_name = 'api'
@@ -56,5 +62,24 @@ urlpatterns = [
         views.OwnAccountView.as_view(),
         name='users-me',
     ),
+    path(
+        f'{API_VERSION}/batch/', views.BatchView.as_view(), name='batch'
+    ),
+    path(
+        f'{API_VERSION}/export/titles/',
+        views.ExportView.as_view(),
+        name='export-titles',
+    ),
+    path(
+        f'{API_VERSION}/changes/',
+        views.ChangeFeedView.as_view(),
+        name='changes',
+    ),
+    path(
+        f'{API_VERSION}/leaderboards/',
+        views.LeaderboardView.as_view(),
+        name='leaderboards',
+    ),
+    path('metrics', views.MetricsView.as_view(), name='metrics'),
     path(f'{API_VERSION}/', include(router_v1.urls)),
 ]
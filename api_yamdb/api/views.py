@@ -1,32 +1,61 @@
-import uuid
-
+from api import batch, cache, expand, export, fast, metrics
 from api import serializers as api_serializers
-from api.filters import TitleFilter
-from api.mixins import CreateListDeleteViewSet
+from api.filters import CommentSearchFilter, ReviewSearchFilter, TitleFilter
+from api.mixins import (CachedListMixin, CachedRetrieveMixin,
+                        ConditionalGetMixin, CreateListDeleteViewSet,
+                        FastReadMixin, SparseFieldsMixin)
+from api.models import Change, OutboxEmail
+from api.pagination import KeysetPagination, PageNumberOrKeysetPagination
 from api.permissions import (UserIsAuthorOrAdmin, UserRoleIsAllowedRole,
                              UserRoleIsAllowedRoleOrReadOnly)
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
+from django.views import View
 from django_filters.rest_framework.backends import DjangoFilterBackend
-from rest_framework import (filters, permissions, response, status, views,
-                            viewsets)
+from rest_framework import (filters, mixins, permissions, response, status,
+                            views, viewsets)
+from rest_framework.decorators import action
 from rest_framework_simplejwt.views import TokenViewBase
-from reviews.models import Category, Genre, Review, Title
-from users.models import ConfirmationCode
+from reviews import leaderboards
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.tokens import make_confirmation_code
 
 User = get_user_model()
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    ConditionalGetMixin,
+    CachedRetrieveMixin,
+    SparseFieldsMixin,
+    FastReadMixin,
+    viewsets.ModelViewSet,
+):
     """Представление для работы с произведениями."""
 
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+    cache_name = 'title_detail'
+    queryset = (
+        Title.objects.with_rating()
+        .select_related('category')
+        .prefetch_related('genre')
+    )
     filter_backends = (filters.OrderingFilter, DjangoFilterBackend)
     filterset_class = TitleFilter
     ordering = ('name',)
+    pagination_class = PageNumberOrKeysetPagination
+    cursor_ordering = ('name', 'id')
+    fast_serializer_class = fast.TitleValuesSerializer
+    sparse_columns = {
+        'name': ('name',),
+        'year': ('year',),
+        'description': ('description',),
+        'genre': ('genre',),
+        'category': ('category__name', 'category__slug'),
+        'reviews': ('reviews',),
+    }
 
     permission_classes = [UserRoleIsAllowedRoleOrReadOnly]
     allowed_roles = [settings.ADMIN_ROLE]
@@ -36,10 +65,74 @@ class TitleViewSet(viewsets.ModelViewSet):
             return api_serializers.ReadingTitleSerializer
         return api_serializers.WrittingTitleSerializer
 
+    @cached_property
+    def expand(self):
+        """Запрошенные вложенные записи и их лимиты (см. api.expand)."""
+        if self.action not in ['retrieve', 'list']:
+            return {}
+        return expand.parse(self.request.query_params)
 
-class CategoryViewSet(CreateListDeleteViewSet):
+    def get_queryset(self):
+        return self.queryset.prefetch_related(*expand.prefetch(self.expand))
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'expand': self.expand}
+
+    def use_fast_read(self):
+        """Вложенные записи отдаёт только сериализатор DRF."""
+        return super().use_fast_read() and not self.expand
+
+    def get_cache_key(self):
+        """Ответы с вложенными записями или частью полей — отдельно."""
+        key = super().get_cache_key()
+        if self.expand:
+            key += ':' + ','.join(
+                f'{name}={limit}'
+                for name, limit in sorted(self.expand.items())
+            )
+        if self.sparse_fields is not None:
+            key += ':fields=' + ','.join(self.sparse_fields)
+        return key
+
+    @action(detail=False)
+    def facets(self, request):
+        """
+        Количество произведений по жанрам, категориям и годам
+        с учётом параметров фильтра.
+        """
+        return self.conditional_response(self.get_facets, request)
+
+    def get_facets(self, request):
+        data, fresh = cache.read_through(
+            'title_facets',
+            cache.request_key('title_facets', request),
+            self.validators[1],
+            lambda: self.filter_queryset(self.get_queryset()).facets(),
+        )
+        facets = response.Response(data)
+        facets.stale = not fresh
+        return facets
+
+    def get_validators(self):
+        """
+        Для объекта — время его изменения. Для списка и facets — версия
+        каталога из кеша (api.cache.TITLES), её меняют сигналы при любом
+        изменении произведений; запросов к БД нет.
+        """
+        if self.action == 'retrieve':
+            modified = (
+                Title.objects.filter(pk=self.kwargs.get('pk'))
+                .values_list('modified', flat=True)
+                .first()
+            )
+            return modified, modified and modified.isoformat()
+        return None, cache.get_version(cache.TITLES)
+
+
+class CategoryViewSet(CachedListMixin, CreateListDeleteViewSet):
     """Представление для работы с категориями."""
 
+    cache_name = 'categories'
     queryset = Category.objects.all()
     serializer_class = api_serializers.CategorySerializer
     filter_backends = (filters.SearchFilter, filters.OrderingFilter)
@@ -51,9 +144,10 @@ class CategoryViewSet(CreateListDeleteViewSet):
     allowed_roles = [settings.ADMIN_ROLE]
 
 
-class GenreViewSet(CreateListDeleteViewSet):
+class GenreViewSet(CachedListMixin, CreateListDeleteViewSet):
     """Представление для работы с жанрами."""
 
+    cache_name = 'genres'
     queryset = Genre.objects.all()
     serializer_class = api_serializers.GenreSerializer
     filter_backends = (filters.SearchFilter, filters.OrderingFilter)
@@ -65,10 +159,23 @@ class GenreViewSet(CreateListDeleteViewSet):
     allowed_roles = [settings.ADMIN_ROLE]
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ConditionalGetMixin,
+    SparseFieldsMixin,
+    FastReadMixin,
+    viewsets.ModelViewSet,
+):
     """Представление для работы с комментариями к отзывам."""
 
     serializer_class = api_serializers.CommentsSerializer
+    fast_serializer_class = fast.CommentValuesSerializer
+    pagination_class = PageNumberOrKeysetPagination
+    cursor_ordering = ('-pub_date', 'id')
+    sparse_columns = {
+        'text': ('text',),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+    }
 
     permission_classes = [UserRoleIsAllowedRoleOrReadOnly, UserIsAuthorOrAdmin]
     allowed_roles = [
@@ -77,20 +184,50 @@ class CommentViewSet(viewsets.ModelViewSet):
         settings.ADMIN_ROLE,
     ]
 
+    @cached_property
+    def review(self):
+        """
+        Отзыв из адреса запроса вместе с произведением.
+        В пакетном запросе загружается один раз на пакет.
+        """
+        review_id = self.kwargs.get('review_id')
+        return batch.shared(
+            self.request,
+            f'review:{review_id}',
+            lambda: get_object_or_404(
+                Review.objects.select_related('title'), id=review_id
+            ),
+        )
+
     def get_queryset(self):
-        review = get_object_or_404(Review, id=self.kwargs.get("review_id"))
-        return review.comments.all()
+        return self.review.comments.select_related('author')
+
+    def get_validators(self):
+        modified = self.review.title.modified
+        return modified, modified.isoformat()
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.review)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ConditionalGetMixin,
+    SparseFieldsMixin,
+    FastReadMixin,
+    viewsets.ModelViewSet,
+):
     """Представление для работы с отзывами к произведениям."""
 
     serializer_class = api_serializers.ReviewSerializer
+    fast_serializer_class = fast.ReviewValuesSerializer
+    pagination_class = PageNumberOrKeysetPagination
+    cursor_ordering = ('-pub_date', 'id')
+    sparse_columns = {
+        'text': ('text',),
+        'author': ('author__username',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+    }
 
     permission_classes = [UserRoleIsAllowedRoleOrReadOnly, UserIsAuthorOrAdmin]
     allowed_roles = [
@@ -99,19 +236,57 @@ class ReviewViewSet(viewsets.ModelViewSet):
         settings.ADMIN_ROLE,
     ]
 
+    @cached_property
+    def title(self):
+        """
+        Произведение из адреса запроса.
+        В пакетном запросе загружается один раз на пакет.
+        """
+        title_id = self.kwargs.get('title_id')
+        return batch.shared(
+            self.request,
+            f'title:{title_id}',
+            lambda: get_object_or_404(Title, id=title_id),
+        )
+
     def get_queryset(self):
         """Переопределение queryset."""
 
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        return title.reviews.all()
+        return self.title.reviews.select_related('author')
+
+    def get_validators(self):
+        modified = self.title.modified
+        return modified, modified.isoformat()
 
     def perform_create(self, serializer):
         """Переопределение функции создания."""
 
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.title)
+
+
+class ReviewSearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Поиск по тексту отзывов для модераторов и администраторов.
+    Страницы только курсорные: поиск не выполняет COUNT.
+    """
+
+    queryset = Review.objects.select_related('author')
+    serializer_class = api_serializers.ReviewSearchSerializer
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = ReviewSearchFilter
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-pub_date', 'id')
+
+    permission_classes = [UserRoleIsAllowedRole]
+    allowed_roles = [settings.MODERATOR_ROLE, settings.ADMIN_ROLE]
+
+
+class CommentSearchViewSet(ReviewSearchViewSet):
+    """Поиск по тексту комментариев для модераторов и администраторов."""
+
+    queryset = Comment.objects.select_related('author', 'review')
+    serializer_class = api_serializers.CommentSearchSerializer
+    filterset_class = CommentSearchFilter
 
 
 class TokenAccessObtainView(TokenViewBase):
@@ -130,29 +305,127 @@ class UserSignUpView(views.APIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request, *args, **kwargs):
-        """Регистрация пользователя с отправкой кода подтверждения на email."""
+        """
+        Регистрация пользователя. Письмо с кодом подтверждения ставится
+        в очередь в той же транзакции и отправляется командой sendoutbox.
+        """
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            user = serializer.save()
+            OutboxEmail.objects.create(
+                subject='Сonfirmation code',
+                message=(
+                    f'confirmation_code: "{make_confirmation_code(user)}"'
+                ),
+                from_email=settings.EMAIL_HOST_USER,
+                recipient=user.email,
+            )
+
+        return response.Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class BatchView(views.APIView):
+    """
+    Пакет запросов на чтение к ресурсам API в одном HTTP запросе.
+    Подзапросы выполняются по порядку от имени автора пакета
+    с общим кешем пакета; ответ — список статусов и данных.
+    """
+
+    serializer_class = api_serializers.BatchSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
+        requests = serializer.validated_data['requests']
+        return response.Response(
+            batch.run(request, [item['path'] for item in requests])
+        )
+
+
+class ExportView(views.APIView):
+    """
+    Выгрузка всех произведений с жанрами, категорией и рейтингом
+    (с reviews=true — и с отзывами и комментариями) в NDJSON или CSV.
+    Ответ передаётся потоком. Доступно только администраторам.
+    """
+
+    serializer_class = api_serializers.ExportSerializer
+    permission_classes = (UserRoleIsAllowedRole,)
+    allowed_roles = [settings.ADMIN_ROLE]
 
-        confirmation_code = ConfirmationCode.objects.create(
-            user=user, confirmation_code=str(uuid.uuid4())
+    def get(self, request):
+        serializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        output = serializer.validated_data['output']
+        stream = StreamingHttpResponse(
+            export.export(
+                output,
+                settings.EXPORT_CHUNK_SIZE,
+                serializer.validated_data['reviews'],
+            ),
+            content_type=export.CONTENT_TYPES[output],
         )
-        message = f'confirmation_code: "{confirmation_code.confirmation_code}"'
-        send_mail(
-            'Сonfirmation code',
-            message,
-            settings.EMAIL_HOST_USER,
-            [
-                user.email,
-            ],
-            fail_silently=False,
+        stream['Content-Disposition'] = (
+            f'attachment; filename="titles.{output}"'
         )
+        return stream
 
-        return response.Response(serializer.data, status=status.HTTP_200_OK)
 
+class ChangeFeedView(views.APIView):
+    """
+    Журнал изменений для синхронизации: записи после курсора since
+    по порядку, не больше CHANGES_PAGE_SIZE. next — курсор для следующего
+    запроса, has_more — остались ли ещё записи.
+    """
+
+    serializer_class = api_serializers.ChangeFeedSerializer
+    permission_classes = [permissions.AllowAny]
 
-class UserViewset(viewsets.ModelViewSet):
+    def get(self, request):
+        serializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        since = serializer.validated_data['since']
+        size = settings.CHANGES_PAGE_SIZE
+        changes = list(Change.objects.since(since)[:size + 1])
+        page = changes[:size]
+        return response.Response({
+            'next': page[-1].sequence if page else since,
+            'has_more': len(changes) > size,
+            'results': api_serializers.ChangeSerializer(page, many=True).data,
+        })
+
+
+class LeaderboardView(views.APIView):
+    """
+    Таблица лучших произведений: общая или по жанру (genre),
+    или по категории (category); ranking — average или bayesian.
+    Таблицы вычисляются заранее (reviews.leaderboards).
+    """
+
+    serializer_class = api_serializers.LeaderboardSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        serializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        if 'genre' in params:
+            scope = leaderboards.genre_scope(params['genre'].pk)
+        elif 'category' in params:
+            scope = leaderboards.category_scope(params['category'].pk)
+        else:
+            scope = leaderboards.GLOBAL_SCOPE
+        entries = leaderboards.get_board(params['ranking'], scope)
+        return response.Response(
+            api_serializers.LeaderboardEntrySerializer(
+                entries, many=True
+            ).data
+        )
+
+
+class UserViewset(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Реализация CRUD для модели пользователей (User).
     Доступно только администраторам.
@@ -168,6 +441,10 @@ class UserViewset(viewsets.ModelViewSet):
     filter_backends = (filters.SearchFilter, filters.OrderingFilter)
     search_fields = ('username',)
     ordering = ('username',)
+    sparse_columns = {
+        name: (name,)
+        for name in api_serializers.UserSerializer.Meta.fields
+    }
 
 
 class OwnAccountView(views.APIView):
@@ -177,16 +454,31 @@ class OwnAccountView(views.APIView):
 
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_object(self):
+        """
+        Пользователь из БД со всеми полями: после аутентификации
+        в request.user загружены только поля снимка.
+        """
+        return User.objects.get(pk=self.request.user.pk)
+
     def get(self, request):
         """Возвращает данные о пользователе, который сделал запрос."""
-        serializer = api_serializers.UserSerializer(request.user)
+        serializer = api_serializers.UserSerializer(self.get_object())
         return response.Response(serializer.data)
 
     def patch(self, request):
         """Изменяет данные о пользователе, который сделал запрос."""
         serializer = api_serializers.UserSerializerWithReadOnlyRole(
-            instance=request.user, data=request.data, partial=True
+            instance=self.get_object(), data=request.data, partial=True
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return response.Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class MetricsView(View):
+    """Метрики Prometheus в текстовом формате."""
+
+    def get(self, request):
+        body, content_type = metrics.render()
+        return HttpResponse(body, content_type=content_type)
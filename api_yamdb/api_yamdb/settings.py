@@ -20,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'api',
     'reviews',
     'users',
@@ -28,7 +29,10 @@ INSTALLED_APPS = [
     'django_filters',
 ]
 
+# Для замера времени запросов и работы с БД добавьте первым элементом
+# 'api.middleware.RequestProfilingMiddleware'.
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,6 +76,81 @@ DATABASES = {
 }
 
 
+# Для нескольких воркеров или серверов укажите общий кеш, например
+# CACHE_BACKEND=django.core.cache.backends.memcached.MemcachedCache
+# и CACHE_LOCATION=memcached:11211.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+# Кеш в памяти процесса сбрасывается только в воркере, обработавшем
+# изменение, поэтому с ним списки живут недолго.
+CACHE_IS_SHARED = CACHES['default']['BACKEND'] != (
+    'django.core.cache.backends.locmem.LocMemCache'
+)
+LIST_CACHE_TIMEOUT = 60 * 60 * 24 if CACHE_IS_SHARED else 60
+
+# Снимки пользователей для аутентификации: в общем кеше и в памяти
+# процесса. Изменения пользователя видны другим процессам не позже чем
+# через AUTH_USER_LOCAL_TTL секунд; кеш в памяти процесса другие
+# процессы не сбрасывают, поэтому с ним снимок живёт столько же.
+AUTH_USER_LOCAL_TTL = 5
+AUTH_USER_CACHE_TIMEOUT = 60 * 5 if CACHE_IS_SHARED else AUTH_USER_LOCAL_TTL
+AUTH_USER_LOCAL_SIZE = 10000
+
+READ_THROUGH_SOFT_TTL = 60
+READ_THROUGH_HARD_TTL = 60 * 10
+READ_THROUGH_LOCK_TIMEOUT = 10
+READ_THROUGH_WAIT = 0.5
+READ_THROUGH_POLL_INTERVAL = 0.01
+
+# Доля триграмм запроса, которые должны найтись в названии произведения
+# при поиске в SQLite; в PostgreSQL порог задаёт pg_trgm.similarity_threshold.
+TITLE_SEARCH_SIMILARITY = 0.5
+
+# Пакетные запросы /v1/batch/: не больше BATCH_MAX_REQUESTS подзапросов
+# суммарной стоимостью не больше BATCH_MAX_COST; список стоит
+# BATCH_LIST_COST, объект — 1.
+BATCH_MAX_REQUESTS = 25
+BATCH_MAX_COST = 50
+BATCH_LIST_COST = 5
+
+# Вложенные записи в ответах о произведениях (?expand=reviews.comments):
+# сколько последних отзывов на произведение и комментариев на отзыв
+# отдавать по умолчанию; параметры reviews_limit и comments_limit
+# меняют их в пределах EXPAND_MAX_LIMIT.
+EXPAND_LIMITS = {'reviews': 5, 'comments': 3}
+EXPAND_MAX_LIMIT = 20
+
+# list и retrieve произведений, отзывов и комментариев сериализуются
+# быстрыми сериализаторами api.fast по строкам values().
+FAST_READ_SERIALIZERS = True
+
+# Выгрузка каталога (/v1/export/titles/, команда exportcatalogue) читает
+# произведения серверным курсором пачками по EXPORT_CHUNK_SIZE.
+EXPORT_CHUNK_SIZE = 500
+
+# Журнал изменений (/v1/changes/): команда compactchanges сжимает
+# записи старше CHANGES_COMPACT_AFTER дней.
+CHANGES_PAGE_SIZE = 500
+CHANGES_COMPACT_AFTER = 7
+
+# Таблицы лучших (/v1/leaderboards/): LEADERBOARD_SIZE мест; во взвешенной
+# оценке произведение с малым количеством отзывов тянется к средней
+# оценке так, будто у него ещё LEADERBOARD_MIN_VOTES средних отзывов.
+# Взвешенная таблица пересчитывается целиком, когда средняя оценка
+# сдвинулась больше чем на LEADERBOARD_MEAN_TOLERANCE с прошлого пересчёта.
+LEADERBOARD_SIZE = 10
+LEADERBOARD_MIN_VOTES = 5
+LEADERBOARD_MEAN_TOLERANCE = 0.01
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -109,7 +188,7 @@ CSV_FILES_DIR = os.path.join(BASE_DIR, 'static/data/')
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -124,6 +203,15 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 EMAIL_HOST_USER = "security@yamdb.ru"
 
+# Очередь писем: отправляет команда sendoutbox. После неудачной попытки
+# письмо откладывается на OUTBOX_RETRY_DELAY * 2 ** (попытка - 1) секунд,
+# но не больше OUTBOX_RETRY_MAX_DELAY.
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_RETRY_MAX_DELAY = 60 * 60
+OUTBOX_POLL_INTERVAL = 1.0
+
 AUTH_USER_MODEL = 'users.User'
 
 USER_ROLE = 'user'
@@ -137,7 +225,28 @@ USER_ROLE_CHOICES = (
 
 CONFIRMATION_CODE_LENGTH = 36
 
+# table — коды подтверждения хранятся в таблице ConfirmationCode;
+# signed — коды подписываются и проверяются без записи в БД
+# (см. users/tokens.py), срок действия CONFIRMATION_CODE_TIMEOUT секунд.
+CONFIRMATION_CODE_MODE = os.getenv('CONFIRMATION_CODE_MODE', default='table')
+CONFIRMATION_CODE_TIMEOUT = 60 * 60 * 24
+
 RETURN_SYMBOL = 50
 
 MINVALUE = 1
 MAXVALUE = 10
+
+PROFILING_SLOW_QUERY_MS = int(os.getenv('PROFILING_SLOW_QUERY_MS', default=100))
+PROFILING_SLOWEST_QUERIES = 3
+PROFILING_REPEATED_QUERIES = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.profiling': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
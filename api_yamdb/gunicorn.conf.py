@@ -0,0 +1,20 @@
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    """
+    Очищает файлы метрик, оставшиеся от предыдущего запуска.
+    Каталог принадлежит только web: файлы outbox лежат в соседнем.
+    """
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,73 @@
+"""
+Данные текущей транзакции, которые обрабатываются после её фиксации одним
+вызовом, а не отдельным действием on_commit на каждый объект.
+Данные хранятся в действиях connection.run_on_commit, поэтому при откате
+транзакции или точки сохранения отбрасываются вместе с ними.
+"""
+from functools import partial
+
+from django.db import transaction
+
+
+class Batch:
+    """Действие после фиксации: flush(items) со всеми данными транзакции."""
+
+    def __init__(self, flush):
+        self.flush = flush
+        self.items = []
+
+    def __call__(self):
+        if self.items:
+            self.flush(self.items)
+
+
+class TransactionSet(set):
+    """Множество, которое живёт до конца транзакции."""
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def __call__(self):
+        """После фиксации ничего не делает."""
+
+
+def defer(flush, *items):
+    """
+    Передаёт items в flush(items) после фиксации текущей транзакции; за
+    транзакцию flush вызывается один раз. Вне транзакции вызывается сразу.
+    Каждый вызов добавляет действие on_commit, которое лишь дописывает items
+    в общий Batch: добавленное в откаченной точке сохранения до Batch не
+    дойдёт. Batch переносится в конец очереди, чтобы выполниться после них.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        flush(list(items))
+        return
+    batch = None
+    for entry in connection.run_on_commit:
+        if isinstance(entry[1], Batch) and entry[1].flush is flush:
+            batch = entry[1]
+            connection.run_on_commit.remove(entry)
+            break
+    if batch is None:
+        batch = Batch(flush)
+    transaction.on_commit(partial(batch.items.extend, items))
+    connection.run_on_commit.append((set(), batch))
+
+
+def transaction_set(name):
+    """
+    Множество name текущей транзакции; вне транзакции — новое пустое.
+    Множество хранится среди действий on_commit и пропадает вместе с ними
+    при откате.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return TransactionSet(name)
+    for _, func in connection.run_on_commit:
+        if isinstance(func, TransactionSet) and func.name == name:
+            return func
+    current = TransactionSet(name)
+    transaction.on_commit(current)
+    return current
@@ -0,0 +1,310 @@
+"""
+Таблицы лучших произведений: общая, по жанрам и по категориям, по средней
+оценке и по взвешенной (байесовской) оценке
+(sum + m * C) / (count + m), где m — LEADERBOARD_MIN_VOTES,
+C — средняя оценка по всем отзывам. C берётся из общих сумм оценок
+ScoreTotals, которые меняются вместе с оценками произведений, а не
+агрегируются по всем произведениям. В Leaderboard хранится C, с которой
+посчитаны места таблицы; когда C сдвигается больше чем на
+LEADERBOARD_MEAN_TOLERANCE, взвешенная таблица пересчитывается целиком.
+Команда rebuildleaderboards пересчитывает суммы и все таблицы.
+Таблицы хранятся в LeaderboardEntry и читаются одним запросом по индексу.
+После изменения отзыва или произведения его новая оценка вносится в
+сохранённые места таблиц, в которые оно входит или может войти
+(refresh_title); запрос по всей области таблицы нужен, только когда
+произведение выбывает из заполненной таблицы.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Value
+from reviews.models import (Category, Genre, Leaderboard, LeaderboardEntry,
+                            ScoreTotals, Title)
+
+GLOBAL_SCOPE = 'global'
+RANKINGS = (LeaderboardEntry.AVERAGE, LeaderboardEntry.BAYESIAN)
+
+
+def genre_scope(genre_id):
+    return f'genre:{genre_id}'
+
+
+def category_scope(category_id):
+    return f'category:{category_id}'
+
+
+def scope_titles(scope):
+    """Произведения таблицы."""
+    if scope == GLOBAL_SCOPE:
+        return Title.objects.all()
+    kind, pk = scope.split(':')
+    if kind == 'genre':
+        return Title.objects.filter(genre=pk)
+    return Title.objects.filter(category=pk)
+
+
+def score(ranking, mean):
+    """Выражение оценки произведения для способа ранжирования."""
+    if ranking == LeaderboardEntry.AVERAGE:
+        return ExpressionWrapper(
+            F('rating_sum') * 1.0 / F('rating_count'),
+            output_field=FloatField(),
+        )
+    votes = settings.LEADERBOARD_MIN_VOTES
+    return ExpressionWrapper(
+        (F('rating_sum') + Value(votes * mean)) * 1.0
+        / (F('rating_count') + votes),
+        output_field=FloatField(),
+    )
+
+
+def ranked(titles, ranking, mean):
+    """Произведения с отзывами по убыванию оценки."""
+    return (
+        titles.filter(rating_count__gt=0)
+        .annotate(leaderboard_score=score(ranking, mean))
+        .order_by('-leaderboard_score', 'id')
+    )
+
+
+def title_score(ranking, title, mean):
+    """
+    Оценка произведения в Python по хранимым агрегатам, как в score().
+    None — произведения нет в таблице или у него нет отзывов.
+    """
+    if title is None or not title['rating_count']:
+        return None
+    if ranking == LeaderboardEntry.AVERAGE:
+        return title['rating_sum'] * 1.0 / title['rating_count']
+    votes = settings.LEADERBOARD_MIN_VOTES
+    return (
+        (title['rating_sum'] + votes * mean) * 1.0
+        / (title['rating_count'] + votes)
+    )
+
+
+def current_mean():
+    """
+    Средняя оценка C по общим суммам оценок; суммы считаются по всем
+    произведениям, только если их ещё нет.
+    """
+    totals = ScoreTotals.objects.filter(pk=ScoreTotals.PK).first()
+    if totals is None:
+        totals = ScoreTotals.objects.reset()
+    return totals.mean
+
+
+def lock_board(ranking, scope, mean=None):
+    """
+    Строка таблицы, заблокированная до конца транзакции: пересчёты одной
+    таблицы ждут друг друга, а не перезаписывают результат параллельного.
+    Новая таблица создаётся со средней оценкой mean или текущей.
+    """
+    boards = Leaderboard.objects.select_for_update()
+    if not boards.filter(ranking=ranking, scope=scope).exists():
+        Leaderboard.objects.get_or_create(
+            ranking=ranking,
+            scope=scope,
+            defaults={'mean': current_mean() if mean is None else mean},
+        )
+    return boards.get(ranking=ranking, scope=scope)
+
+
+def board_rows(ranking, scope):
+    """Места таблицы: пары (title_id, score) по порядку."""
+    return list(
+        LeaderboardEntry.objects.filter(ranking=ranking, scope=scope)
+        .order_by('position')
+        .values_list('title_id', 'score')
+    )
+
+
+def fill_board(board):
+    """Места из всей области таблицы: запрос с сортировкой по оценке."""
+    return list(
+        ranked(scope_titles(board.scope), board.ranking, board.mean)
+        .values_list('id', 'leaderboard_score')[:settings.LEADERBOARD_SIZE]
+    )
+
+
+def write_board(board, rows):
+    """Записывает места таблицы; вызывается под блокировкой lock_board."""
+    LeaderboardEntry.objects.filter(
+        ranking=board.ranking, scope=board.scope
+    ).delete()
+    LeaderboardEntry.objects.bulk_create(
+        LeaderboardEntry(
+            ranking=board.ranking,
+            scope=board.scope,
+            position=position,
+            title_id=title_id,
+            score=title_score,
+        )
+        for position, (title_id, title_score) in enumerate(rows, start=1)
+    )
+
+
+def merge(rows, title_id, title_score):
+    """
+    Места таблицы после изменения оценки одного произведения. Пока таблица
+    не заполнена, в ней все произведения области с отзывами, а в заполненной
+    таблице оценки остальных не выше последнего места. Поэтому None — нужен
+    запрос по области — возвращается, только если произведение было в
+    заполненной таблице и выбыло из неё или опустилось на последнее место:
+    его может обогнать произведение, которого в таблице нет.
+    """
+    member = any(row_title == title_id for row_title, _ in rows)
+    merged = [row for row in rows if row[0] != title_id]
+    if title_score is not None:
+        merged.append((title_id, title_score))
+        merged.sort(key=lambda row: (-row[1], row[0]))
+    if member and len(rows) >= settings.LEADERBOARD_SIZE and (
+        title_score is None or merged[-1][0] == title_id
+    ):
+        return None
+    return merged[:settings.LEADERBOARD_SIZE]
+
+
+def refresh_board(ranking, scope, mean=None):
+    """
+    Пересчитывает одну таблицу целиком. mean — новое значение C,
+    иначе используется сохранённое в таблице.
+    """
+    with transaction.atomic():
+        board = lock_board(ranking, scope, mean)
+        if mean is not None and board.mean != mean:
+            board.mean = mean
+            board.save(update_fields=['mean'])
+        write_board(board, fill_board(board))
+
+
+def update_board(ranking, scope, title_id, mean):
+    """
+    Вносит в таблицу новую оценку произведения. Оценка и принадлежность
+    области перечитываются под блокировкой, поэтому из двух параллельных
+    обновлений второе видит результат первого.
+    """
+    with transaction.atomic():
+        board = lock_board(ranking, scope, mean)
+        rows = board_rows(ranking, scope)
+        title = (
+            scope_titles(scope)
+            .filter(pk=title_id)
+            .values('rating_sum', 'rating_count')
+            .first()
+        )
+        merged = merge(rows, title_id, title_score(ranking, title, board.mean))
+        if merged is None:
+            merged = fill_board(board)
+        if merged != rows:
+            write_board(board, merged)
+
+
+def title_scopes(title_id, category_id):
+    """Таблицы, в которые произведение может входить сейчас."""
+    scopes = {GLOBAL_SCOPE}
+    if category_id is not None:
+        scopes.add(category_scope(category_id))
+    scopes.update(
+        genre_scope(genre_id)
+        for genre_id in Title.genre.through.objects.filter(
+            title_id=title_id
+        ).values_list('genre_id', flat=True)
+    )
+    return scopes
+
+
+def refresh_title(title_id):
+    """
+    Обновляет таблицы после изменения оценок, категории или жанров
+    произведения: те, где оно есть, и те, куда оно может войти. Новая оценка
+    вносится в сохранённые места без запроса по всей области; таблицы, в
+    которых ничего не меняется, не блокируются и не перезаписываются.
+    """
+    title = (
+        Title.objects.filter(pk=title_id)
+        .values('rating_sum', 'rating_count', 'category_id')
+        .first()
+    )
+    scopes = (
+        set() if title is None
+        else title_scopes(title_id, title['category_id'])
+    )
+    boards = {(ranking, scope): [] for scope in scopes for ranking in RANKINGS}
+    for ranking, scope, row_title, row_score in (
+        LeaderboardEntry.objects.filter(
+            Q(scope__in=scopes) | Q(title_id=title_id)
+        )
+        .order_by('position')
+        .values_list('ranking', 'scope', 'title_id', 'score')
+    ):
+        boards.setdefault((ranking, scope), []).append((row_title, row_score))
+    means = {
+        (ranking, scope): board_mean
+        for ranking, scope, board_mean in Leaderboard.objects.filter(
+            scope__in={scope for _, scope in boards}
+        ).values_list('ranking', 'scope', 'mean')
+    }
+    mean = current_mean()
+    for (ranking, scope), rows in boards.items():
+        board_mean = means.get((ranking, scope))
+        if ranking == LeaderboardEntry.BAYESIAN and (
+            board_mean is None
+            or abs(board_mean - mean) > settings.LEADERBOARD_MEAN_TOLERANCE
+        ):
+            # Места посчитаны с другой C: новая оценка с ними несравнима.
+            refresh_board(ranking, scope, mean)
+            continue
+        new_score = title_score(
+            ranking,
+            title if scope in scopes else None,
+            mean if board_mean is None else board_mean,
+        )
+        if merge(rows, title_id, new_score) != rows:
+            update_board(ranking, scope, title_id, mean)
+
+
+def refresh_titles(title_ids):
+    """Обновляет таблицы для нескольких произведений."""
+    for title_id in title_ids:
+        refresh_title(title_id)
+
+
+def refresh_scopes(boards, mean=None):
+    """Пересчитывает таблицы из списка пар (ranking, scope)."""
+    for ranking, scope in boards:
+        refresh_board(ranking, scope, mean)
+
+
+def delete_scope(scope):
+    """Удаляет таблицы области вместе с их местами."""
+    LeaderboardEntry.objects.filter(scope=scope).delete()
+    Leaderboard.objects.filter(scope=scope).delete()
+
+
+def all_scopes():
+    return [
+        GLOBAL_SCOPE,
+        *map(genre_scope, Genre.objects.values_list('id', flat=True)),
+        *map(category_scope, Category.objects.values_list('id', flat=True)),
+    ]
+
+
+def rebuild():
+    """
+    Пересчитывает общие суммы оценок и все таблицы с новым значением C.
+    Возвращает количество таблиц.
+    """
+    boards = [
+        (ranking, scope) for scope in all_scopes() for ranking in RANKINGS
+    ]
+    refresh_scopes(boards, ScoreTotals.objects.reset().mean)
+    return len(boards)
+
+
+def get_board(ranking, scope):
+    """Места таблицы с произведениями: один запрос по индексу."""
+    return (
+        LeaderboardEntry.objects.filter(ranking=ranking, scope=scope)
+        .select_related('title')
+        .order_by('position')
+    )
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-17 05:51
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    aggregates = Review.objects.values('title_id').annotate(
+        score_sum=Sum('score'), score_count=Count('id')
+    ).order_by()
+    for row in aggregates:
+        Title.objects.filter(pk=row['title_id']).update(
+            rating_sum=row['score_sum'], rating_count=row['score_count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_auto_20220703_1850'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+SQLITE_TABLE = 'reviews_title_search'
+
+POSTGRESQL_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS title_name_trgm_idx '
+    'ON reviews_title USING gin (name gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS title_name_fts_idx ON reviews_title '
+    "USING gin (to_tsvector('russian'::regconfig, "
+    "COALESCE(name, '')))",
+)
+POSTGRESQL_DROP = (
+    'DROP INDEX IF EXISTS title_name_trgm_idx',
+    'DROP INDEX IF EXISTS title_name_fts_idx',
+)
+SQLITE_INDEX = (
+    f'CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5(name, '
+    "content='reviews_title', content_rowid='id', tokenize='trigram')",
+    f'CREATE TRIGGER {SQLITE_TABLE}_insert AFTER INSERT ON reviews_title '
+    f'BEGIN INSERT INTO {SQLITE_TABLE}(rowid, name) '
+    'VALUES (new.id, new.name); END',
+    f'CREATE TRIGGER {SQLITE_TABLE}_delete AFTER DELETE ON reviews_title '
+    f'BEGIN INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}, rowid, name) '
+    "VALUES ('delete', old.id, old.name); END",
+    f'CREATE TRIGGER {SQLITE_TABLE}_update AFTER UPDATE OF id, name '
+    'ON reviews_title '
+    f'BEGIN INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}, rowid, name) '
+    "VALUES ('delete', old.id, old.name); "
+    f'INSERT INTO {SQLITE_TABLE}(rowid, name) VALUES (new.id, new.name); END',
+    f"INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}) VALUES ('rebuild')",
+)
+SQLITE_DROP = (
+    f'DROP TRIGGER IF EXISTS {SQLITE_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {SQLITE_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {SQLITE_TABLE}_update',
+    f'DROP TABLE IF EXISTS {SQLITE_TABLE}',
+)
+
+STATEMENTS = {
+    'postgresql': (POSTGRESQL_INDEXES, POSTGRESQL_DROP),
+    'sqlite': (SQLITE_INDEX, SQLITE_DROP),
+}
+
+
+def execute(schema_editor, forwards):
+    """Выполняет SQL для БД миграции; прочие БД остаются без индекса."""
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for sql in statements[0 if forwards else 1]:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    execute(schema_editor, forwards=True)
+
+
+def drop_search_index(apps, schema_editor):
+    execute(schema_editor, forwards=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_modified'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
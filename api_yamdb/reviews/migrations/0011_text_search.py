@@ -0,0 +1,75 @@
+from django.db import migrations
+
+TABLES = ('reviews_review', 'reviews_comment')
+
+
+def postgresql_index(table):
+    return (
+        (
+            f'CREATE INDEX IF NOT EXISTS {table}_text_fts_idx ON {table} '
+            "USING gin (to_tsvector('russian'::regconfig, "
+            "COALESCE(text, '')))",
+        ),
+        (f'DROP INDEX IF EXISTS {table}_text_fts_idx',),
+    )
+
+
+def sqlite_index(table):
+    search = f'{table}_search'
+    return (
+        (
+            f'CREATE VIRTUAL TABLE {search} USING fts5(text, '
+            f"content='{table}', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')",
+            f'CREATE TRIGGER {search}_insert AFTER INSERT ON {table} '
+            f'BEGIN INSERT INTO {search}(rowid, text) '
+            'VALUES (new.id, new.text); END',
+            f'CREATE TRIGGER {search}_delete AFTER DELETE ON {table} '
+            f'BEGIN INSERT INTO {search}({search}, rowid, text) '
+            "VALUES ('delete', old.id, old.text); END",
+            f'CREATE TRIGGER {search}_update AFTER UPDATE OF id, text '
+            f'ON {table} '
+            f'BEGIN INSERT INTO {search}({search}, rowid, text) '
+            "VALUES ('delete', old.id, old.text); "
+            f'INSERT INTO {search}(rowid, text) VALUES (new.id, new.text); END',
+            f"INSERT INTO {search}({search}) VALUES ('rebuild')",
+        ),
+        (
+            f'DROP TRIGGER IF EXISTS {search}_insert',
+            f'DROP TRIGGER IF EXISTS {search}_delete',
+            f'DROP TRIGGER IF EXISTS {search}_update',
+            f'DROP TABLE IF EXISTS {search}',
+        ),
+    )
+
+
+STATEMENTS = {'postgresql': postgresql_index, 'sqlite': sqlite_index}
+
+
+def execute(schema_editor, forwards):
+    """Выполняет SQL для БД миграции; прочие БД остаются без индекса."""
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for table in TABLES:
+        for sql in statements(table)[0 if forwards else 1]:
+            schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    execute(schema_editor, forwards=True)
+
+
+def drop_search_index(apps, schema_editor):
+    execute(schema_editor, forwards=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_title_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_text_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ranking', models.CharField(choices=[('average', 'Средняя оценка'), ('bayesian', 'Взвешенная оценка')], max_length=8, verbose_name='Способ ранжирования')),
+                ('scope', models.CharField(max_length=32, verbose_name='Таблица')),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Место в таблице лучших',
+                'verbose_name_plural': 'Таблицы лучших',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('ranking', 'scope', 'position'), name='unique_leaderboard_position'),
+        ),
+    ]
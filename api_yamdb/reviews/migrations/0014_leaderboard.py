@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_comment_base_manager'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Leaderboard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ranking', models.CharField(choices=[('average', 'Средняя оценка'), ('bayesian', 'Взвешенная оценка')], max_length=8, verbose_name='Способ ранжирования')),
+                ('scope', models.CharField(max_length=32, verbose_name='Таблица')),
+                ('mean', models.FloatField(default=0, verbose_name='Средняя оценка')),
+            ],
+            options={
+                'verbose_name': 'Таблица лучших',
+                'verbose_name_plural': 'Таблицы лучших',
+            },
+        ),
+        migrations.CreateModel(
+            name='ScoreTotals',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating_sum', models.BigIntegerField(default=0, verbose_name='Сумма оценок')),
+                ('rating_count', models.BigIntegerField(default=0, verbose_name='Количество оценок')),
+            ],
+            options={
+                'verbose_name': 'Общие суммы оценок',
+                'verbose_name_plural': 'Общие суммы оценок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboard',
+            constraint=models.UniqueConstraint(fields=('ranking', 'scope'), name='unique_leaderboard'),
+        ),
+    ]
@@ -1,6 +1,10 @@
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Sum
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+from reviews import search
 from reviews.validators import year_validator
 
 
@@ -38,6 +42,112 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    """QuerySet произведений с хранимым рейтингом."""
+
+    def with_rating(self):
+        """
+        Добавляет аннотацию rating из хранимых агрегатов оценок.
+        Вычисляется по столбцам самой таблицы, без JOIN с отзывами.
+        """
+        return self.annotate(
+            rating=ExpressionWrapper(
+                F('rating_sum') * 1.0 / NullIf('rating_count', 0),
+                output_field=FloatField(),
+            )
+        )
+
+    def search(self, query):
+        """
+        Поиск по названию с учётом опечаток и словоформ,
+        добавляет аннотацию релевантности search_rank.
+        """
+        return search.search(self, query)
+
+    def facets(self):
+        """
+        Количество произведений всего и по жанрам, категориям и годам.
+        Три запроса с группировкой независимо от количества значений.
+        """
+        titles = self.order_by()
+        years = list(
+            titles.values('year')
+            .annotate(count=models.Count('id'))
+            .order_by('year')
+        )
+        return {
+            'count': sum(year['count'] for year in years),
+            'genre': self.count_by(titles, 'genre'),
+            'category': self.count_by(titles, 'category'),
+            'year': years,
+        }
+
+    @staticmethod
+    def count_by(titles, relation):
+        """Количество произведений по slug и названию связанной модели."""
+        rows = (
+            titles.filter(**{f'{relation}__isnull': False})
+            .values_list(f'{relation}__slug', f'{relation}__name')
+            .annotate(count=models.Count('id'))
+            .order_by(f'{relation}__slug')
+        )
+        return [
+            {'slug': slug, 'name': name, 'count': count}
+            for slug, name, count in rows
+        ]
+
+    def apply_score(self, title_id, score_delta, count_delta):
+        """
+        Атомарно изменяет агрегаты оценок произведения
+        и отмечает время изменения.
+        """
+        return self.filter(pk=title_id).update(
+            rating_sum=F('rating_sum') + score_delta,
+            rating_count=F('rating_count') + count_delta,
+            modified=timezone.now(),
+        )
+
+    def touch(self):
+        """Отмечает время изменения произведений, их отзывов или жанров."""
+        return self.update(modified=timezone.now())
+
+    def by_author(self, user_ids):
+        """Произведения с отзывами или комментариями пользователей."""
+        return self.filter(
+            models.Q(reviews__author__in=user_ids)
+            | models.Q(reviews__comments__author__in=user_ids)
+        )
+
+    def with_drifted_rating(self):
+        """Произведения, у которых хранимые агрегаты разошлись с отзывами."""
+        actual_sum = Coalesce(Sum('reviews__score'), 0)
+        actual_count = models.Count('reviews')
+        return (
+            self.annotate(actual_sum=actual_sum, actual_count=actual_count)
+            .exclude(
+                rating_sum=F('actual_sum'), rating_count=F('actual_count')
+            )
+        )
+
+    def recount_rating(self):
+        """
+        Пересчитывает агрегаты оценок по отзывам.
+        Возвращает количество исправленных произведений.
+        """
+        fixed = 0
+        drifted = self.with_drifted_rating().values_list(
+            'pk', 'actual_sum', 'actual_count'
+        )
+        with transaction.atomic():
+            for pk, actual_sum, actual_count in drifted:
+                fixed += Title.objects.filter(pk=pk).update(
+                    rating_sum=actual_sum,
+                    rating_count=actual_count,
+                    modified=timezone.now(),
+                )
+        return fixed
+
+
 class Title(models.Model):
     """Модель произведения"""
 
@@ -62,8 +172,20 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Категория',
     )
+    rating_sum = models.IntegerField('Сумма оценок', default=0, editable=False)
+    rating_count = models.IntegerField(
+        'Количество оценок', default=0, editable=False
+    )
+    modified = models.DateTimeField(
+        'Дата изменения', auto_now=True, db_index=True
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+        ]
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
 
@@ -113,6 +235,12 @@ class Review(models.Model):
                 fields=['title', 'author'], name='unique_author_review'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', 'id'],
+                name='review_title_pub_date_idx',
+            ),
+        ]
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ['-pub_date']
@@ -120,6 +248,66 @@ class Review(models.Model):
     def __str__(self) -> str:
         return self.text[: settings.RETURN_SYMBOL]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_score()
+        return instance
+
+    def _remember_score(self):
+        """Запоминает произведение и оценку, сохранённые в БД."""
+        title_id = self.__dict__.get('title_id')
+        score = self.__dict__.get('score')
+        self._saved_score = (
+            (title_id, score) if None not in (title_id, score) else None
+        )
+
+    def get_saved_score(self):
+        """Возвращает пару (title_id, score), сохранённую в БД."""
+        saved_score = getattr(self, '_saved_score', None)
+        if saved_score is not None or self.pk is None:
+            return saved_score
+        return (
+            Review.objects.filter(pk=self.pk)
+            .values_list('title_id', 'score')
+            .first()
+        )
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет отзыв и в той же транзакции обновляет рейтинг.
+        Прежняя оценка доступна сигналу post_save в _saved_score.
+        """
+        with transaction.atomic():
+            saved_score = None
+            if not self._state.adding:
+                saved_score = self.get_saved_score()
+            self._saved_score = saved_score
+            super().save(*args, **kwargs)
+            if saved_score is None:
+                Title.objects.apply_score(self.title_id, self.score, 1)
+            elif saved_score[0] == self.title_id:
+                Title.objects.apply_score(
+                    self.title_id, self.score - saved_score[1], 0
+                )
+            else:
+                Title.objects.apply_score(
+                    saved_score[0], -saved_score[1], -1
+                )
+                Title.objects.apply_score(self.title_id, self.score, 1)
+        self._remember_score()
+
+
+class CommentBaseManager(models.Manager):
+    """
+    Базовый менеджер комментариев: им каскадное удаление собирает
+    комментарии отзывов. Отзыв загружается вместе с комментарием, чтобы
+    журнал изменений (api.signals) не запрашивал его для каждого.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('review')
+
 
 class Comment(models.Model):
     """Модель коментария к отзыву."""
@@ -144,10 +332,136 @@ class Comment(models.Model):
         auto_now_add=True,
     )
 
+    objects = models.Manager()
+    base_objects = CommentBaseManager()
+
     class Meta:
+        base_manager_name = 'base_objects'
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', 'id'],
+                name='comment_review_pub_date_idx',
+            ),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['-pub_date']
 
     def __str__(self):
         return self.text[: settings.RETURN_SYMBOL]
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Место произведения в заранее вычисленной таблице лучших
+    (см. reviews.leaderboards). Таблица — ranking и scope:
+    global, genre:<id> или category:<id>.
+    """
+
+    AVERAGE = 'average'
+    BAYESIAN = 'bayesian'
+    RANKING_CHOICES = (
+        (AVERAGE, 'Средняя оценка'),
+        (BAYESIAN, 'Взвешенная оценка'),
+    )
+
+    ranking = models.CharField(
+        'Способ ранжирования', max_length=8, choices=RANKING_CHOICES
+    )
+    scope = models.CharField('Таблица', max_length=32)
+    position = models.PositiveSmallIntegerField('Место')
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Произведение',
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ranking', 'scope', 'position'],
+                name='unique_leaderboard_position',
+            )
+        ]
+        verbose_name = 'Место в таблице лучших'
+        verbose_name_plural = 'Таблицы лучших'
+
+    def __str__(self):
+        return f'{self.ranking} {self.scope} #{self.position}: {self.title_id}'
+
+
+class Leaderboard(models.Model):
+    """
+    Таблица лучших (ranking, scope). Строка блокируется на время
+    пересчёта таблицы (select_for_update), поэтому пересчёты одной таблицы
+    выполняются по очереди. mean — средняя оценка C, с которой посчитаны
+    места взвешенной таблицы; обновляется командой rebuildleaderboards.
+    """
+
+    ranking = models.CharField(
+        'Способ ранжирования',
+        max_length=8,
+        choices=LeaderboardEntry.RANKING_CHOICES,
+    )
+    scope = models.CharField('Таблица', max_length=32)
+    mean = models.FloatField('Средняя оценка', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ranking', 'scope'], name='unique_leaderboard'
+            )
+        ]
+        verbose_name = 'Таблица лучших'
+        verbose_name_plural = 'Таблицы лучших'
+
+    def __str__(self):
+        return f'{self.ranking} {self.scope}'
+
+
+class ScoreTotalsManager(models.Manager):
+
+    def apply(self, score_delta, count_delta):
+        """Изменяет общие суммы оценок, если они уже посчитаны."""
+        return self.filter(pk=ScoreTotals.PK).update(
+            rating_sum=F('rating_sum') + score_delta,
+            rating_count=F('rating_count') + count_delta,
+        )
+
+    def reset(self):
+        """Пересчитывает общие суммы по агрегатам произведений."""
+        totals = Title.objects.aggregate(
+            rating_sum=Coalesce(Sum('rating_sum'), 0),
+            rating_count=Coalesce(Sum('rating_count'), 0),
+        )
+        return self.update_or_create(pk=ScoreTotals.PK, defaults=totals)[0]
+
+
+class ScoreTotals(models.Model):
+    """
+    Сумма и количество всех оценок — средняя оценка C взвешенной таблицы
+    лучших без агрегации по всем произведениям. Единственная строка;
+    пересчитывается командой rebuildleaderboards.
+    """
+
+    PK = 1
+
+    rating_sum = models.BigIntegerField('Сумма оценок', default=0)
+    rating_count = models.BigIntegerField('Количество оценок', default=0)
+
+    objects = ScoreTotalsManager()
+
+    class Meta:
+        verbose_name = 'Общие суммы оценок'
+        verbose_name_plural = 'Общие суммы оценок'
+
+    def __str__(self):
+        return f'{self.rating_sum} / {self.rating_count}'
+
+    @property
+    def mean(self):
+        if not self.rating_count:
+            return 0.0
+        return self.rating_sum / self.rating_count
@@ -0,0 +1,133 @@
+"""
+Поиск произведений по названию и отзывов и комментариев по тексту.
+PostgreSQL: полнотекстовый поиск и триграммы pg_trgm по GIN индексам.
+SQLite: виртуальные таблицы FTS5 (<таблица модели>_search), которые
+триггеры синхронизируют с таблицами моделей при любой записи.
+Индексы и триггеры создаются миграциями 0010_title_search
+и 0011_text_search.
+"""
+import math
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+SEARCH_CONFIG = 'russian'
+SQLITE_TABLE = 'reviews_title_search'
+TRIGRAM_LENGTH = 3
+
+
+def trigrams(query):
+    """Различные триграммы запроса в виде фраз FTS5."""
+    text = query.lower()
+    return sorted({
+        '"{}"'.format(text[start:start + TRIGRAM_LENGTH].replace('"', '""'))
+        for start in range(len(text) - TRIGRAM_LENGTH + 1)
+    })
+
+
+def search_substring(queryset, query):
+    """Поиск подстроки без индекса: для коротких запросов и прочих БД."""
+    return queryset.filter(name__icontains=query).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
+
+
+def search_postgresql(queryset, query):
+    """
+    Совпадение по словам (с учётом словоформ) или по сходству триграмм
+    не ниже pg_trgm.similarity_threshold; релевантность — большая
+    из двух оценок.
+    """
+    vector = SearchVector('name', config=SEARCH_CONFIG)
+    search_query = SearchQuery(query, config=SEARCH_CONFIG)
+    return queryset.annotate(
+        search_vector=vector,
+        search_rank=Greatest(
+            SearchRank(vector, search_query),
+            TrigramSimilarity('name', query),
+        ),
+    ).filter(Q(search_vector=search_query) | Q(name__trigram_similar=query))
+
+
+def search_sqlite(queryset, query):
+    """
+    Совпадение, если в названии найдена не меньше чем
+    settings.TITLE_SEARCH_SIMILARITY доля триграмм запроса;
+    релевантность — bm25 по найденным триграммам.
+    """
+    phrases = trigrams(query)
+    if not phrases:
+        return search_substring(queryset, query)
+    matches = ' UNION ALL '.join(
+        f'SELECT rowid AS title_id FROM {SQLITE_TABLE} '
+        f'WHERE {SQLITE_TABLE} MATCH %s'
+        for _ in phrases
+    )
+    # extra вместо id__in=RawSQL: SQLite читает IN ((SELECT ...))
+    # как список из одного скалярного подзапроса.
+    found = (
+        f'reviews_title.id IN (SELECT title_id FROM ({matches}) '
+        'GROUP BY title_id HAVING COUNT(*) >= %s)'
+    )
+    threshold = math.ceil(len(phrases) * settings.TITLE_SEARCH_SIMILARITY)
+    rank = RawSQL(
+        f'SELECT -bm25({SQLITE_TABLE}) FROM {SQLITE_TABLE} '
+        f'WHERE {SQLITE_TABLE} MATCH %s AND rowid = reviews_title.id',
+        (' OR '.join(phrases),),
+        output_field=FloatField(),
+    )
+    return queryset.extra(
+        where=[found], params=[*phrases, threshold]
+    ).annotate(search_rank=rank)
+
+
+def search(queryset, query):
+    """
+    Произведения, подходящие под запрос, с аннотацией search_rank:
+    чем больше, тем релевантнее.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return search_postgresql(queryset, query)
+    if vendor == 'sqlite':
+        return search_sqlite(queryset, query)
+    return search_substring(queryset, query)
+
+
+def words(query):
+    """Слова запроса в виде префиксных фраз FTS5."""
+    return ' '.join(
+        '"{}"*'.format(word) for word in re.findall(r'\w+', query.lower())
+    )
+
+
+def search_text(queryset, query):
+    """
+    Отзывы или комментарии, текст которых содержит все слова запроса
+    (с учётом словоформ).
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        search_query = SearchQuery(query, config=SEARCH_CONFIG)
+        return queryset.annotate(
+            search_vector=SearchVector('text', config=SEARCH_CONFIG)
+        ).filter(search_vector=search_query)
+    if vendor != 'sqlite':
+        return queryset.filter(text__icontains=query)
+    match = words(query)
+    if not match:
+        return queryset.none()
+    db_table = queryset.model._meta.db_table
+    return queryset.extra(
+        where=[
+            f'{db_table}.id IN (SELECT rowid FROM {db_table}_search '
+            f'WHERE {db_table}_search MATCH %s)'
+        ],
+        params=[match],
+    )
@@ -0,0 +1,178 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from reviews import deferred, leaderboards
+from reviews.models import (Category, Comment, Genre, LeaderboardEntry, Review,
+                            ScoreTotals, Title)
+
+User = get_user_model()
+
+DELETING_TITLES = 'deleting_titles'
+
+
+def refresh_ratings(changes):
+    """
+    Одно изменение общих сумм оценок и одно обновление таблиц лучших
+    после фиксации транзакции для всех её изменений. changes — тройки
+    (title_id, изменение суммы оценок, изменение количества оценок);
+    title_id удалённого произведения — None.
+    """
+    score_delta = sum(change[1] for change in changes)
+    count_delta = sum(change[2] for change in changes)
+    if score_delta or count_delta:
+        ScoreTotals.objects.apply(score_delta, count_delta)
+    leaderboards.refresh_titles(
+        title_id
+        for title_id in dict.fromkeys(change[0] for change in changes)
+        if title_id is not None
+    )
+
+
+@receiver(post_save, sender=Review)
+def refresh_review_rating(sender, instance, **kwargs):
+    """Оценка отзыва добавлена или изменилась."""
+    changes = [(instance.title_id, instance.score, 1)]
+    saved_score = getattr(instance, '_saved_score', None)
+    if saved_score is not None:
+        changes.append((saved_score[0], -saved_score[1], -1))
+    deferred.defer(refresh_ratings, *changes)
+
+
+@receiver(pre_delete, sender=Title)
+def mark_deleting_title(sender, instance, **kwargs):
+    """Агрегаты удаляемого произведения не обновляются при удалении отзывов."""
+    deferred.transaction_set(DELETING_TITLES).add(instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def decrease_title_rating(sender, instance, **kwargs):
+    """
+    Вычитает оценку удалённого отзыва из агрегатов произведения.
+    Срабатывает и при удалении через QuerySet, и при каскадном удалении;
+    при удалении самого произведения агрегаты не обновляются.
+    """
+    title_id, score = getattr(instance, '_saved_score', None) or (
+        instance.title_id,
+        instance.score,
+    )
+    if title_id in deferred.transaction_set(DELETING_TITLES):
+        title_id = None
+    else:
+        Title.objects.apply_score(title_id, -score, -1)
+    deferred.defer(refresh_ratings, (title_id, -score, -1))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_comment_title(sender, instance, **kwargs):
+    """
+    Отмечает изменение произведения при изменении комментария. При
+    каскадном удалении произведения его отметка не нужна: отзыв загружен
+    вместе с комментарием (базовый менеджер Comment), запроса нет.
+    """
+    if Comment.review.is_cached(instance) and (
+        instance.review.title_id
+        in deferred.transaction_set(DELETING_TITLES)
+    ):
+        return
+    Title.objects.filter(reviews__id=instance.review_id).touch()
+
+
+@receiver(post_save, sender=User)
+def touch_author_titles(sender, instance, created, **kwargs):
+    """
+    Отмечает изменение произведений, в отзывах и комментариях которых
+    выводится изменившееся имя пользователя.
+    """
+    if not created and instance.username_changed():
+        Title.objects.by_author([instance.pk]).touch()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, **kwargs):
+    """Отмечает изменение произведений категории."""
+    Title.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_titles(sender, instance, **kwargs):
+    """Отмечает изменение произведений жанра."""
+    Title.objects.filter(genre=instance).touch()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles_on_genre_change(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    """
+    Отмечает изменение произведений при изменении их жанров.
+    При очистке связи произведения отмечаются до удаления связей.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        Title.objects.filter(pk=instance.pk).touch()
+    elif pk_set:
+        Title.objects.filter(pk__in=pk_set).touch()
+    else:
+        Title.objects.filter(genre=instance).touch()
+
+
+def refresh_leaderboards(title_ids):
+    """
+    Обновляет таблицы лучших для произведений после фиксации транзакции,
+    чтобы не удерживать блокировки записи.
+    """
+    deferred.defer(
+        refresh_ratings, *((title_id, 0, 0) for title_id in title_ids)
+    )
+
+
+@receiver(post_save, sender=Title)
+def refresh_title_leaderboards(sender, instance, created, **kwargs):
+    """Категория произведения могла измениться."""
+    if not created:
+        refresh_leaderboards([instance.pk])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def refresh_genre_leaderboards(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    """Жанры произведений изменились."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        refresh_leaderboards([instance.pk])
+    elif pk_set:
+        refresh_leaderboards(pk_set)
+    else:
+        refresh_leaderboards(
+            Title.objects.filter(genre=instance).values_list('pk', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Title)
+def refresh_deleted_title_leaderboards(sender, instance, **kwargs):
+    """Таблицы, где было удаляемое произведение, заполняются заново."""
+    boards = list(
+        LeaderboardEntry.objects.filter(title=instance).values_list(
+            'ranking', 'scope'
+        )
+    )
+    if boards:
+        transaction.on_commit(lambda: leaderboards.refresh_scopes(boards))
+
+
+@receiver(post_delete, sender=Genre)
+def delete_genre_leaderboards(sender, instance, **kwargs):
+    """Таблицы жанра удаляются вместе с ним."""
+    leaderboards.delete_scope(leaderboards.genre_scope(instance.pk))
+
+
+@receiver(post_delete, sender=Category)
+def delete_category_leaderboards(sender, instance, **kwargs):
+    """Таблицы категории удаляются вместе с ней."""
+    leaderboards.delete_scope(leaderboards.category_scope(instance.pk))
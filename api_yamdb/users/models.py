@@ -16,6 +16,28 @@ class User(AbstractUser):
         max_length=256, blank=True, null=True, verbose_name='Биография'
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_username()
+        return instance
+
+    def _remember_username(self):
+        """Запоминает имя пользователя, сохранённое в БД."""
+        self._saved_username = self.__dict__.get('username')
+
+    def username_changed(self):
+        """
+        Изменилось ли имя относительно сохранённого в БД. Имя выводится
+        в отзывах и комментариях, поэтому сигналы отмечают их произведения.
+        """
+        saved_username = getattr(self, '_saved_username', None)
+        return saved_username is None or saved_username != self.username
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._remember_username()
+
 
 class ConfirmationCode(models.Model):
     """Модель confirmation_code связанная с пользователем."""
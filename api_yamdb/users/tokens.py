@@ -0,0 +1,77 @@
+"""
+Коды подтверждения email.
+В режиме settings.CONFIRMATION_CODE_MODE = 'table' код — случайная
+строка в таблице ConfirmationCode. В режиме 'signed' код — подпись HMAC
+id пользователя, времени выдачи и его данных (email, хеш пароля,
+активность) с ограниченным сроком действия; в БД ничего не пишется.
+В режиме 'signed' коды, выданные ранее через таблицу, продолжают
+приниматься; когда их не останется, таблицу можно удалить.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import base36_to_int, int_to_base36
+from users.models import ConfirmationCode
+
+SIGNED_MODE = 'signed'
+
+
+class ConfirmationCodeGenerator:
+    """Создаёт и проверяет подписанные коды подтверждения."""
+
+    key_salt = 'users.tokens.ConfirmationCodeGenerator'
+
+    def make_code(self, user, timestamp=None):
+        if timestamp is None:
+            timestamp = int(time.time())
+        return f'{int_to_base36(timestamp)}-{self.make_hash(user, timestamp)}'
+
+    def check_code(self, user, code):
+        try:
+            timestamp_b36, _ = code.split('-')
+            timestamp = base36_to_int(timestamp_b36)
+        except ValueError:
+            return False
+        if time.time() - timestamp > settings.CONFIRMATION_CODE_TIMEOUT:
+            return False
+        return constant_time_compare(self.make_code(user, timestamp), code)
+
+    def make_hash(self, user, timestamp):
+        """
+        Смена email, пароля или блокировка пользователя делает ранее
+        выданные коды недействительными.
+        """
+        value = f'{user.pk}{user.email}{user.password}{user.is_active}'
+        return salted_hmac(
+            self.key_salt, f'{value}{timestamp}'
+        ).hexdigest()[::2]
+
+
+confirmation_codes = ConfirmationCodeGenerator()
+
+
+def make_confirmation_code(user):
+    """Код подтверждения для письма; в режиме table сохраняется в БД."""
+    if settings.CONFIRMATION_CODE_MODE == SIGNED_MODE:
+        return confirmation_codes.make_code(user)
+    return ConfirmationCode.objects.create(
+        user=user, confirmation_code=str(uuid.uuid4())
+    ).confirmation_code
+
+
+def check_confirmation_code(user, code):
+    """
+    Проверяет код пользователя. Сохранённый в таблице код читается
+    через user.confirmation_code (загрузите его select_related).
+    """
+    if (
+        settings.CONFIRMATION_CODE_MODE == SIGNED_MODE
+        and confirmation_codes.check_code(user, code)
+    ):
+        return True
+    stored = getattr(user, 'confirmation_code', None)
+    return stored is not None and constant_time_compare(
+        stored.confirmation_code, code
+    )
@@ -1,9 +1,37 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+from api.authentication import local_users
+from django.core.cache import cache
+from reviews.models import Category, Title
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    local_users.clear()
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser', email='testuser@yamdb.fake'
+    )
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def title(category):
+    return Title.objects.create(name='Титаник', year=1997, category=category)
@@ -0,0 +1,12 @@
+"""
+Настройки для запуска тестов.
+Тесты, которым нужна БД, работают с SQLite в памяти: в CI нет PostgreSQL.
+"""
+from api_yamdb.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
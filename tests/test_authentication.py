@@ -0,0 +1,85 @@
+import pytest
+from api import authentication
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+
+def jwt_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+    )
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCachedJWTAuthentication:
+
+    def test_no_user_query(self, user, django_assert_num_queries):
+        client = jwt_client(user)
+        assert client.get('/v1/categories/').status_code == 200
+        with django_assert_num_queries(0):
+            response = client.get('/v1/categories/')
+        assert response.status_code == 200, (
+            'Проверьте, что пользователь из JWT берётся из кеша'
+        )
+
+    def test_role_change_invalidates(self, user):
+        admin = User.objects.create_user(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        )
+        client = jwt_client(user)
+        assert client.get('/v1/users/').status_code == 403
+        response = jwt_client(admin).patch(
+            f'/v1/users/{user.username}/', {'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert client.get('/v1/users/').status_code == 200, (
+            'Проверьте, что снимок пользователя сбрасывается при изменении'
+        )
+
+    def test_inactive_and_deleted(self, user):
+        client = jwt_client(user)
+        assert client.get('/v1/users/me/').status_code == 200
+        user.is_active = False
+        user.save()
+        assert client.get('/v1/users/me/').status_code == 401
+        user.delete()
+        assert client.get('/v1/users/me/').status_code == 401
+
+    def test_own_account(self, user):
+        client = jwt_client(user)
+        client.get('/v1/users/me/')
+        response = client.patch('/v1/users/me/', {'bio': 'Кинолюб'})
+        assert response.status_code == 200
+        assert response.json()['email'] == user.email
+        user.refresh_from_db()
+        assert user.bio == 'Кинолюб'
+        assert user.email == 'testuser@yamdb.fake', (
+            'Проверьте, что изменение себя не затирает поля вне снимка'
+        )
+
+    def test_stale_read_is_not_cached(self, user, monkeypatch):
+        read_snapshot = authentication.read_snapshot
+
+        def read_before_commit(user_id):
+            # Запрос прочитал строку до фиксации изменения роли,
+            # а сброс снимка выполнился раньше, чем запрос записал кеш.
+            snapshot = read_snapshot(user_id)
+            User.objects.filter(pk=user_id).update(role='admin')
+            authentication.invalidate_user(user_id)
+            return snapshot
+
+        monkeypatch.setattr(
+            authentication, 'read_snapshot', read_before_commit
+        )
+        assert authentication.get_snapshot(user.id)['role'] == 'user'
+        monkeypatch.setattr(authentication, 'read_snapshot', read_snapshot)
+        authentication.local_users.clear()
+        assert authentication.get_snapshot(user.id)['role'] == 'admin', (
+            'Проверьте, что снимок, прочитанный до сброса, не попадает '
+            'в общий кеш'
+        )
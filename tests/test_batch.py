@@ -0,0 +1,110 @@
+import pytest
+from django.test.utils import override_settings
+from reviews.models import Review
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def batch(client, *paths):
+    return client.post(
+        '/v1/batch/',
+        {'requests': [{'method': 'GET', 'path': path} for path in paths]},
+        format='json',
+    )
+
+
+@pytest.mark.django_db
+class TestBatch:
+
+    def test_responses_in_order(self, title):
+        response = batch(
+            APIClient(),
+            f'/v1/titles/{title.id}/',
+            '/v1/categories/?search=Фил',
+            '/v1/titles/0/',
+        )
+        assert response.status_code == 200
+        first, second, third = response.json()
+        assert first['status'] == 200
+        assert first['body']['name'] == title.name
+        assert second == {
+            'status': 200,
+            'body': {
+                'count': 1,
+                'next': None,
+                'previous': None,
+                'results': [{'name': 'Фильм', 'slug': 'movie'}],
+            },
+        }
+        assert third['status'] == 404, (
+            'Проверьте, что ошибка подзапроса не прерывает пакет'
+        )
+
+    def test_authenticates_once(self, user):
+        admin = type(user).objects.create_user(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+        )
+        statuses = [
+            item['status']
+            for item in batch(
+                client, '/v1/users/', f'/v1/users/{user.username}/'
+            ).json()
+        ]
+        assert statuses == [200, 200], (
+            'Проверьте, что подзапросы выполняются от имени автора пакета'
+        )
+        assert batch(APIClient(), '/v1/users/').json()[0]['status'] == 401
+
+    def test_shared_title(self, title, user, django_assert_num_queries):
+        Review.objects.create(title=title, author=user, text='Да', score=5)
+        path = f'/v1/titles/{title.id}/reviews/'
+        client = APIClient()
+        batch(client, path)
+        # Произведение загружается один раз на пакет.
+        with django_assert_num_queries(3):
+            response = batch(client, path)
+        with django_assert_num_queries(5):
+            batch(client, path, path)
+        assert response.json()[0]['body']['count'] == 1
+
+    @pytest.mark.parametrize('path', [
+        '/v1/auth/signup/',
+        '/v1/batch/',
+        '/v1/users/me/',
+        '/metrics',
+        '/v1/',
+        '/v1/unknown/',
+    ])
+    def test_only_router_routes(self, path):
+        response = batch(APIClient(), path)
+        assert response.status_code == 400, (
+            'Проверьте, что в пакете разрешены только ресурсы router_v1'
+        )
+
+    def test_only_get(self, title):
+        response = APIClient().post(
+            '/v1/batch/',
+            {'requests': [{'method': 'DELETE', 'path': '/v1/titles/1/'}]},
+            format='json',
+        )
+        assert response.status_code == 400
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_max_requests(self, title):
+        path = f'/v1/titles/{title.id}/'
+        assert batch(APIClient(), path, path).status_code == 200
+        assert batch(APIClient(), path, path, path).status_code == 400
+
+    @override_settings(BATCH_MAX_COST=6, BATCH_LIST_COST=5)
+    def test_max_cost(self, title):
+        client = APIClient()
+        detail = f'/v1/titles/{title.id}/'
+        assert batch(client, '/v1/titles/', detail).status_code == 200
+        response = batch(client, '/v1/titles/', detail, detail)
+        assert response.status_code == 400, (
+            'Проверьте, что стоимость пакета ограничена'
+        )
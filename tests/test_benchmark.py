@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+@pytest.fixture
+def seeded_db(db):
+    call_command(
+        'generatedata', '--users', '5', '--titles', '5', '--reviews', '10',
+        '--comments-per-review', '2', '--seed', '1',
+    )
+
+
+@pytest.mark.usefixtures('seeded_db')
+class TestBenchmark:
+
+    def test_benchmark_all_routes(self, tmp_path):
+        output = tmp_path / 'bench.json'
+        call_command(
+            'benchmark', '--requests', '3', '--warmup', '1',
+            '--output', str(output),
+        )
+        results = json.loads(output.read_text(encoding='utf-8'))
+        for name in (
+            'titles-list', 'titles-detail', 'reviews-list', 'reviews-detail',
+            'comments-list', 'comments-detail', 'categories-list',
+            'genres-list', 'users-list', 'users-detail', 'users-me',
+            'auth-signup', 'token-access-obtain',
+        ):
+            assert name in results, f'Эндпоинт {name} не измерен'
+            assert set(results[name]) == {
+                'p50_ms', 'p95_ms', 'p99_ms', 'rps', 'queries', 'peak_kb'
+            }
+        # COUNT, страница, жанры; пользователь из JWT и версия каталога
+        # берутся из кеша.
+        assert results['titles-list']['queries'] == 3
+
+    def test_baseline_regression(self, tmp_path):
+        output = tmp_path / 'bench.json'
+        baseline = tmp_path / 'baseline.json'
+        call_command(
+            'benchmark', '--requests', '2', '--output', str(baseline)
+        )
+        call_command(
+            'benchmark', '--requests', '2', '--output', str(output),
+            '--baseline', str(baseline), '--threshold', '100',
+        )
+        results = json.loads(baseline.read_text(encoding='utf-8'))
+        results['titles-list']['queries'] = 0
+        baseline.write_text(json.dumps(results), encoding='utf-8')
+        with pytest.raises(CommandError, match='titles-list'):
+            call_command(
+                'benchmark', '--requests', '2', '--output', str(output),
+                '--baseline', str(baseline), '--threshold', '100',
+            )
@@ -0,0 +1,103 @@
+import pytest
+from api import cache as api_cache
+from django.core.cache import cache
+from reviews.models import Category, Genre, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReferenceListCache:
+
+    @pytest.mark.parametrize(
+        'url, model', (('/v1/categories/', Category), ('/v1/genres/', Genre))
+    )
+    def test_list_is_cached_and_invalidated(
+        self, client, django_assert_num_queries, url, model
+    ):
+        model.objects.create(name='Первый', slug='first')
+        assert client.get(url).json()['count'] == 1
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.json()['count'] == 1
+
+        model.objects.create(name='Второй', slug='second')
+        assert client.get(url).json()['count'] == 2, (
+            'Проверьте, что кеш сбрасывается при создании объекта'
+        )
+        model.objects.filter(slug='first').delete()
+        assert client.get(url).json()['count'] == 1, (
+            'Проверьте, что кеш сбрасывается при удалении объекта'
+        )
+
+    def test_key_depends_on_params(self, client):
+        Category.objects.create(name='Фильм', slug='movie')
+        Category.objects.create(name='Книга', slug='book')
+        assert client.get('/v1/categories/').json()['count'] == 2
+        response = client.get('/v1/categories/', {'search': 'Фильм'})
+        assert response.json()['count'] == 1
+
+
+@pytest.mark.django_db
+class TestTitleDetailCache:
+
+    def test_detail_is_cached_and_refreshed(
+        self, client, title, user, django_assert_num_queries
+    ):
+        url = f'/v1/titles/{title.id}/'
+        assert client.get(url).json()['rating'] is None
+        # Только валидатор: версия произведения совпала с записью в кеше.
+        with django_assert_num_queries(1):
+            response = client.get(url)
+        assert response.status_code == 200
+        assert response.json()['name'] == title.name
+
+        Review.objects.create(title=title, author=user, text='Да', score=8)
+        assert client.get(url).json()['rating'] == 8, (
+            'Проверьте, что запись кеша обновляется при изменении отзывов'
+        )
+
+    def test_stale_while_refreshing(self, client, title):
+        url = f'/v1/titles/{title.id}/'
+        client.get(url)
+        Title.objects.filter(pk=title.pk).update(name='Аватар')
+        Title.objects.filter(pk=title.pk).touch()
+        cache.add(f'title_detail:{title.pk}:lock', 1)
+        response = client.get(url)
+        assert response.json()['name'] == 'Титаник', (
+            'Пока запись обновляет другой запрос, отдаются старые данные'
+        )
+        assert not response.has_header('ETag'), (
+            'Проверьте, что устаревший ответ отдаётся без ETag'
+        )
+        cache.delete(f'title_detail:{title.pk}:lock')
+        assert client.get(url).json()['name'] == 'Аватар'
+
+    def test_single_flight(self, monkeypatch, settings):
+        settings.READ_THROUGH_WAIT = 1
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 'data'
+
+        def other_request_finished(_):
+            cache.set(
+                'key',
+                {'data': 'data', 'version': 'v1', 'fresh_until': float('inf')},
+            )
+
+        cache.add('key:lock', 1)
+        monkeypatch.setattr(api_cache.time, 'sleep', other_request_finished)
+        assert api_cache.read_through('test', 'key', 'v1', compute) == (
+            'data', True
+        )
+        assert not calls, (
+            'Проверьте, что запрос дожидается записи, которую вычисляет '
+            'другой запрос, а не вычисляет её сам'
+        )
+
+    def test_wait_timeout(self, monkeypatch, settings):
+        settings.READ_THROUGH_WAIT = 0
+        cache.add('key:lock', 1)
+        assert api_cache.read_through(
+            'test', 'key', 'v1', lambda: 'data'
+        ) == ('data', True)
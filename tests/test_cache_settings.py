@@ -0,0 +1,39 @@
+import importlib
+
+import pytest
+from api_yamdb import settings as project_settings
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+MEMCACHED = 'django.core.cache.backends.memcached.MemcachedCache'
+
+
+@pytest.fixture
+def load_settings(monkeypatch):
+    """Загружает настройки проекта с заданным CACHE_BACKEND."""
+
+    def load(backend):
+        monkeypatch.setenv('CACHE_BACKEND', backend)
+        return importlib.reload(project_settings)
+
+    yield load
+    monkeypatch.undo()
+    importlib.reload(project_settings)
+
+
+class TestCacheSettings:
+
+    def test_local_cache_timeouts(self, load_settings):
+        settings = load_settings(LOCMEM)
+        assert not settings.CACHE_IS_SHARED
+        assert settings.LIST_CACHE_TIMEOUT <= 60, (
+            'Проверьте, что с кешем в памяти процесса списки живут недолго: '
+            'другие воркеры не видят сброса'
+        )
+        assert (
+            settings.AUTH_USER_CACHE_TIMEOUT == settings.AUTH_USER_LOCAL_TTL
+        )
+
+    def test_shared_cache_timeouts(self, load_settings):
+        settings = load_settings(MEMCACHED)
+        assert settings.CACHE_IS_SHARED
+        assert settings.LIST_CACHE_TIMEOUT == 60 * 60 * 24
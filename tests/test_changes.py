@@ -0,0 +1,171 @@
+from datetime import timedelta
+
+import pytest
+from api.models import Change
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from reviews.models import Comment, Genre, Review, Title
+
+
+def events(client, since=0):
+    return client.get('/v1/changes/', {'since': since}).json()
+
+
+def summary(changes):
+    return [
+        (change['model'], change['action'], change['object_id'])
+        for change in changes
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestChangeFeed:
+
+    def test_records_changes(self, client, title, user):
+        since = events(client)['next']
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        comment = Comment.objects.create(
+            review=review, author=user, text='Ответ'
+        )
+        comment_id = comment.id
+        comment.delete()
+        data = events(client, since)
+        assert summary(data['results']) == [
+            ('review', 'created', review.id),
+            ('title', 'updated', title.id),
+            ('comment', 'created', comment_id),
+            ('comment', 'deleted', comment_id),
+        ]
+        assert data['results'][2]['title'] == title.id
+        assert data['results'][2]['review'] == review.id
+        assert data['next'] == data['results'][-1]['sequence']
+        assert not data['has_more']
+        assert events(client, data['next'])['results'] == []
+
+    def test_genre_changes_titles(self, client, title):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title.genre.add(genre)
+        since = events(client)['next']
+        genre.slug = 'drama-film'
+        genre.save()
+        genre_id = genre.id
+        genre.delete()
+        assert summary(events(client, since)['results']) == [
+            ('genre', 'updated', genre_id),
+            ('title', 'updated', title.id),
+            ('title', 'updated', title.id),
+            ('genre', 'deleted', genre_id),
+        ]
+
+    def test_cascade_delete(self, client, title, user):
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        Comment.objects.create(review=review, author=user, text='Ответ')
+        since = events(client)['next']
+        title_id = title.id
+        title.delete()
+        results = events(client, since)['results']
+        assert results[-1]['model'] == 'title'
+        assert results[-1]['action'] == 'deleted'
+        assert {
+            (change['model'], change['action']) for change in results
+        } >= {('comment', 'deleted'), ('review', 'deleted')}
+        assert results[0]['title'] == title_id, (
+            'Проверьте, что у комментария из каскада есть произведение'
+        )
+
+    def test_pages(self, client, category, settings):
+        settings.CHANGES_PAGE_SIZE = 2
+        since = events(client)['next']
+        for number in range(3):
+            Title.objects.create(name=f'Фильм {number}', year=2000)
+        first = events(client, since)
+        assert len(first['results']) == 2 and first['has_more']
+        second = events(client, first['next'])
+        assert [change['object_id'] for change in second['results']] == [
+            Title.objects.order_by('id').last().id
+        ]
+        assert not second['has_more']
+
+    def test_late_commit_is_not_skipped(self, client, title):
+        # Запись с меньшим id, зафиксированная после выдачи курсора
+        # (долгая транзакция), получает номер после курсора.
+        late = Change.objects.order_by('id').first()
+        late_id = late.id
+        late.delete()
+        Title.objects.create(name='Аватар', year=2009)
+        since = events(client)['next']
+        Change.objects.bulk_create([
+            Change(id=late_id, model='title', object_id=title.id,
+                   action=Change.UPDATED)
+        ])
+        assert events(client, since)['results'] == [], (
+            'Проверьте, что записи без номера не отдаются'
+        )
+        Change.objects.assign_sequence()
+        assert summary(events(client, since)['results']) == [
+            ('title', 'updated', title.id)
+        ], 'Проверьте, что поздно зафиксированная запись не теряется'
+
+    def test_cascade_does_not_query_reviews(self, title, user):
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        for number in range(5):
+            Comment.objects.create(
+                review=review, author=user, text=f'Ответ {number}'
+            )
+        with CaptureQueriesContext(connection) as context:
+            title.delete()
+        review_reads = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ]
+        assert len(review_reads) == 1, (
+            'Проверьте, что журнал не запрашивает отзыв каждого '
+            'удаляемого комментария'
+        )
+        inserts = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('INSERT INTO "api_change"')
+        ]
+        assert len(inserts) == 1, (
+            'Проверьте, что записи журнала транзакции вставляются '
+            'одним запросом'
+        )
+        assert Change.objects.filter(model='comment').count() == 10
+
+    def test_rollback_discards_changes(self, title):
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                title.year = 1998
+                title.save()
+                raise ValueError
+        assert not Change.objects.filter(action=Change.UPDATED).exists()
+
+    def test_invalid_since(self, client):
+        assert client.get('/v1/changes/', {'since': -1}).status_code == 400
+
+    def test_compaction(self, client, title):
+        since = events(client)['next']
+        for year in (1998, 1999):
+            title.year = year
+            title.save()
+        fresh = Title.objects.create(name='Аватар', year=2009)
+        fresh.name = 'Аватар 2'
+        fresh.save()
+        Change.objects.filter(model='title', object_id=title.id).update(
+            created=timezone.now() - timedelta(days=30)
+        )
+        call_command('compactchanges')
+        assert summary(events(client, since)['results']) == [
+            ('title', 'updated', title.id),
+            ('title', 'created', fresh.id),
+            ('title', 'updated', fresh.id),
+        ], 'Проверьте, что сжимаются только старые вытесненные записи'
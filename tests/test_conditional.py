@@ -0,0 +1,103 @@
+import pytest
+from reviews.models import Comment, Genre, Review, Title
+
+
+@pytest.fixture
+def review(title, user):
+    return Review.objects.create(
+        title=title, author=user, text='Отзыв', score=5
+    )
+
+
+@pytest.fixture
+def comment(review, user):
+    return Comment.objects.create(review=review, author=user, text='Коммент')
+
+
+def assert_revalidated(client, url, change):
+    """Повторный запрос с ETag даёт 304, после изменения данных — 200."""
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304, (
+        f'Проверьте, что {url} отвечает 304 на совпадающий ETag'
+    )
+    assert not response.content
+    change()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        f'Проверьте, что ETag {url} меняется при изменении данных'
+    )
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_titles_list(self, client, title, review):
+        assert_revalidated(client, '/v1/titles/', review.delete)
+
+    def test_titles_list_depends_on_params(self, client, title):
+        etag = client.get('/v1/titles/')['ETag']
+        response = client.get(
+            '/v1/titles/', {'year': 1997}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 200
+
+    def test_title_detail_genre_change(self, client, title):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        assert_revalidated(
+            client, f'/v1/titles/{title.id}/', lambda: title.genre.add(genre)
+        )
+
+    def test_title_detail_recount_rating(self, client, title, review):
+        Title.objects.filter(pk=title.pk).update(rating_sum=0)
+        assert_revalidated(
+            client, f'/v1/titles/{title.id}/', Title.objects.recount_rating
+        )
+
+    def test_title_detail_last_modified(self, client, title):
+        response = client.get(f'/v1/titles/{title.id}/')
+        response = client.get(
+            f'/v1/titles/{title.id}/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        assert response.status_code == 304
+
+    def test_reviews(self, client, title, review):
+        def edit_text():
+            review.text = 'Новый текст'
+            review.save()
+
+        assert_revalidated(
+            client, f'/v1/titles/{title.id}/reviews/', edit_text
+        )
+
+    def test_comments(self, client, title, review, comment):
+        def edit_text():
+            comment.text = 'Новый текст'
+            comment.save()
+
+        assert_revalidated(
+            client,
+            f'/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            edit_text,
+        )
+
+    def test_author_rename(self, client, title, review, comment, user):
+        def rename():
+            user.username = 'renamed'
+            user.save()
+
+        assert_revalidated(
+            client, f'/v1/titles/{title.id}/reviews/', rename
+        )
+        response = client.get(
+            f'/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        )
+        assert response.json()['results'][0]['author'] == 'renamed'
+
+    def test_missing_title(self, client):
+        assert client.get('/v1/titles/100/').status_code == 404
+        assert client.get('/v1/titles/100/reviews/').status_code == 404
@@ -0,0 +1,68 @@
+import re
+import time
+
+import pytest
+from api.models import OutboxEmail
+from users.models import ConfirmationCode
+from users.tokens import confirmation_codes
+
+
+def signup(client):
+    response = client.post(
+        '/v1/auth/signup/',
+        {'username': 'newbie', 'email': 'newbie@yamdb.fake'},
+    )
+    assert response.status_code == 200
+    message = OutboxEmail.objects.get().message
+    return re.search(r'confirmation_code: "(.+)"', message).group(1)
+
+
+def obtain_token(client, code):
+    return client.post(
+        '/v1/auth/token/', {'username': 'newbie', 'confirmation_code': code}
+    )
+
+
+@pytest.mark.django_db
+class TestConfirmationCode:
+
+    def test_table_mode(self, client, django_assert_num_queries):
+        code = signup(client)
+        assert ConfirmationCode.objects.filter(confirmation_code=code).exists()
+        # Пользователь вместе с кодом одним запросом.
+        with django_assert_num_queries(1):
+            response = obtain_token(client, code)
+        assert response.status_code == 200
+        assert 'access' in response.json()
+        assert obtain_token(client, 'wrong').status_code == 400
+
+    def test_signed_mode(self, client, settings, django_assert_num_queries):
+        settings.CONFIRMATION_CODE_MODE = 'signed'
+        code = signup(client)
+        assert not ConfirmationCode.objects.exists(), (
+            'Проверьте, что в режиме signed код не сохраняется в БД'
+        )
+        with django_assert_num_queries(1):
+            response = obtain_token(client, code)
+        assert response.status_code == 200
+        assert obtain_token(client, code[:-1] + 'x').status_code == 400
+
+    def test_signed_code_expires(self, client, settings, monkeypatch):
+        settings.CONFIRMATION_CODE_MODE = 'signed'
+        code = signup(client)
+        now = time.time() + settings.CONFIRMATION_CODE_TIMEOUT + 1
+        monkeypatch.setattr(time, 'time', lambda: now)
+        assert obtain_token(client, code).status_code == 400, (
+            'Проверьте, что подписанный код перестаёт действовать'
+        )
+
+    def test_signed_mode_accepts_stored_codes(self, client, settings):
+        code = signup(client)
+        settings.CONFIRMATION_CODE_MODE = 'signed'
+        assert obtain_token(client, code).status_code == 200
+
+    def test_email_change_invalidates(self, user):
+        code = confirmation_codes.make_code(user)
+        assert confirmation_codes.check_code(user, code)
+        user.email = 'changed@yamdb.fake'
+        assert not confirmation_codes.check_code(user, code)
@@ -0,0 +1,101 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from api.models import CsvCheckpoint
+from reviews.models import Comment, Review, Title
+
+CSV_FILES = {
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n2,Комедия,comedy\n',
+    'category.csv': 'id,name,slug\n1,Фильм,movie\n',
+    'titles.csv': (
+        'id,name,year,category\n1,Титаник,1997,1\n2,Маска,1994,1\n'
+    ),
+    'genre_title.csv': (
+        'id,title_id,genre_id\n1,1,1\n2,2,2\n3,2,1\n'
+    ),
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '1,bingobongo,bingo@yamdb.fake,user,,,\n'
+        '2,capt_obvious,capt@yamdb.fake,admin,,,\n'
+    ),
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,Хорошо,1,8,2019-09-24T21:08:21.567Z\n'
+        '2,1,Плохо,2,3,2019-09-24T21:08:21.567Z\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,Согласен,2,2019-09-24T21:08:21.567Z\n'
+    ),
+}
+
+
+@pytest.fixture
+def csv_dir(tmp_path, settings):
+    for file_name, content in CSV_FILES.items():
+        (tmp_path / file_name).write_text(content, encoding='utf-8')
+    settings.CSV_FILES_DIR = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestCsvToDb:
+
+    def test_load(self, csv_dir):
+        call_command('csvtodb', '--batch-size', '1')
+        assert Title.objects.count() == 2
+        assert Title.genre.through.objects.count() == 3
+        assert Review.objects.count() == 2
+        assert Comment.objects.count() == 1
+        title = Title.objects.with_rating().get(pk=1)
+        assert (title.rating_sum, title.rating_count) == (11, 2), (
+            'Проверьте, что после загрузки пересчитывается рейтинг'
+        )
+
+    def test_copy_requires_postgresql(self, csv_dir):
+        with pytest.raises(CommandError):
+            call_command('csvtodb', '--copy')
+
+    def test_sync_is_repeatable(self, csv_dir):
+        call_command('csvtodb', '--sync', '--batch-size', '1')
+        call_command('csvtodb', '--sync')
+        assert Title.objects.count() == 2
+        assert CsvCheckpoint.objects.filter(completed=True).count() == len(
+            CSV_FILES
+        )
+
+        (csv_dir / 'titles.csv').write_text(
+            'id,name,year,category\n1,Титаник,1998,1\n3,Матрица,1999,1\n',
+            encoding='utf-8',
+        )
+        call_command('csvtodb', '--sync')
+        assert Title.objects.get(pk=1).year == 1998, (
+            'Проверьте, что синхронизация обновляет изменённые строки'
+        )
+        assert Title.objects.filter(pk=3).exists(), (
+            'Проверьте, что синхронизация вставляет новые строки'
+        )
+
+    def test_sync_touches_titles(self, csv_dir):
+        call_command('csvtodb', '--sync')
+        modified = Title.objects.get(pk=1).modified
+        (csv_dir / 'users.csv').write_text(
+            CSV_FILES['users.csv'].replace('bingobongo', 'bingo'),
+            encoding='utf-8',
+        )
+        call_command('csvtodb', '--sync')
+        assert Title.objects.get(pk=1).modified > modified, (
+            'Проверьте, что синхронизация отмечает изменение произведений, '
+            'в которых выводятся изменённые данные'
+        )
+        assert Title.objects.get(pk=2).modified < modified
+
+    def test_sync_resumes_from_checkpoint(self, csv_dir):
+        call_command('csvtodb', '--sync')
+        Review.objects.filter(pk=2).delete()
+        CsvCheckpoint.objects.filter(file_name='review.csv').update(
+            rows_done=1, completed=False
+        )
+        call_command('csvtodb', '--sync')
+        assert Review.objects.filter(pk=2).exists()
+        assert Title.objects.get(pk=1).rating_count == 2
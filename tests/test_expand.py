@@ -0,0 +1,96 @@
+import pytest
+from reviews.models import Comment, Review, Title
+
+
+@pytest.fixture
+def reviewed_titles(title, category, django_user_model):
+    other = Title.objects.create(name='Аватар', year=2009, category=category)
+    authors = [
+        django_user_model.objects.create_user(
+            username=f'author{number}', email=f'author{number}@yamdb.fake'
+        )
+        for number in range(4)
+    ]
+    for reviewed in (title, other):
+        for number, author in enumerate(authors):
+            review = Review.objects.create(
+                title=reviewed, author=author, text=f'Отзыв {number}', score=5
+            )
+            for comment_number in range(3):
+                Comment.objects.create(
+                    review=review, author=author, text=f'Ответ {comment_number}'
+                )
+    return title, other
+
+
+@pytest.mark.django_db
+class TestTitleExpand:
+
+    def test_without_expand(self, client, title):
+        assert 'reviews' not in client.get(f'/v1/titles/{title.id}/').json()
+
+    def test_latest_reviews(self, client, reviewed_titles, settings):
+        settings.EXPAND_LIMITS = {'reviews': 2, 'comments': 3}
+        title = reviewed_titles[0]
+        data = client.get(
+            f'/v1/titles/{title.id}/', {'expand': 'reviews'}
+        ).json()
+        assert [review['text'] for review in data['reviews']] == [
+            'Отзыв 3', 'Отзыв 2'
+        ], 'Проверьте, что вложены последние отзывы в пределах лимита'
+        assert data['reviews'][0]['author'] == 'author3'
+        assert 'comments' not in data['reviews'][0]
+
+    def test_comments_and_limits(self, client, reviewed_titles):
+        title = reviewed_titles[0]
+        data = client.get(
+            f'/v1/titles/{title.id}/',
+            {
+                'expand': 'reviews.comments',
+                'reviews_limit': 1,
+                'comments_limit': 2,
+            },
+        ).json()
+        assert len(data['reviews']) == 1
+        assert [
+            comment['text'] for comment in data['reviews'][0]['comments']
+        ] == ['Ответ 2', 'Ответ 1']
+
+    def test_list_bounded_queries(
+        self, client, reviewed_titles, django_assert_num_queries
+    ):
+        # count, произведения, жанры, отзывы, комментарии.
+        with django_assert_num_queries(5):
+            response = client.get(
+                '/v1/titles/', {'expand': 'reviews.comments'}
+            )
+        results = response.json()['results']
+        assert len(results) == 2
+        assert all(len(item['reviews']) == 4 for item in results)
+        assert all(
+            len(review['comments']) == 3
+            for item in results
+            for review in item['reviews']
+        )
+
+    def test_cached_separately(self, client, reviewed_titles):
+        url = f'/v1/titles/{reviewed_titles[0].id}/'
+        assert 'reviews' not in client.get(url).json()
+        assert 'reviews' in client.get(url, {'expand': 'reviews'}).json(), (
+            'Проверьте, что ответы с expand кешируются отдельно'
+        )
+        assert len(
+            client.get(
+                url, {'expand': 'reviews', 'reviews_limit': 1}
+            ).json()['reviews']
+        ) == 1
+
+    @pytest.mark.parametrize('params', [
+        {'expand': 'comments'},
+        {'expand': 'reviews', 'reviews_limit': 0},
+        {'expand': 'reviews', 'reviews_limit': 'много'},
+        {'expand': 'reviews', 'reviews_limit': 1000},
+    ])
+    def test_invalid(self, client, title, params):
+        response = client.get(f'/v1/titles/{title.id}/', params)
+        assert response.status_code == 400
@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Comment, Genre, Review, Title
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@pytest.fixture
+def admin_client(django_user_model):
+    admin = django_user_model.objects.create_user(
+        username='admin', email='admin@yamdb.fake', role='admin'
+    )
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+    )
+    return client
+
+
+@pytest.fixture
+def catalogue(title, user):
+    title.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв', score=8
+    )
+    Comment.objects.create(review=review, author=user, text='Ответ')
+    for number in range(4):
+        Title.objects.create(name=f'Фильм {number}', year=2000)
+    return title
+
+
+def content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+def records(response):
+    return [json.loads(line) for line in content(response).splitlines()]
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_ndjson(self, admin_client, catalogue):
+        response = admin_client.get('/v1/export/titles/')
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        titles = records(response)
+        assert len(titles) == 5
+        assert titles[0] == {
+            'id': catalogue.id,
+            'name': 'Титаник',
+            'year': 1997,
+            'description': '',
+            'genre': [{'name': 'Драма', 'slug': 'drama'}],
+            'category': {'name': 'Фильм', 'slug': 'movie'},
+            'rating': 8,
+        }
+
+    def test_reviews(self, admin_client, catalogue, settings):
+        settings.EXPORT_CHUNK_SIZE = 2
+        response = admin_client.get('/v1/export/titles/', {'reviews': 'true'})
+        titles = records(response)
+        assert [len(title['reviews']) for title in titles] == [1, 0, 0, 0, 0]
+        review = titles[0]['reviews'][0]
+        assert review['text'] == 'Отзыв'
+        assert review['author'] == 'TestUser'
+        assert [comment['text'] for comment in review['comments']] == [
+            'Ответ'
+        ]
+
+    def test_reviews_stream_in_order(
+        self, admin_client, catalogue, django_user_model, settings
+    ):
+        settings.EXPORT_CHUNK_SIZE = 2
+        second = Title.objects.order_by('id')[1]
+        for number in range(5):
+            author = django_user_model.objects.create_user(
+                username=f'author{number}', email=f'author{number}@yamdb.fake'
+            )
+            review = Review.objects.create(
+                title=second, author=author, text=f'Отзыв {number}', score=5
+            )
+            for reply in range(3):
+                Comment.objects.create(
+                    review=review, author=author, text=f'{number}.{reply}'
+                )
+        response = admin_client.get('/v1/export/titles/', {'reviews': 'true'})
+        reviews = records(response)[1]['reviews']
+        assert [review['text'] for review in reviews] == [
+            f'Отзыв {number}' for number in reversed(range(5))
+        ], 'Проверьте порядок отзывов: сначала новые'
+        assert [
+            [comment['text'] for comment in review['comments']]
+            for review in reviews
+        ] == [
+            [f'{number}.{reply}' for reply in reversed(range(3))]
+            for number in reversed(range(5))
+        ]
+
+    def test_queries_per_chunk(
+        self, admin_client, catalogue, settings, django_assert_num_queries
+    ):
+        settings.EXPORT_CHUNK_SIZE = 2
+        response = admin_client.get('/v1/export/titles/', {'reviews': 'true'})
+        # Курсор произведений и на каждую из трёх пачек жанры и курсор
+        # отзывов; курсор комментариев — только для пачки с отзывами.
+        with django_assert_num_queries(8):
+            content(response)
+
+    def test_csv(self, admin_client, catalogue):
+        response = admin_client.get('/v1/export/titles/', {'output': 'csv'})
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        rows = list(csv.reader(io.StringIO(content(response))))
+        assert rows[0] == [
+            'id', 'name', 'year', 'description', 'genre', 'category',
+            'rating',
+        ]
+        assert rows[1] == [
+            str(catalogue.id), 'Титаник', '1997', '', 'drama', 'movie', '8'
+        ]
+        assert rows[2][4:] == ['', '', '']
+        assert len(rows) == 6
+
+    def test_csv_without_reviews(self, admin_client):
+        response = admin_client.get(
+            '/v1/export/titles/', {'output': 'csv', 'reviews': 'true'}
+        )
+        assert response.status_code == 400
+
+    def test_admin_only(self, client, user):
+        assert client.get('/v1/export/titles/').status_code == 401
+        user_client = APIClient()
+        user_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        assert user_client.get('/v1/export/titles/').status_code == 403
+
+    def test_command(self, catalogue, tmp_path):
+        output = tmp_path / 'titles.ndjson'
+        call_command(
+            'exportcatalogue', '--reviews', '--chunk-size', '3',
+            '--file', str(output),
+        )
+        lines = output.read_text(encoding='utf-8').splitlines()
+        assert len(lines) == 5
+        assert json.loads(lines[0])['reviews'][0]['score'] == 8
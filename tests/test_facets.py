@@ -0,0 +1,68 @@
+import pytest
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def catalogue(category):
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    book = Category.objects.create(name='Книга', slug='book')
+    for name, year, title_category, genres in (
+        ('Титаник', 1997, category, (drama,)),
+        ('Маска', 1994, category, (comedy,)),
+        ('Мастер и Маргарита', 1967, book, (drama, comedy)),
+        ('Без категории', 1994, None, ()),
+    ):
+        title = Title.objects.create(
+            name=name, year=year, category=title_category
+        )
+        title.genre.set(genres)
+
+
+@pytest.mark.django_db
+class TestTitleFacets:
+
+    def test_counts(self, client, catalogue, django_assert_num_queries):
+        # Три запроса с группировкой; версия каталога — в кеше.
+        with django_assert_num_queries(3):
+            response = client.get('/v1/titles/facets/')
+        assert response.status_code == 200
+        assert response.json() == {
+            'count': 4,
+            'genre': [
+                {'slug': 'comedy', 'name': 'Комедия', 'count': 2},
+                {'slug': 'drama', 'name': 'Драма', 'count': 2},
+            ],
+            'category': [
+                {'slug': 'book', 'name': 'Книга', 'count': 1},
+                {'slug': 'movie', 'name': 'Фильм', 'count': 2},
+            ],
+            'year': [
+                {'year': 1967, 'count': 1},
+                {'year': 1994, 'count': 2},
+                {'year': 1997, 'count': 1},
+            ],
+        }
+        with django_assert_num_queries(0):
+            client.get('/v1/titles/facets/')
+
+    def test_active_filter(self, client, catalogue):
+        data = client.get('/v1/titles/facets/', {'genre': 'drama'}).json()
+        assert data['count'] == 2
+        assert data['genre'] == [
+            {'slug': 'comedy', 'name': 'Комедия', 'count': 1},
+            {'slug': 'drama', 'name': 'Драма', 'count': 2},
+        ], 'Проверьте, что фильтр по жанру не скрывает остальные жанры'
+        data = client.get('/v1/titles/facets/', {'year': 1994}).json()
+        assert data['count'] == 2
+        assert data['category'] == [
+            {'slug': 'movie', 'name': 'Фильм', 'count': 1}
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cache_follows_writes(self, client, catalogue):
+        assert client.get('/v1/titles/facets/').json()['count'] == 4
+        Title.objects.filter(name='Маска').delete()
+        assert client.get('/v1/titles/facets/').json()['count'] == 3, (
+            'Проверьте, что кеш facets обновляется при изменении произведений'
+        )
@@ -0,0 +1,95 @@
+import pytest
+from api.views import ReviewViewSet
+from django.core.cache import cache
+from rest_framework import permissions
+from reviews.models import Comment, Genre, Review, Title
+
+
+@pytest.fixture
+def catalogue(title, category, django_user_model):
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    title.genre.set([comedy, drama])
+    Title.objects.create(name='Без категории', year=1994, description='')
+    other = Title.objects.create(
+        name='Маска', year=1994, category=category, description='Комедия'
+    )
+    other.genre.set([comedy])
+    for number, score in enumerate((10, 7, 6)):
+        author = django_user_model.objects.create_user(
+            username=f'author{number}', email=f'author{number}@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=title, author=author, text=f'Отзыв {number}', score=score
+        )
+        Comment.objects.create(review=review, author=author, text='Ответ')
+    return title
+
+
+class NotAuthor0(permissions.BasePermission):
+    """Разрешение, которое читает поля объекта и при чтении."""
+
+    def has_object_permission(self, request, view, obj):
+        return obj.author.username != 'author0'
+
+
+def paths(title):
+    review = title.reviews.order_by('id').first()
+    reviews = f'/v1/titles/{title.id}/reviews/'
+    return [
+        '/v1/titles/',
+        '/v1/titles/?cursor=',
+        '/v1/titles/?ordering=-year&page_size=2',
+        '/v1/titles/?fields=name,rating',
+        '/v1/titles/?omit=genre,category',
+        '/v1/titles/?genre=comedy',
+        f'/v1/titles/{title.id}/',
+        f'/v1/titles/{title.id}/?fields=genre',
+        reviews,
+        f'{reviews}?cursor=',
+        f'{reviews}?omit=text',
+        f'{reviews}{review.id}/',
+        f'{reviews}{review.id}/comments/',
+        f'{reviews}{review.id}/comments/?fields=author,pub_date',
+    ]
+
+
+@pytest.mark.django_db
+class TestFastReadSerializers:
+
+    def test_byte_identical(self, client, catalogue, settings):
+        for path in paths(catalogue):
+            settings.FAST_READ_SERIALIZERS = False
+            cache.clear()
+            expected = client.get(path)
+            settings.FAST_READ_SERIALIZERS = True
+            cache.clear()
+            response = client.get(path)
+            assert response.status_code == expected.status_code == 200
+            assert response.content == expected.content, (
+                f'Проверьте, что быстрый сериализатор для {path} '
+                'отдаёт те же байты, что и сериализатор DRF'
+            )
+
+    def test_not_found(self, client, catalogue):
+        assert client.get('/v1/titles/0/').status_code == 404
+        assert client.get(
+            f'/v1/titles/{catalogue.id}/reviews/0/'
+        ).status_code == 404
+
+    def test_expand_uses_drf(self, client, catalogue):
+        data = client.get(
+            f'/v1/titles/{catalogue.id}/', {'expand': 'reviews'}
+        ).json()
+        assert len(data['reviews']) == 3
+
+    def test_object_permissions_get_instance(
+        self, client, catalogue, monkeypatch
+    ):
+        monkeypatch.setattr(ReviewViewSet, 'permission_classes', [NotAuthor0])
+        url = f'/v1/titles/{catalogue.id}/reviews/'
+        for review in catalogue.reviews.select_related('author'):
+            response = client.get(f'{url}{review.id}/')
+            assert (response.status_code == 200) == (
+                review.author.username != 'author0'
+            ), 'Проверьте, что права на объект проверяются по экземпляру'
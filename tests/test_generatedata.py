@@ -0,0 +1,62 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from reviews.models import Comment, Review, Title
+
+User = get_user_model()
+
+OPTIONS = (
+    '--users', '20', '--categories', '3', '--genres', '5', '--titles', '30',
+    '--reviews', '200', '--seed', '42', '--batch-size', '7',
+)
+
+
+@pytest.mark.django_db
+class TestGenerateData:
+
+    def test_generate(self):
+        call_command('generatedata', *OPTIONS)
+        assert User.objects.count() == 20
+        assert Title.objects.count() == 30
+        counts = list(
+            Title.objects.order_by('-rating_count')
+            .values_list('rating_count', flat=True)
+        )
+        assert counts[0] > counts[-1], (
+            'Проверьте, что количество отзывов распределено по Ципфу'
+        )
+        assert Review.objects.count() == sum(counts) == 200, (
+            'Проверьте, что создаётся ровно --reviews отзывов'
+        )
+        assert Comment.objects.exists()
+        call_command('recountrating', '--check')
+
+    @pytest.mark.parametrize('skew', ['0', '1', '3'])
+    def test_exact_review_count(self, skew):
+        call_command(
+            'generatedata', '--users', '7', '--titles', '13',
+            '--reviews', '80', '--reviews-skew', skew, '--seed', '1',
+        )
+        assert Review.objects.count() == 80
+
+    def test_too_many_reviews(self):
+        with pytest.raises(CommandError):
+            call_command(
+                'generatedata', '--users', '2', '--titles', '3',
+                '--reviews', '7',
+            )
+
+    def test_seed_is_reproducible(self):
+        call_command('generatedata', *OPTIONS)
+        first = list(Review.objects.values_list('title_id', 'score'))
+        Title.objects.all().delete()
+        User.objects.all().delete()
+        call_command('generatedata', *OPTIONS)
+        offset = Title.objects.order_by('id').first().id - 1
+        second = [
+            (title_id - offset, score)
+            for title_id, score in Review.objects.values_list(
+                'title_id', 'score'
+            )
+        ]
+        assert sorted(first) == sorted(second)
@@ -0,0 +1,176 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from reviews import leaderboards
+from reviews.models import (Category, Genre, LeaderboardEntry, Review,
+                            ScoreTotals, Title)
+
+
+@pytest.fixture
+def authors(django_user_model):
+    return [
+        django_user_model.objects.create_user(
+            username=f'author{number}', email=f'author{number}@yamdb.fake'
+        )
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def catalogue(category, authors):
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    titles = {}
+    for name, scores in (
+        ('Титаник', (10,)),
+        ('Маска', (9, 9, 8)),
+        ('Аватар', (4, 5)),
+    ):
+        title = Title.objects.create(name=name, year=2000, category=category)
+        title.genre.add(drama)
+        for author, score in zip(authors, scores):
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score
+            )
+        titles[name] = title
+    return titles
+
+
+def names(client, **params):
+    response = client.get('/v1/leaderboards/', params)
+    assert response.status_code == 200
+    return [entry['title']['name'] for entry in response.json()]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestLeaderboards:
+
+    def test_average_and_bayesian(self, client, catalogue):
+        assert names(client) == ['Титаник', 'Маска', 'Аватар']
+        assert names(client, ranking='bayesian') == [
+            'Маска', 'Титаник', 'Аватар'
+        ], 'Проверьте, что взвешенная оценка учитывает количество отзывов'
+        assert names(client, genre='drama') == names(client)
+        assert names(client, category='movie') == names(client)
+        entry = client.get('/v1/leaderboards/').json()[0]
+        assert entry == {
+            'position': 1,
+            'score': 10.0,
+            'title': {
+                'id': catalogue['Титаник'].id, 'name': 'Титаник',
+                'year': 2000,
+            },
+        }
+
+    def test_incremental_refresh(self, client, catalogue, authors):
+        Review.objects.create(
+            title=catalogue['Аватар'], author=authors[2], text='Да', score=10
+        )
+        Review.objects.filter(title=catalogue['Титаник']).delete()
+        assert names(client) == ['Маска', 'Аватар'], (
+            'Проверьте, что таблицы обновляются при изменении отзывов'
+        )
+
+    def test_membership_changes(self, client, catalogue):
+        book = Category.objects.create(name='Книга', slug='book')
+        titanic = Title.objects.get(pk=catalogue['Титаник'].pk)
+        titanic.category = book
+        titanic.save()
+        titanic.genre.clear()
+        assert names(client, category='book') == ['Титаник']
+        assert 'Титаник' not in names(client, category='movie')
+        assert 'Титаник' not in names(client, genre='drama')
+        catalogue['Маска'].delete()
+        assert names(client) == ['Титаник', 'Аватар']
+
+    def test_size(self, client, catalogue, settings):
+        settings.LEADERBOARD_SIZE = 2
+        call_command('rebuildleaderboards')
+        assert names(client) == ['Титаник', 'Маска']
+
+    def test_constant_queries(self, client, catalogue,
+                              django_assert_num_queries):
+        with django_assert_num_queries(1):
+            client.get('/v1/leaderboards/')
+        with django_assert_num_queries(2):
+            client.get('/v1/leaderboards/', {'genre': 'drama'})
+
+    def test_score_totals(self, catalogue):
+        totals = ScoreTotals.objects.get()
+        assert (totals.rating_sum, totals.rating_count) == (45, 6)
+        Review.objects.filter(title=catalogue['Титаник']).delete()
+        totals.refresh_from_db()
+        assert (totals.rating_sum, totals.rating_count) == (35, 5), (
+            'Проверьте, что общие суммы оценок меняются вместе с отзывами'
+        )
+
+    def test_one_refresh_per_transaction(self, client, catalogue, authors):
+        with CaptureQueriesContext(connection) as context:
+            with transaction.atomic():
+                Review.objects.filter(title=catalogue['Маска']).delete()
+                with pytest.raises(ValueError):
+                    with transaction.atomic():
+                        Review.objects.create(
+                            title=catalogue['Аватар'], author=authors[2],
+                            text='Да', score=10,
+                        )
+                        raise ValueError
+        updates = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_scoretotals"')
+        ]
+        assert len(updates) == 1, (
+            'Проверьте, что общие суммы оценок меняются одним запросом '
+            'за транзакцию'
+        )
+        totals = ScoreTotals.objects.get()
+        assert (totals.rating_sum, totals.rating_count) == (19, 3), (
+            'Проверьте, что изменения из откаченной точки сохранения '
+            'не учитываются'
+        )
+        assert names(client) == ['Титаник', 'Аватар']
+
+    def test_refresh_without_scope_queries(self, client, catalogue,
+                                           authors, settings):
+        settings.LEADERBOARD_MEAN_TOLERANCE = 1
+        with CaptureQueriesContext(connection) as context:
+            Review.objects.create(
+                title=catalogue['Аватар'], author=authors[2], text='Да',
+                score=9,
+            )
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        assert 'leaderboard_score' not in sql and 'SUM(' not in sql, (
+            'Проверьте, что новая оценка вносится в таблицы без запроса '
+            'по всем произведениям'
+        )
+        assert names(client) == ['Титаник', 'Маска', 'Аватар']
+        assert LeaderboardEntry.objects.get(
+            ranking='average', scope='global', position=3
+        ).score == 6.0
+
+    def test_member_drops_out_of_full_board(self, client, catalogue,
+                                            settings):
+        settings.LEADERBOARD_SIZE = 2
+        call_command('rebuildleaderboards')
+        review = Review.objects.get(title=catalogue['Титаник'])
+        review.score = 1
+        review.save()
+        assert names(client) == ['Маска', 'Аватар'], (
+            'Проверьте, что заполненная таблица дополняется, когда '
+            'произведение выбывает из неё'
+        )
+
+    def test_genre_delete(self, catalogue):
+        genre = Genre.objects.get(slug='drama')
+        scope = leaderboards.genre_scope(genre.pk)
+        genre.delete()
+        assert not LeaderboardEntry.objects.filter(scope=scope).exists()
+
+    @pytest.mark.parametrize('params', [
+        {'ranking': 'median'},
+        {'genre': 'unknown'},
+        {'genre': 'drama', 'category': 'movie'},
+    ])
+    def test_invalid(self, client, catalogue, params):
+        response = client.get('/v1/leaderboards/', params)
+        assert response.status_code == 400
@@ -0,0 +1,75 @@
+import importlib.util
+import os
+
+import pytest
+from api import metrics
+from prometheus_client import CollectorRegistry, generate_latest
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+
+from .conftest import root_dir
+
+
+def write_counter(path, pid, value):
+    values = MmapedDict(os.path.join(path, f'counter_{pid}.db'))
+    values.write_value(
+        mmap_key('yamdb_test', 'yamdb_test_total', (), ()), value
+    )
+    values.close()
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_metrics_by_view(self, client, title):
+        client.get('/v1/titles/')
+        client.get(f'/v1/titles/{title.id}/')
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        body = response.content.decode()
+        assert (
+            'yamdb_http_requests_total{method="GET",status="200",'
+            'view="TitleViewSet.list"}'
+        ) in body
+        assert (
+            'yamdb_http_request_duration_seconds_count'
+            '{view="TitleViewSet.retrieve"}'
+        ) in body
+        assert 'yamdb_db_queries_per_request_sum{view="TitleViewSet.list"}' in (
+            body
+        )
+
+    def test_services_dirs(self, tmp_path, monkeypatch):
+        web, outbox = tmp_path / 'web', tmp_path / 'outbox'
+        web.mkdir()
+        outbox.mkdir()
+        write_counter(web, 1, 2)
+        write_counter(outbox, 1, 3)
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(web))
+        monkeypatch.setenv(
+            'PROMETHEUS_COLLECT_DIRS', f'{web}{os.pathsep}{outbox}'
+        )
+        registry = CollectorRegistry()
+        metrics.ServicesCollector(registry, metrics.get_collect_dirs())
+        body = generate_latest(registry).decode()
+        assert 'yamdb_test_total 5.0' in body, (
+            'Проверьте, что /metrics сводит метрики всех сервисов'
+        )
+
+    def test_gunicorn_clears_own_dir(self, tmp_path, monkeypatch):
+        web, outbox = tmp_path / 'web', tmp_path / 'outbox'
+        web.mkdir()
+        outbox.mkdir()
+        write_counter(web, 1, 2)
+        write_counter(outbox, 1, 3)
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(web))
+        spec = importlib.util.spec_from_file_location(
+            'gunicorn_conf',
+            os.path.join(root_dir, 'api_yamdb', 'gunicorn.conf.py'),
+        )
+        config = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(config)
+        config.on_starting(None)
+        assert os.listdir(web) == []
+        assert os.listdir(outbox) == ['counter_1.db'], (
+            'Проверьте, что gunicorn не удаляет файлы метрик других сервисов'
+        )
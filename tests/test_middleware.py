@@ -0,0 +1,48 @@
+import json
+import logging
+
+import pytest
+from api.middleware import RequestProfilingMiddleware
+from django.http import HttpResponse
+from reviews.models import Title
+
+PROFILING_MIDDLEWARE = 'api.middleware.RequestProfilingMiddleware'
+
+
+@pytest.fixture
+def profiling(settings):
+    settings.MIDDLEWARE = [PROFILING_MIDDLEWARE] + settings.MIDDLEWARE
+    settings.PROFILING_REPEATED_QUERIES = 2
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('profiling')
+class TestRequestProfilingMiddleware:
+
+    def test_server_timing_and_log(self, client, title, caplog):
+        with caplog.at_level(logging.INFO, logger='api.profiling'):
+            response = client.get('/v1/titles/')
+        assert 'db;dur=' in response['Server-Timing']
+        record = json.loads(caplog.records[0].getMessage())
+        assert record['view'] == 'TitleViewSet.list'
+        assert record['sql_count'] == 3
+        assert len(record['slowest_sql']) == 3
+
+    def test_repeated_queries_are_reported(self, rf, title, caplog):
+        def n_plus_one_view(request):
+            for pk in range(3):
+                Title.objects.filter(pk=pk).exists()
+            return HttpResponse()
+
+        request = rf.get('/v1/titles/')
+        with caplog.at_level(logging.WARNING, logger='api.profiling'):
+            RequestProfilingMiddleware(n_plus_one_view)(request)
+        assert any(
+            'N+1' in record.getMessage() and 'раз' in record.getMessage()
+            for record in caplog.records
+        ), 'Проверьте, что повторяющиеся запросы попадают в лог'
+
+    def test_single_queries_are_not_reported(self, client, title, caplog):
+        with caplog.at_level(logging.WARNING, logger='api.profiling'):
+            client.get(f'/v1/titles/{title.id}/reviews/')
+        assert not caplog.records
@@ -0,0 +1,93 @@
+import smtplib
+
+import pytest
+from api.models import OutboxEmail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+
+class CountingBackend(EmailBackend):
+    """Почтовый backend, считающий открытые соединения."""
+
+    opened = 0
+    fail = False
+
+    def open(self):
+        if getattr(self, 'is_open', False):
+            return False
+        CountingBackend.opened += 1
+        self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        if CountingBackend.fail:
+            raise smtplib.SMTPServerDisconnected('Соединение разорвано')
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def backend(settings):
+    settings.EMAIL_BACKEND = 'tests.test_outbox.CountingBackend'
+    CountingBackend.opened = 0
+    CountingBackend.fail = False
+    return CountingBackend
+
+
+def signup(client, username):
+    return client.post(
+        '/v1/auth/signup/',
+        {'username': username, 'email': f'{username}@yamdb.fake'},
+    )
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_enqueues_email(self, client, mailoutbox):
+        response = signup(client, 'newbie')
+        assert response.status_code == 200
+        assert not mailoutbox, (
+            'Проверьте, что регистрация не отправляет письмо синхронно'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.recipient == 'newbie@yamdb.fake'
+        assert 'confirmation_code' in email.message
+
+    def test_worker_sends_batches_over_one_connection(
+        self, client, backend, mailoutbox
+    ):
+        for number in range(3):
+            signup(client, f'user{number}')
+        call_command('sendoutbox', '--once', '--batch-size', '2')
+        assert len(mailoutbox) == 3
+        assert backend.opened == 1, (
+            'Проверьте, что письма отправляются через одно SMTP соединение'
+        )
+        assert not OutboxEmail.objects.pending().exists()
+
+    def test_retry_with_backoff(self, client, backend, mailoutbox):
+        signup(client, 'newbie')
+        backend.fail = True
+        call_command('sendoutbox', '--once')
+        email = OutboxEmail.objects.get()
+        assert email.sent is None
+        assert email.attempts == 1
+        assert email.next_attempt > timezone.now()
+        assert 'Соединение разорвано' in email.last_error
+
+        backend.fail = False
+        call_command('sendoutbox', '--once')
+        assert not mailoutbox, 'Письмо не должно отправляться до задержки'
+        OutboxEmail.objects.update(next_attempt=timezone.now())
+        call_command('sendoutbox', '--once')
+        assert len(mailoutbox) == 1
+
+    def test_queue_metrics(self, client):
+        signup(client, 'newbie')
+        body = client.get('/metrics').content.decode()
+        assert 'yamdb_outbox_pending 1.0' in body
+        assert 'yamdb_outbox_oldest_pending_seconds' in body
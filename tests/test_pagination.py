@@ -0,0 +1,84 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def test_titles_cursor_pages(self, client, django_assert_num_queries):
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {i % 50}', year=2000)
+            for i in range(150)
+        )
+        response = client.get('/v1/titles/', {'cursor': ''})
+        assert response.status_code == 200
+        first_page = response.json()
+        assert 'count' not in first_page, (
+            'Проверьте, что курсорная пагинация не выполняет COUNT'
+        )
+        assert first_page['previous'] is None
+
+        # Страница произведений и жанры, без COUNT.
+        with django_assert_num_queries(2):
+            response = client.get(first_page['next'])
+        second_page = response.json()
+        assert second_page['next'] is None
+
+        ids = [
+            title['id']
+            for title in first_page['results'] + second_page['results']
+        ]
+        assert len(ids) == len(set(ids)) == 150
+        assert ids == list(
+            Title.objects.order_by('name', 'id').values_list('id', flat=True)
+        )
+
+    def test_equal_names_without_offset(self, client):
+        Title.objects.bulk_create(
+            Title(name='Произведение', year=2000) for _ in range(250)
+        )
+        expected = list(
+            Title.objects.order_by('id').values_list('id', flat=True)
+        )
+        pages = []
+        url = '/v1/titles/?cursor='
+        with CaptureQueriesContext(connection) as context:
+            while url:
+                page = client.get(url).json()
+                pages.append(page)
+                url = page['next']
+        assert [
+            title['id'] for page in pages for title in page['results']
+        ] == expected
+        assert not any(
+            'OFFSET' in query['sql'] for query in context.captured_queries
+        ), 'Проверьте, что страницы выбираются по составному ключу без OFFSET'
+        previous = client.get(pages[-1]['previous']).json()
+        assert previous['results'] == pages[-2]['results']
+
+    def test_reviews_cursor_pages(self, client, title, django_user_model):
+        for number in range(101):
+            author = django_user_model.objects.create_user(
+                username=f'author{number}', email=f'author{number}@yamdb.fake'
+            )
+            title.reviews.create(author=author, text='Отзыв', score=5)
+        url = f'/v1/titles/{title.id}/reviews/'
+        first_page = client.get(url, {'cursor': ''}).json()
+        second_page = client.get(first_page['next']).json()
+        ids = [
+            review['id']
+            for review in first_page['results'] + second_page['results']
+        ]
+        assert sorted(ids) == sorted(
+            title.reviews.values_list('id', flat=True)
+        )
+
+    def test_invalid_cursor(self, client):
+        response = client.get('/v1/titles/', {'cursor': 'cD1ub3Q='})
+        assert response.status_code == 404
+
+    def test_page_number_is_default(self, client, title):
+        response = client.get('/v1/titles/')
+        assert response.json()['count'] == 1
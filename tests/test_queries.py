@@ -0,0 +1,104 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from reviews.models import Comment, Genre, Review, Title
+
+User = get_user_model()
+
+PAGE_ITEMS = (1, 10)
+
+
+def fill_titles(category, amount):
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(3)
+    ]
+    for i in range(amount):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=2000, category=category
+        )
+        title.genre.set(genres)
+
+
+def fill_reviews(title, amount):
+    for i in range(amount):
+        author = User.objects.create_user(
+            username=f'author-{i}', email=f'author-{i}@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=5
+        )
+        Comment.objects.create(review=review, author=author, text='Коммент')
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+
+    @pytest.mark.parametrize('amount', PAGE_ITEMS)
+    def test_titles_list(
+        self, client, category, django_assert_num_queries, amount
+    ):
+        fill_titles(category, amount)
+        # COUNT, страница произведений с категориями, жанры.
+        with django_assert_num_queries(3):
+            response = client.get('/v1/titles/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == amount
+
+    def test_title_detail(self, client, category, django_assert_num_queries):
+        fill_titles(category, 1)
+        title = Title.objects.get()
+        # Валидатор ETag, произведение с категорией, жанры.
+        with django_assert_num_queries(3):
+            response = client.get(f'/v1/titles/{title.id}/')
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize('amount', PAGE_ITEMS)
+    def test_reviews_list(
+        self, client, title, django_assert_num_queries, amount
+    ):
+        fill_reviews(title, amount)
+        # Произведение, COUNT, страница отзывов с авторами.
+        with django_assert_num_queries(3):
+            response = client.get(f'/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == amount
+
+    @pytest.mark.parametrize('amount', PAGE_ITEMS)
+    def test_comments_list(
+        self, client, title, django_assert_num_queries, amount
+    ):
+        fill_reviews(title, 1)
+        review = Review.objects.get()
+        for i in range(1, amount):
+            Comment.objects.create(
+                review=review, author=review.author, text=f'Коммент {i}'
+            )
+        # Отзыв, COUNT, страница комментариев с авторами.
+        with django_assert_num_queries(3):
+            response = client.get(
+                f'/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            )
+        assert response.status_code == 200
+        assert len(response.json()['results']) == amount
+
+    @pytest.mark.parametrize('url', ('/v1/categories/', '/v1/genres/'))
+    def test_reference_lists(
+        self, client, category, django_assert_num_queries, url
+    ):
+        fill_titles(category, 1)
+        # COUNT и страница объектов.
+        with django_assert_num_queries(2):
+            response = client.get(url)
+        assert response.status_code == 200
+
+    def test_users_list(self, django_assert_num_queries):
+        admin = User.objects.create_user(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        )
+        fill_reviews(Title.objects.create(name='Т', year=2000), 10)
+        client = APIClient()
+        client.force_authenticate(admin)
+        with django_assert_num_queries(2):
+            response = client.get('/v1/users/')
+        assert response.status_code == 200
@@ -0,0 +1,82 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Review, Title
+
+
+def make_review(title, author, score):
+    return Review.objects.create(
+        title=title, author=author, text='Отзыв', score=score
+    )
+
+
+def stored_rating(title):
+    title.refresh_from_db()
+    return title.rating_sum, title.rating_count
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_reviews(self, title, user, django_user_model):
+        other = django_user_model.objects.create_user(
+            username='Other', email='other@yamdb.fake'
+        )
+        review = make_review(title, user, 4)
+        make_review(title, other, 9)
+        assert stored_rating(title) == (13, 2), (
+            'Проверьте, что создание отзыва обновляет рейтинг произведения'
+        )
+
+        review.score = 10
+        review.save()
+        assert stored_rating(title) == (19, 2), (
+            'Проверьте, что изменение оценки обновляет рейтинг произведения'
+        )
+
+        review.delete()
+        assert stored_rating(title) == (9, 1), (
+            'Проверьте, что удаление отзыва обновляет рейтинг произведения'
+        )
+
+    def test_rating_after_bulk_and_cascade_delete(self, title, user):
+        make_review(title, user, 7)
+        Review.objects.filter(title=title).delete()
+        assert stored_rating(title) == (0, 0)
+
+        make_review(title, user, 7)
+        user.delete()
+        assert stored_rating(title) == (0, 0), (
+            'Проверьте, что каскадное удаление отзывов обновляет рейтинг'
+        )
+
+    def test_title_delete_skips_rating_updates(self, title, user,
+                                               category):
+        other = Title.objects.create(name='Другое', year=2000,
+                                     category=category)
+        make_review(title, user, 7)
+        make_review(other, user, 3)
+        with CaptureQueriesContext(connection) as context:
+            title.delete()
+        assert not [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ], 'Проверьте, что агрегаты удаляемого произведения не обновляются'
+        Review.objects.filter(title=other).delete()
+        assert stored_rating(other) == (0, 0)
+
+    def test_with_rating_annotation(self, title, user):
+        assert Title.objects.with_rating().get().rating is None
+        make_review(title, user, 7)
+        assert Title.objects.with_rating().get().rating == 7
+
+    def test_recountrating_repairs_drift(self, title, user):
+        make_review(title, user, 5)
+        Title.objects.filter(pk=title.pk).update(rating_sum=0)
+        with pytest.raises(CommandError):
+            call_command('recountrating', '--check')
+        call_command('recountrating')
+        assert stored_rating(title) == (5, 1)
+        call_command('recountrating', '--check')
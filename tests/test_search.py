@@ -0,0 +1,133 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from reviews.models import Comment, Review, Title
+
+User = get_user_model()
+
+
+@pytest.fixture
+def titles(category):
+    names = ('Титаник', 'Титаник 2', 'Властелин колец', 'Матрица')
+    return [
+        Title.objects.create(name=name, year=2000, category=category)
+        for name in names
+    ]
+
+
+def found_names(client, query, **params):
+    response = client.get('/v1/titles/', {'name': query, **params})
+    assert response.status_code == 200
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def test_ranked_by_relevance(self, client, titles):
+        assert found_names(client, 'Титаник') == ['Титаник', 'Титаник 2'], (
+            'Проверьте, что поиск по названию упорядочен по релевантности'
+        )
+
+    def test_typo_tolerant(self, client, titles):
+        assert found_names(client, 'властилин') == ['Властелин колец'], (
+            'Проверьте, что поиск по названию допускает опечатки'
+        )
+
+    def test_explicit_ordering(self, client, titles):
+        assert found_names(client, 'Титаник', ordering='-name') == [
+            'Титаник 2', 'Титаник'
+        ]
+
+    def test_short_query(self, client, titles):
+        assert found_names(client, 'ат') == ['Матрица']
+
+    def test_index_follows_writes(self, client, titles):
+        titles[3].name = 'Аватар'
+        titles[3].save()
+        assert found_names(client, 'Аватар') == ['Аватар']
+        assert found_names(client, 'Матрица') == []
+        Title.objects.filter(name='Аватар').delete()
+        assert found_names(client, 'Аватар') == [], (
+            'Проверьте, что поисковый индекс обновляется при удалении'
+        )
+
+
+@pytest.fixture
+def moderator_client():
+    moderator = User.objects.create_user(
+        username='moderator', email='moderator@yamdb.fake', role='moderator'
+    )
+    client = APIClient()
+    client.force_authenticate(moderator)
+    return client
+
+
+@pytest.fixture
+def texts(title, user):
+    other = Title.objects.create(name='Аватар', year=2009)
+    review = Review.objects.create(
+        title=title, author=user, text='Трогательные сцены на палубе', score=9
+    )
+    Review.objects.create(
+        title=other, author=user, text='Синие люди и палуба', score=7
+    )
+    Comment.objects.create(
+        review=review, author=user, text='Согласен про сцены'
+    )
+    return review
+
+
+@pytest.mark.django_db
+class TestTextSearch:
+
+    def test_only_moderators(self, client, user, texts):
+        assert client.get('/v1/search/reviews/').status_code == 401
+        api_client = APIClient()
+        api_client.force_authenticate(user)
+        assert api_client.get('/v1/search/reviews/').status_code == 403, (
+            'Проверьте, что поиск по отзывам доступен только модераторам '
+            'и администраторам'
+        )
+
+    def test_reviews(self, moderator_client, title, texts):
+        response = moderator_client.get('/v1/search/reviews/', {'q': 'палуб'})
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 2
+        assert 'count' not in response.json(), (
+            'Проверьте, что поиск использует курсорную пагинацию'
+        )
+        response = moderator_client.get(
+            '/v1/search/reviews/', {'q': 'палуб', 'title': title.id}
+        )
+        assert [review['id'] for review in response.json()['results']] == [
+            texts.id
+        ]
+        response = moderator_client.get(
+            '/v1/search/reviews/', {'q': 'сцены палуба'}
+        )
+        assert len(response.json()['results']) == 0
+
+    def test_comments(self, moderator_client, title, texts):
+        response = moderator_client.get(
+            '/v1/search/comments/',
+            {'q': 'сцены', 'title': title.id, 'author': 'TestUser'},
+        )
+        results = response.json()['results']
+        assert len(results) == 1
+        assert results[0]['title'] == title.id
+        assert results[0]['review'] == texts.id
+        response = moderator_client.get(
+            '/v1/search/comments/',
+            {'q': 'сцены', 'pub_date_after': '2100-01-01T00:00:00Z'},
+        )
+        assert response.json()['results'] == []
+
+    def test_index_follows_writes(self, moderator_client, texts):
+        texts.text = 'Новый текст'
+        texts.save()
+        response = moderator_client.get('/v1/search/reviews/', {'q': 'новый'})
+        assert len(response.json()['results']) == 1
+        texts.delete()
+        response = moderator_client.get('/v1/search/reviews/', {'q': 'новый'})
+        assert response.json()['results'] == []
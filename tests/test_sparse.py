@@ -0,0 +1,125 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Genre, Review
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@pytest.fixture
+def review(title, user):
+    title.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв', score=7
+    )
+    Comment.objects.create(review=review, author=user, text='Ответ')
+    return review
+
+
+def title_queries(client, params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get('/v1/titles/', params)
+    assert response.status_code == 200
+    return response, [
+        query['sql'] for query in context.captured_queries
+        if 'reviews_title"."name' in query['sql']
+        or 'reviews_genre' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def test_title_fields(self, client, review):
+        response, queries = title_queries(
+            client, {'fields': 'id,name,rating'}
+        )
+        assert response.json()['results'] == [
+            {'id': review.title_id, 'name': 'Титаник', 'rating': 7}
+        ]
+        assert not any('reviews_genre' in sql for sql in queries), (
+            'Проверьте, что жанры не загружаются, если они не запрошены'
+        )
+        assert not any('description' in sql for sql in queries), (
+            'Проверьте, что в SQL запрашиваются только нужные столбцы'
+        )
+
+    def test_title_omit(self, client, review):
+        response, queries = title_queries(client, {'omit': 'description'})
+        item = response.json()['results'][0]
+        assert 'description' not in item
+        assert item['genre'] == [{'name': 'Драма', 'slug': 'drama'}]
+        assert item['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert not any('description' in sql for sql in queries)
+
+    def test_title_detail_cached_separately(self, client, title):
+        url = f'/v1/titles/{title.id}/'
+        assert 'year' in client.get(url).json()
+        assert client.get(url, {'fields': 'name'}).json() == {
+            'name': 'Титаник'
+        }
+
+    def test_with_expand(self, client, review):
+        data = client.get(
+            f'/v1/titles/{review.title_id}/',
+            {'expand': 'reviews', 'fields': 'name,reviews'},
+        ).json()
+        assert data['name'] == 'Титаник'
+        assert [item['text'] for item in data['reviews']] == ['Отзыв']
+
+    def test_reviews_and_comments(self, client, review):
+        url = f'/v1/titles/{review.title_id}/reviews/'
+        assert client.get(url, {'fields': 'author,score'}).json()[
+            'results'
+        ] == [{'author': 'TestUser', 'score': 7}]
+        keyset = client.get(url, {'fields': 'text', 'cursor': ''}).json()
+        assert keyset['results'] == [{'text': 'Отзыв'}]
+        comments = client.get(
+            f'{url}{review.id}/comments/', {'omit': 'id,pub_date'}
+        ).json()
+        assert comments['results'] == [{'text': 'Ответ', 'author': 'TestUser'}]
+
+    def test_no_deferred_loads(
+        self, client, review, django_user_model, django_assert_num_queries
+    ):
+        for number in range(3):
+            Review.objects.create(
+                title=review.title,
+                author=django_user_model.objects.create_user(
+                    username=f'author{number}',
+                    email=f'author{number}@yamdb.fake',
+                ),
+                text='Отзыв',
+                score=5,
+            )
+        url = f'/v1/titles/{review.title_id}/reviews/'
+        # Произведение (из него и ETag), количество и страница —
+        # без догрузки отложенных столбцов по каждому отзыву.
+        with django_assert_num_queries(3):
+            client.get(url, {'fields': 'author'})
+        with django_assert_num_queries(2):
+            client.get(url, {'fields': 'text', 'cursor': ''})
+
+    def test_users(self, user):
+        admin = type(user).objects.create_user(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+        )
+        response = client.get(
+            f'/v1/users/{user.username}/', {'fields': 'username,role'}
+        )
+        assert response.json() == {'username': 'TestUser', 'role': 'user'}
+
+    @pytest.mark.parametrize('params', [
+        {'fields': 'name,secret'},
+        {'omit': 'password'},
+        {'fields': 'reviews'},
+    ])
+    def test_unknown_field(self, client, title, params):
+        response = client.get(f'/v1/titles/{title.id}/', params)
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестные поля отклоняются'
+        )